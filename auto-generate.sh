@@ -1,6 +1,11 @@
 #!/bin/bash
-# SunoFLO Auto-Generator - Runs every hour
+# SunoFLO Auto-Generator - Run it hourly from cron
 # Usage: ./auto-generate.sh
+#
+# Each call generates one random style and exits (see src/scheduler.py), so
+# cron invocations never pile up. For one long-lived process instead, run
+# python src/scheduler.py --every 1h --now without --max-runs.
+# Extra arguments are passed through, e.g. ./auto-generate.sh --batch-size 3 --jitter 5m
 
 OUTPUT_DIR="/home/simon/Downloads/sunoflo-auto"
 mkdir -p $OUTPUT_DIR
@@ -13,20 +18,7 @@ echo "========================================"
 cd /home/simon/.openclaw/workspace/sunoflo
 source venv/bin/activate
 
-# Generate random style
+# Random style per run, picked from this list
 STYLES=("Metro Boomin" "Southside" "Wheezy" "Nick Mira" "Pi'erre Bourne" "Armin van Buuren" "Dash Berlin" "Pink Floyd" "The Weeknd" "Kendrick Lamar")
-STYLE=${STYLES[$((RANDOM % ${#STYLES[@]}))]}
 
-# Run generator
-echo "Generating: $STYLE"
-python src/sunoflo.py << EOF
-1
-1
-y
-1
-2
-EOF
-
-echo "========================================"
-echo "Done! Files saved to ~/Downloads"
-echo "========================================"
+exec python src/scheduler.py --every 1h --max-runs 1 --now --output "$OUTPUT_DIR" --styles "${STYLES[@]}" "$@"
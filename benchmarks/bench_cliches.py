@@ -0,0 +1,86 @@
+"""
+Benchmark: cliche filter cost per KB of lyrics
+
+Compares the old per-word re.sub loop with the compiled single-pass filter,
+on the built-in lexicon and on a synthetic large lexicon.
+
+Run: python benchmarks/bench_cliches.py
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cliches import CLICHE_WORDS, BETTER_ALTERNATIVES, ClicheFilter  # noqa: E402
+from sunoflo import LyricGenerator  # noqa: E402
+
+
+def legacy_avoid_cliches(text, words, alternatives):
+    """The original LyricGenerator._avoid_cliches loop"""
+    text_lower = text.lower()
+    for word in words:
+        if word in text_lower and word in alternatives:
+            replacement = random.choice(alternatives[word])
+            text = re.sub(r'\b' + word + r'\b', replacement, text, flags=re.IGNORECASE)
+    return text
+
+
+def synthetic_lexicon(size, seed=7):
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    lexicon = dict(BETTER_ALTERNATIVES)
+    while len(lexicon) < size:
+        words = ["".join(rng.choice(letters) for _ in range(rng.randint(4, 9)))
+                 for _ in range(rng.randint(1, 3))]
+        lexicon[" ".join(words)] = ["alt"]
+    return lexicon
+
+
+def corpus(kb, seed=1):
+    chunks = []
+    size = 0
+    while size < kb * 1024:
+        text = LyricGenerator("Trap", advanced=True, seed=seed + len(chunks)).generate("auto")["full_lyrics"]
+        # Put some cliches back in so the filter has work to do
+        text = text.replace("real", "heaven").replace("cash", "stars")
+        chunks.append(text)
+        size += len(text.encode("utf-8"))
+    return "\n\n".join(chunks)
+
+
+def time_per_kb(fn, text, repeat=5):
+    kb = len(text.encode("utf-8")) / 1024
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / kb * 1e6
+
+
+def main():
+    text = corpus(64)
+    kb = len(text.encode("utf-8")) / 1024
+    print(f"Corpus: {kb:.1f} KB of generated lyrics\n")
+    print(f"{'lexicon':>10}  {'legacy us/KB':>13}  {'compiled us/KB':>15}  {'speedup':>8}")
+
+    for size in (len(BETTER_ALTERNATIVES), 1000, 20000):
+        lexicon = synthetic_lexicon(size)
+        words = list(CLICHE_WORDS) + [w for w in lexicon if w not in CLICHE_WORDS]
+        build = time.perf_counter()
+        filt = ClicheFilter.from_lexicon(words, lexicon)
+        build = time.perf_counter() - build
+
+        legacy = time_per_kb(lambda t: legacy_avoid_cliches(t, words, lexicon), text,
+                             repeat=1 if size > 1000 else 5)
+        compiled = time_per_kb(filt.rewrite, text)
+        print(f"{size:>10}  {legacy:>13.1f}  {compiled:>15.1f}  {legacy / compiled:>7.1f}x"
+              f"   (compile {build * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
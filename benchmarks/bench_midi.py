@@ -0,0 +1,74 @@
+"""
+Benchmark: MIDI writer throughput in events/sec
+
+Writes a full default arrangement through SunoFLO.generate_midi and a long
+synthetic track straight through MidiFile.
+
+Run: python benchmarks/bench_midi.py
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from midi_writer import MidiFile, PPQ  # noqa: E402
+import patterns  # noqa: E402
+from sunoflo_complete import SunoFLO  # noqa: E402
+
+
+def bench_arrangement(path, repeat=20):
+    flo = SunoFLO("Trap", "Metro Boomin")
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        flo.generate_midi(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_raw(path, notes=200_000):
+    step = PPQ // 4
+    start = time.perf_counter()
+    with MidiFile(path) as midi:
+        midi.conductor(140, "C minor")
+        with midi.track("Notes") as track:
+            for i in range(notes):
+                track.note(i * step, 36 + (i % 24), 100, step - 10)
+        events = midi.events
+    return events, time.perf_counter() - start
+
+
+def bench_vectorized(path, notes=200_000):
+    bar = patterns.from_grid(patterns.GRIDS["melody"], 48)
+    song = patterns.tile(bar, notes // len(bar))
+    start = time.perf_counter()
+    with MidiFile(path) as midi:
+        midi.conductor(140, "C minor")
+        with midi.track("Notes") as track:
+            patterns.write_notes(track, song)
+        events = midi.events
+    return events, time.perf_counter() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.mid")
+
+        elapsed = bench_arrangement(path)
+        print(f"generate_midi (default arrangement): {elapsed * 1000:.2f} ms per file")
+
+        events, elapsed = bench_raw(path)
+        size = os.path.getsize(path)
+        print(f"raw note stream: {events:,} events in {elapsed:.2f}s "
+              f"= {events / elapsed:,.0f} events/sec ({size / 1024:.0f} KB)")
+
+        events, elapsed = bench_vectorized(path)
+        print(f"vectorized encode: {events:,} events in {elapsed:.3f}s "
+              f"= {events / elapsed:,.0f} events/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Benchmark suite: every generator hot path, all three modules side by side
+
+Each case runs a fixed seed sequence (SEED, SEED+1, ...) and reports ops/sec,
+p50/p99 latency and peak traced memory. With a baseline file, any case whose
+ops/sec drops, or whose peak memory grows, by more than --tolerance fails the
+run (exit code 1).
+
+Run:  python benchmarks/run.py                 # compare with benchmarks/baseline.json if present
+      python benchmarks/run.py --check         # same, but a missing baseline fails the run
+      python benchmarks/run.py --save          # record a new baseline for this machine
+      python benchmarks/run.py --filter lyrics
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import functools
+import tempfile
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from sunoflo import RHYME_ANCHORS, LyricGenerator, StemGenerator, SunoFLOGenerator  # noqa: E402
+from sunoflo_complete import SunoFLO  # noqa: E402
+from sunoflo_ultimate import SunoFLO_Ultimate, save_project  # noqa: E402
+from ngram import default_model  # noqa: E402
+from prompts import PromptSpace  # noqa: E402
+from analysis import analyze  # noqa: E402
+
+SEED = 1234
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+MEMORY_RUNS = 3   # tracemalloc slows everything down, so peak memory is sampled separately
+
+
+# ========== CASES ==========
+def _lazy(build: Callable[[], object]) -> Callable[[], object]:
+    """Fixture built on first use, so filtered runs only pay for the cases they select"""
+    return functools.lru_cache(maxsize=None)(build)
+
+
+def _cases(tmp: str) -> List[Tuple[str, str, int, Callable[[int], object]]]:
+    """(operation, module, iterations, fn(seed))"""
+    cliche_text = _lazy(lambda: LyricGenerator("Trap", True, seed=SEED).generate("flex")["full_lyrics"] * 4)
+    cliche_gen = LyricGenerator("Trap", True, seed=SEED)
+    midi_path = os.path.join(tmp, "bench.mid")
+    line_gen = LyricGenerator("Trap", False, seed=SEED)
+    model = _lazy(default_model)
+    space = _lazy(lambda: PromptSpace("Metro Boomin"))
+    reference = _lazy(lambda: StemGenerator("Trap", "Metro Boomin").render(
+        tmp, SEED, "reference", workers=1)["mix"])
+
+    def ultimate_project(seed):
+        project = SunoFLO_Ultimate("Metro Boomin", "flex", "trap", seed=seed).generate_project()
+        return save_project(project, os.path.join(tmp, "ultimate.txt"))
+
+    return [
+        ("lyrics", "sunoflo",
+         500, lambda s: LyricGenerator("Trap", False, seed=s).generate("flex")),
+        ("lyrics", "sunoflo_complete",
+         500, lambda s: SunoFLO("Trap", "Metro Boomin", seed=s).generate_lyrics(False, "flex")),
+        ("lyrics", "sunoflo_ultimate",
+         500, lambda s: SunoFLO_Ultimate("Metro Boomin", "flex", "trap", seed=s).generate_lyrics()),
+        ("lyrics-advanced", "sunoflo",
+         500, lambda s: LyricGenerator("Trap", True, seed=s).generate("flex")),
+        ("lyrics-advanced", "sunoflo_complete",
+         500, lambda s: SunoFLO("Trap", "Metro Boomin", seed=s).generate_lyrics(True, "flex")),
+        ("lyric-line", "sunoflo",
+         20000, lambda s: line_gen._generate_line(RHYME_ANCHORS[s % len(RHYME_ANCHORS)], "money")),
+        ("lyric-line", "ngram",
+         5000, lambda s: next(model().couplets(line_gen.rng, 1))),
+        ("avoid-cliches", "sunoflo",
+         2000, lambda s: cliche_gen._avoid_cliches(cliche_text())),
+        ("suno-prompt", "sunoflo_ultimate",
+         5000, lambda s: SunoFLO_Ultimate("Metro Boomin", "flex", "trap", seed=s).generate_suno_prompt()),
+        ("suno-prompt", "prompts",
+         5000, lambda s: space()[s % len(space())]),
+        ("stems", "sunoflo",
+         5000, lambda s: StemGenerator("Trap", "Metro Boomin").generate_all_stems()),
+        ("midi", "sunoflo_complete",
+         100, lambda s: SunoFLO("Trap", "Metro Boomin", seed=s).generate_midi(midi_path)),
+        ("audio", "render",
+         20, lambda s: StemGenerator("Trap", "Metro Boomin").render(tmp, s, workers=1)),
+        ("reference-match", "analysis",
+         10, lambda s: analyze(reference())),
+        ("midi-song", "sunoflo_ultimate",
+         100, lambda s: SunoFLO_Ultimate("Metro Boomin", "flex", "rock", seed=s).generate_midi(midi_path)),
+        ("project", "sunoflo",
+         200, lambda s: SunoFLOGenerator("Trap", "Metro Boomin", seed=s).generate(
+             tmp, include_lyrics=True, lyric_topic="flex", verbose=False)),
+        ("project", "sunoflo_complete",
+         100, lambda s: SunoFLO("Trap", "Metro Boomin", seed=s).generate_project(tmp, verbose=False)),
+        ("project", "sunoflo_ultimate",
+         200, ultimate_project),
+    ]
+
+
+# ========== MEASUREMENT ==========
+def _percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(fn: Callable[[int], object], iterations: int) -> Dict[str, float]:
+    fn(SEED)   # warm caches and lazy loads outside the timed runs
+    latencies = []
+    clock = time.perf_counter
+    for i in range(iterations):
+        start = clock()
+        fn(SEED + i)
+        latencies.append(clock() - start)
+
+    tracemalloc.start()
+    for i in range(MEMORY_RUNS):
+        fn(SEED + i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        "iterations": iterations,
+        "ops_per_sec": iterations / total if total > 0 else 0.0,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+
+# ========== BASELINE ==========
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regression messages for cases slower or hungrier than baseline beyond tolerance"""
+    failures = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current["ops_per_sec"] < previous["ops_per_sec"] * (1 - tolerance):
+            failures.append(f"{name}: {current['ops_per_sec']:.1f} ops/sec "
+                            f"vs baseline {previous['ops_per_sec']:.1f}")
+        if current["peak_kb"] > previous["peak_kb"] * (1 + tolerance) + 64:
+            failures.append(f"{name}: peak {current['peak_kb']:.0f} KB "
+                            f"vs baseline {previous['peak_kb']:.0f} KB")
+    return failures
+
+
+def print_table(results: Dict[str, Dict], baseline: Dict[str, Dict]):
+    print(f"{'operation':<16} {'module':<18} {'ops/sec':>10} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'peak KB':>9} {'vs base':>8}")
+    print("-" * 84)
+    last_op = None
+    for name, r in results.items():
+        op, module = name.split("/")
+        if last_op is not None and op != last_op:
+            print()
+        last_op = op
+        change = ""
+        if name in baseline and baseline[name]["ops_per_sec"]:
+            change = f"{r['ops_per_sec'] / baseline[name]['ops_per_sec'] - 1:+.0%}"
+        print(f"{op:<16} {module:<18} {r['ops_per_sec']:>10.1f} {r['p50_ms']:>9.3f} "
+              f"{r['p99_ms']:>9.3f} {r['peak_kb']:>9.0f} {change:>8}")
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO benchmark suite")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every iteration count")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="Fail when there is no baseline, or no baseline entry for a case run")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed fractional slowdown / memory growth (default 0.25)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for op, module, iterations, fn in _cases(tmp):
+            name = f"{op}/{module}"
+            if args.filter not in name:
+                continue
+            results[name] = measure(fn, max(1, int(iterations * args.scale)))
+
+    print_table(results, baseline)
+
+    if args.save:
+        merged = {**baseline, **results}
+        with open(args.baseline, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline saved: {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline} (run with --save to record one)")
+        return 1 if args.check else 0
+
+    failures = compare(results, baseline, args.tolerance)
+    if args.check:
+        failures += [f"{name}: no baseline entry" for name in results if name not in baseline]
+    if failures:
+        print(f"\n✗ {len(failures)} regression(s) beyond {args.tolerance:.0%}:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print(f"\n✓ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+SunoFLO - Reference Analysis
+Tempo and key of a reference WAV, matched against the style registry
+
+The file is memory-mapped and streamed in fixed-size chunks, downmixed and
+decimated to ~22 kHz. One STFT pass feeds two accumulators. The first is
+spectral flux (the onset envelope), autocorrelated in overlapping windows
+and summed. The second is a 12-bin chroma vector. Neither grows with the
+file, so an hour-long reference needs about as much memory as a short loop.
+BPM is the autocorrelation peak (plus its multiples) under a prior centred
+on 120; key is the best Krumhansl-Kessler profile correlation.
+
+    python src/analysis.py reference.wav --top 5
+    python src/analysis.py ./references --workers 8 --json > matches.jsonl
+"""
+
+import os
+import sys
+import mmap
+import json
+import time
+import struct
+import argparse
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from midi_writer import key_signature
+from styles import REGISTRY
+
+WAV_EXTENSIONS = (".wav", ".wave")
+TARGET_RATE = 22050
+CHUNK_FRAMES = 1 << 17          # source frames per mapped chunk (~3 s at 44.1 kHz)
+N_FFT = 2048
+HOP = 256
+ONSET_WINDOW = 2048             # onset frames per autocorrelation window (~24 s)
+MIN_BPM, MAX_BPM = 60.0, 200.0
+COMB = (1.0, 0.5, 0.25, 0.125)  # weights for the beat lag and its multiples
+CHROMA_RANGE = (100.0, 1000.0)   # fundamentals; upper partials blur major/minor
+
+# Krumhansl-Kessler key profiles, tonic first
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+# Spellings as used by the style registry and midi_writer.KEY_SIGNATURES
+MAJOR_NAMES = ["C", "Db", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+MINOR_NAMES = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "G#", "A", "Bb", "B"]
+
+
+# ========== WAV STREAMING ==========
+class WavReader:
+    """Memory-mapped PCM/float WAV, read as mono float32 chunks"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path}: empty file")
+        self._parse()
+
+    def _parse(self):
+        data = self._map
+        if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+            raise ValueError(f"{self.path}: not a RIFF/WAVE file")
+        pos, fmt = 12, None
+        while pos + 8 <= len(data):
+            chunk_id, size = struct.unpack_from("<4sI", data, pos)
+            body = pos + 8
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack_from("<HHIIHH", data, body)
+                if fmt[0] == 0xFFFE:   # WAVE_FORMAT_EXTENSIBLE: real format leads the sub-format GUID
+                    fmt = (struct.unpack_from("<H", data, body + 24)[0],) + fmt[1:]
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"{self.path}: data chunk before fmt chunk")
+                self.offset, self.size = body, min(size, len(data) - body)
+                break
+            pos = body + size + (size & 1)
+        else:
+            raise ValueError(f"{self.path}: no data chunk")
+
+        self.format, self.channels, self.rate, _, self.block_align, self.bits = fmt
+        if self.format == 1 and self.bits in (8, 16, 24, 32):
+            self.dtype = {8: np.uint8, 16: np.dtype("<i2"), 24: np.uint8, 32: np.dtype("<i4")}[self.bits]
+        elif self.format == 3 and self.bits in (32, 64):
+            self.dtype = np.dtype("<f4") if self.bits == 32 else np.dtype("<f8")
+        else:
+            raise ValueError(f"{self.path}: unsupported WAV format {self.format}/{self.bits}-bit")
+        self.frames = self.size // self.block_align
+
+    @property
+    def seconds(self) -> float:
+        return self.frames / self.rate
+
+    def _samples(self, start: int, count: int) -> np.ndarray:
+        """Frames [start, start+count) as float32 in [-1, 1], shape (count, channels)"""
+        offset = self.offset + start * self.block_align
+        if self.bits == 24:
+            raw = np.frombuffer(self._map, np.uint8, count * self.block_align, offset).reshape(-1, 3)
+            ints = raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16)
+            values = (np.where(ints & 0x800000, ints - (1 << 24), ints) / float(1 << 23)).astype(np.float32)
+        else:
+            raw = np.frombuffer(self._map, self.dtype, count * self.channels, offset)
+            if self.format == 3:
+                values = raw.astype(np.float32)
+            elif self.bits == 8:
+                values = (raw.astype(np.float32) - 128) / 128
+            else:
+                values = raw.astype(np.float32) / float(1 << (self.bits - 1))
+        return values.reshape(count, self.channels)
+
+    def chunks(self, frames: int = CHUNK_FRAMES) -> Iterator[np.ndarray]:
+        """Mono float32 chunks of up to `frames` frames
+
+        Pages already converted are dropped from the mapping as we go, so
+        resident memory stays at about one chunk however long the file is.
+        """
+        released = 0
+        for start in range(0, self.frames, frames):
+            count = min(frames, self.frames - start)
+            yield self._samples(start, count).mean(axis=1)
+            end = (self.offset + (start + count) * self.block_align) // mmap.PAGESIZE * mmap.PAGESIZE
+            if hasattr(mmap, "MADV_DONTNEED") and end > released:
+                self._map.madvise(mmap.MADV_DONTNEED, released, end - released)
+                released = end
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ========== FEATURES ==========
+class _Features:
+    """Streaming STFT accumulators: onset autocorrelation and chroma"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.frame_rate = rate / HOP
+        self.max_lag = int(np.ceil(self.frame_rate * 60 / MIN_BPM * len(COMB))) + 2
+        self.window = np.hanning(N_FFT).astype(np.float32)
+        freqs = np.fft.rfftfreq(N_FFT, 1 / rate)
+        self.bins = np.flatnonzero((freqs >= CHROMA_RANGE[0]) & (freqs <= CHROMA_RANGE[1]))
+        pitch_class = np.round(12 * np.log2(freqs[self.bins] / 440.0) + 69).astype(np.int64) % 12
+        self.fold = np.eye(12)[pitch_class]   # (bins, 12) one-hot: spectrum -> chroma
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.prev: Optional[np.ndarray] = None
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.autocorr = np.zeros(self.max_lag + 1)
+        self.windows = 0
+        self.chroma = np.zeros(12)
+
+    def feed(self, samples: np.ndarray):
+        buf = np.concatenate([self.tail, samples])
+        if len(buf) < N_FFT:
+            self.tail = buf
+            return
+        count = (len(buf) - N_FFT) // HOP + 1
+        frames = np.lib.stride_tricks.sliding_window_view(buf, N_FFT)[::HOP][:count]
+        mag = np.abs(np.fft.rfft(frames * self.window, axis=1))
+        self.tail = buf[count * HOP:]
+
+        chroma = mag[:, self.bins] @ self.fold
+        self.chroma += (chroma / (chroma.max(axis=1, keepdims=True) + 1e-9)).sum(axis=0)   # frames vote equally
+        log = np.log1p(100 * mag)
+        previous = log[:1] if self.prev is None else self.prev[None, :]
+        flux = np.maximum(np.diff(log, axis=0, prepend=previous), 0).sum(axis=1)
+        self.prev = log[-1]
+        self._onsets(flux.astype(np.float32))
+
+    def _onsets(self, values: np.ndarray):
+        self.pending = np.concatenate([self.pending, values])
+        while len(self.pending) >= ONSET_WINDOW:
+            self._correlate(self.pending[:ONSET_WINDOW])
+            self.pending = self.pending[ONSET_WINDOW // 2:]
+
+    def _correlate(self, envelope: np.ndarray):
+        envelope = envelope - envelope.mean()
+        spectrum = np.fft.rfft(envelope, 2 * len(envelope))
+        ac = np.fft.irfft(spectrum * np.conj(spectrum))[:self.max_lag + 1]
+        if ac[0] > 0:   # every window votes equally, loud or quiet
+            self.autocorr[:len(ac)] += ac / ac[0]
+            self.windows += 1
+
+    def finish(self):
+        """Correlate what is left if no full window was seen (short files)"""
+        if not self.windows and len(self.pending) > 4:
+            self._correlate(self.pending)
+
+
+def estimate_bpm(autocorr: np.ndarray, frame_rate: float) -> Tuple[float, float]:
+    """(bpm, strength) from a summed onset autocorrelation"""
+    if not autocorr.any():
+        return 0.0, 0.0
+    bpms = np.arange(MIN_BPM, MAX_BPM + 0.05, 0.1)
+    lags = frame_rate * 60 / bpms
+    lag_axis = np.arange(len(autocorr))
+    score = sum(w * np.interp(lags * (k + 1), lag_axis, autocorr, right=0.0) for k, w in enumerate(COMB))
+    prior = np.exp(-0.5 * np.log2(bpms / 120.0) ** 2)   # one-octave spread: prefers 80-180 over halves/doubles
+    best = int(np.argmax(score * prior))
+    return round(float(bpms[best]), 1), float(score[best] / (autocorr[0] * sum(COMB)))
+
+
+def estimate_key(chroma: np.ndarray) -> Tuple[str, float]:
+    """(key name, correlation) of the best-matching major/minor profile"""
+    if not chroma.any():
+        return "C major", 0.0
+    best = ("C major", -2.0)
+    for profile, names, mode in ((MAJOR_PROFILE, MAJOR_NAMES, "major"),
+                                 (MINOR_PROFILE, MINOR_NAMES, "minor")):
+        for tonic in range(12):
+            r = float(np.corrcoef(chroma, np.roll(profile, tonic))[0, 1])
+            if r > best[1]:
+                best = (f"{names[tonic]} {mode}", r)
+    return best[0], round(best[1], 3)
+
+
+# ========== MATCHING ==========
+def key_distance(a: str, b: str) -> float:
+    """Steps around the circle of fifths, plus half a step for a change of mode"""
+    (sa, ma), (sb, mb) = key_signature(a), key_signature(b)
+    steps = abs(sa - sb) % 12
+    return min(steps, 12 - steps) + 0.5 * (ma != mb)
+
+
+def tempo_distance(bpm: float, target: float) -> float:
+    """BPM gap, counting half- and double-time readings at a small penalty"""
+    return min(abs(bpm - target), abs(bpm * 2 - target) + 4, abs(bpm / 2 - target) + 4)
+
+
+def match_styles(bpm: float, key: str, top: int = 5, registry=REGISTRY) -> List[Tuple[str, float]]:
+    """Closest (style, distance) pairs; 10 BPM weighs the same as one step of fifths"""
+    scored = [(name, round(tempo_distance(bpm, preset["bpm"]) / 10 + key_distance(key, preset["key"]), 3))
+              for name, preset in registry.items()]
+    scored.sort(key=lambda item: item[1])
+    return scored[:top]
+
+
+# ========== ANALYSIS ==========
+@dataclass
+class Reference:
+    path: str
+    seconds: float
+    bpm: float
+    key: str
+    tempo_strength: float = 0.0
+    key_strength: float = 0.0
+    matches: List[Tuple[str, float]] = field(default_factory=list)
+
+
+def analyze(path: str, top: int = 5, chunk_frames: int = CHUNK_FRAMES) -> Reference:
+    """Stream one WAV file through the feature accumulators and match it"""
+    with WavReader(path) as wav:
+        factor = max(1, int(round(wav.rate / TARGET_RATE)))
+        chunk_frames -= chunk_frames % factor
+        features = _Features(wav.rate / factor)
+        for chunk in wav.chunks(chunk_frames):
+            if factor > 1:   # box-filter decimation; chunks are multiples of factor except the last
+                chunk = chunk[:len(chunk) - len(chunk) % factor].reshape(-1, factor).mean(axis=1)
+            features.feed(chunk)
+        seconds = wav.seconds
+    features.finish()
+    bpm, tempo_strength = estimate_bpm(features.autocorr, features.frame_rate)
+    key, key_strength = estimate_key(features.chroma)
+    return Reference(path, round(seconds, 2), bpm, key, round(tempo_strength, 3), key_strength,
+                     match_styles(bpm, key, top))
+
+
+def analyze_file(task: Tuple[str, int]) -> Dict:
+    """Pool worker: failures are reported, not raised"""
+    path, top = task
+    try:
+        return {"ok": True, **asdict(analyze(path, top))}
+    except (ValueError, OSError, struct.error) as e:
+        return {"ok": False, "path": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def find_wavs(root: str) -> List[str]:
+    if os.path.isfile(root):
+        return [root]
+    found = []
+    for dirpath, _, files in os.walk(root):
+        found.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(WAV_EXTENSIONS))
+    return sorted(found)
+
+
+def analyze_paths(paths: List[str], top: int = 5, workers: Optional[int] = None) -> Dict:
+    """Analyze files and directories of references, one file per worker task"""
+    files = [f for path in paths for f in find_wavs(path)]
+    tasks = [(f, top) for f in files]
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        results = [analyze_file(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(analyze_file, tasks))
+    elapsed = time.perf_counter() - start
+    return {"results": results, "files": len(results),
+            "failed": [r for r in results if not r["ok"]],
+            "audio_seconds": round(sum(r.get("seconds", 0) for r in results), 1),
+            "seconds": round(elapsed, 3)}
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO reference tempo/key analysis and style matching")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories of them")
+    parser.add_argument("--top", type=int, default=5, help="Closest styles to list")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--json", action="store_true", help="One JSON record per file")
+    args = parser.parse_args(argv)
+
+    report = analyze_paths(args.paths, args.top, args.workers)
+    for r in report["results"]:
+        if args.json:
+            print(json.dumps(r))
+        elif r["ok"]:
+            styles = ", ".join(name for name, _ in r["matches"])
+            print(f"✓ {r['path']}: {r['bpm']:.1f} BPM, {r['key']} ({r['seconds']:.0f}s) -> {styles}")
+        else:
+            print(f"  ✗ {r['path']}: {r['error']}")
+    if not args.json:
+        print(f"📁 {report['files']} file(s), {report['audio_seconds']:.0f}s of audio in {report['seconds']}s")
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+SunoFLO - Arranger
+Full-length multi-track MIDI from a section list, with repeated sections encoded once
+
+A song structure ("Intro", "Verse 1", "Hook", ...) expands to a timeline of
+(section, bars, lanes). Each distinct piece of section material (one lane,
+so many bars, with or without a fill) is encoded to MTrk bytes once,
+relative to its own start, and cached. Laying it down again only rewrites
+its first delta for the new offset, so a song with eight hooks costs about
+what its unique sections cost.
+
+    python src/arranger.py song.mid --structure trap --style "Metro Boomin"
+    python src/arranger.py song.mid --sections Intro "Verse 1" Hook Hook Outro
+"""
+
+import re
+import sys
+import argparse
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import patterns
+from midi_writer import MidiFile, var_len, DRUM_CHANNEL
+
+LANES = ("drums", "bass", "melody")
+CHANNELS = {"drums": DRUM_CHANNEL, "bass": 1, "melody": 2}
+
+# ========== SECTION SHAPES ==========
+# Section kind -> (bars, lanes playing); numbered sections ("Verse 2", "Drop 1") share a kind
+SECTION_SHAPES = {
+    "Intro": (4, ("melody",)),
+    "Verse": (8, LANES),
+    "Pre-Hook": (4, ("drums", "melody")),
+    "Pre-Chorus": (4, ("drums", "melody")),
+    "Hook": (8, LANES),
+    "Chorus": (8, LANES),
+    "Bridge": (8, ("bass", "melody")),
+    "Break": (8, ("melody",)),
+    "Build": (8, ("drums", "melody")),
+    "Drop": (16, LANES),
+    "Outro": (4, ("bass", "melody")),
+}
+# Sections that end on a drum fill into whatever comes next
+FILL_KINDS = {"Pre-Hook", "Pre-Chorus", "Build"}
+FILL_STEPS = range(12, 16)   # a 16th roll over the last beat
+
+Block = Tuple[int, bytes, int, int]   # (first event tick, bytes after its delta, last tick, events)
+
+
+def section_kind(section: str) -> str:
+    return re.sub(r"\s*\d+$", "", section.strip())
+
+
+def to_arrangement(sections: Sequence[str]) -> List[Tuple[str, int, Tuple[str, ...]]]:
+    """(section, bars, lanes) for a SONG_STRUCTURES section list; unknown kinds play everything"""
+    return [(section, *SECTION_SHAPES.get(section_kind(section), (8, LANES)))
+            for section in sections]
+
+
+def fill_bar(bar: np.ndarray, step: int = patterns.STEP) -> np.ndarray:
+    """The bar with every 16th of the last beat played, at the lane's first pitch"""
+    if not len(bar):
+        return bar
+    taken = set((bar["tick"] // step).tolist())
+    steps = [s for s in FILL_STEPS if s not in taken]
+    roll = np.zeros(len(steps), dtype=patterns.NOTE_DTYPE)
+    roll["tick"] = np.array(steps, dtype=np.int64) * step
+    roll["pitch"] = bar["pitch"][0]
+    roll["velocity"] = np.linspace(70, 110, len(steps)).astype(np.int16) if steps else 0
+    roll["duration"] = bar["duration"].min()
+    out = np.concatenate([bar, roll])
+    return out[np.argsort(out["tick"], kind="stable")]
+
+
+def _split_first_delta(data: bytes) -> Tuple[int, bytes]:
+    """Decode the leading var-len delta; returns (delta, remaining bytes)"""
+    value, i = 0, 0
+    while True:
+        byte = data[i]
+        value = (value << 7) | (byte & 0x7F)
+        i += 1
+        if not byte & 0x80:
+            return value, data[i:]
+
+
+# ========== ARRANGER ==========
+class Arranger:
+    """Lays one-bar lane patterns across an arrangement, caching encoded section blocks"""
+
+    def __init__(self, bars: Dict[str, np.ndarray],
+                 arrangement: Sequence[Tuple[str, int, Sequence[str]]],
+                 bar_ticks: int = patterns.BAR_TICKS):
+        self.bars = bars
+        self.arrangement = list(arrangement)
+        self.bar_ticks = bar_ticks
+        self._blocks: Dict[tuple, Optional[Block]] = {}
+        self.placed = 0
+
+    @property
+    def encoded(self) -> int:
+        """Distinct section blocks actually encoded"""
+        return len(self._blocks)
+
+    @property
+    def length(self) -> int:
+        return sum(bars for _, bars, _ in self.arrangement) * self.bar_ticks
+
+    def timeline(self):
+        """(section, start tick, bars, lanes) for every section in order"""
+        start = 0
+        for section, bars, lanes in self.arrangement:
+            yield section, start, bars, lanes
+            start += bars * self.bar_ticks
+
+    def section_notes(self, section: str, bars: int, lane: str) -> np.ndarray:
+        """A lane's notes for one section, ticks relative to the section start"""
+        bar = self.bars[lane]
+        notes = patterns.tile(bar, bars, self.bar_ticks)
+        if lane == "drums" and section_kind(section) in FILL_KINDS:
+            last = patterns.shift(fill_bar(bar), (bars - 1) * self.bar_ticks)
+            notes = patterns.concat([notes[notes["tick"] < (bars - 1) * self.bar_ticks], last])
+        # Nothing may ring past the section end, or blocks could not be laid back to back
+        end = bars * self.bar_ticks
+        notes["duration"] = np.minimum(notes["duration"], end - notes["tick"])
+        return notes
+
+    def block(self, section: str, bars: int, lane: str, channel: int) -> Optional[Block]:
+        key = (lane, channel, bars, section_kind(section) in FILL_KINDS)
+        if key not in self._blocks:
+            data, last_tick, events = patterns.encode_notes(
+                self.section_notes(section, bars, lane), channel, 0)
+            if events:
+                first, body = _split_first_delta(data)
+                self._blocks[key] = (first, body, last_tick, events)
+            else:
+                self._blocks[key] = None
+        return self._blocks[key]
+
+    def render(self, lane: str, channel: int, start_tick: int = 0) -> Tuple[bytes, int, int]:
+        """A lane's whole-song MTrk bytes with deltas from start_tick (as encode_notes returns)"""
+        out = bytearray()
+        last, events = start_tick, 0
+        for section, start, bars, lanes in self.timeline():
+            if lane not in lanes:
+                continue
+            block = self.block(section, bars, lane, channel)
+            if block is None:
+                continue
+            first, body, block_last, block_events = block
+            out += var_len(start + first - last)
+            out += body
+            last = start + block_last
+            events += block_events
+            self.placed += 1
+        return bytes(out), last, events
+
+    def lanes(self) -> Dict[str, np.ndarray]:
+        """The same song as note arrays (for humanizing or the FLP writer)"""
+        return {
+            lane: patterns.concat(patterns.shift(self.section_notes(section, bars, lane), start)
+                                  for section, start, bars, lanes in self.timeline()
+                                  if lane in lanes)
+            for lane in self.bars
+        }
+
+    def write_tracks(self, midi, channels: Optional[Dict[str, int]] = None):
+        """One track per lane on an open MidiFile"""
+        channels = channels or CHANNELS
+        for lane in self.bars:
+            with midi.track(lane.capitalize()) as track:
+                track.flush_pending()
+                track.raw(*self.render(lane, channels[lane], track.last_tick))
+
+
+# ========== CLI ==========
+def main(argv=None):
+    from sunoflo_complete import SunoFLO
+    from sunoflo_ultimate import SONG_STRUCTURES
+
+    parser = argparse.ArgumentParser(description="SunoFLO song arranger")
+    parser.add_argument("out", help="Output .mid")
+    parser.add_argument("--structure", default="trap", choices=sorted(SONG_STRUCTURES))
+    parser.add_argument("--sections", nargs="+", help="Explicit section list instead of a structure")
+    parser.add_argument("--style", default="Metro Boomin")
+    parser.add_argument("--genre", default="Trap")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    sections = args.sections or SONG_STRUCTURES[args.structure]["sections"]
+    arrangement = to_arrangement(sections)
+    flo = SunoFLO(args.genre, args.style, seed=args.seed)
+    arranger = flo.arranger(arrangement)
+    with MidiFile(args.out) as midi:
+        midi.conductor(flo.bpm, flo.key)
+        arranger.write_tracks(midi)
+    bars = sum(b for _, b, _ in arrangement)
+    print(f"✓ {len(sections)} sections, {bars} bars at {flo.bpm} BPM in {flo.key}: "
+          f"{arranger.encoded} blocks encoded, {arranger.placed} placed")
+    print(f"📁 {args.out}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
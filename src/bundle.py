@@ -0,0 +1,333 @@
+"""
+SunoFLO - Bundles
+Pack a batch into one appendable .zip instead of thousands of loose files
+
+A bundle is a plain, uncompressed (stored) ZIP, so any unzip tool opens it;
+the central directory is the random-access index. Projects are stored under
+<engine>/<style>/<seed>/, unique per job and seed, so re-running a style
+never overwrites an earlier project.
+
+Appending writes the new local entries plus a rebuilt central directory in
+one sequential, fsynced write after the old end record, so a crash mid-flush
+leaves the previous bundle intact (the torn tail is cut off on next open).
+Superseded directories are dead space until they pass a quarter of the file,
+when the bundle is rewritten through a temp file and os.replace. Zip64
+records are added once a bundle passes 65535 entries or 4 GiB.
+
+    python src/bundle.py list out.zip
+    python src/bundle.py extract out.zip generator/metro_boomin/123456 --to ./project
+"""
+
+import os
+import sys
+import time
+import zlib
+import struct
+import mmap
+import zipfile
+import fcntl
+import argparse
+import contextlib
+from typing import Dict, List, Tuple
+
+# ========== PRECOMPILED PACKERS ==========
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_RECORD = struct.Struct("<IHHHHIIH")
+ZIP64_END_RECORD = struct.Struct("<IQHHIIQQQQ")
+ZIP64_LOCATOR = struct.Struct("<IIQI")
+ZIP64_OFFSET_EXTRA = struct.Struct("<HHQ")
+
+LOCAL_SIG, CENTRAL_SIG, END_SIG = 0x04034B50, 0x02014B50, 0x06054B50
+ZIP64_END_SIG, ZIP64_LOCATOR_SIG = 0x06064B50, 0x07064B50
+UTF8_FLAG = 0x800
+VERSION, VERSION_ZIP64 = 20, 45
+FILE_ATTRS = (0o100644 << 16)
+U16_MAX, U32_MAX = 0xFFFF, 0xFFFFFFFF
+END_SIG_BYTES, CENTRAL_SIG_BYTES = struct.pack("<I", END_SIG), struct.pack("<I", CENTRAL_SIG)
+COMPACT_RATIO = 4   # compact once superseded directories are over a quarter of the bundle
+
+
+def _dos_time(t: float) -> Tuple[int, int]:
+    lt = time.localtime(t)
+    return ((lt.tm_hour << 11) | (lt.tm_min << 5) | (lt.tm_sec // 2),
+            ((lt.tm_year - 1980) << 9) | (lt.tm_mon << 5) | lt.tm_mday)
+
+
+def slug(text: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in text.lower()).strip("_") or "untitled"
+
+
+def project_id(engine: str, style: str, seed) -> str:
+    return f"{engine}/{slug(style)}/{seed}"
+
+
+@contextlib.contextmanager
+def locked(path: str):
+    """Exclusive lock around read-index + append, for concurrent batches on one bundle"""
+    with open(os.path.expanduser(path) + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _directory(entries: List[Tuple[bytes, int, int, int, int, int]], cd_offset: int) -> bytes:
+    """Central directory plus end records for entries, placed at cd_offset"""
+    blob = bytearray()
+    for raw, crc, size, header_offset, e_time, e_date in entries:
+        extra = b""
+        if header_offset >= U32_MAX:
+            extra = ZIP64_OFFSET_EXTRA.pack(0x0001, 8, header_offset)
+            header_offset = U32_MAX
+        blob += CENTRAL_HEADER.pack(CENTRAL_SIG, VERSION_ZIP64 if extra else VERSION,
+                                    VERSION_ZIP64 if extra else VERSION, UTF8_FLAG, 0,
+                                    e_time, e_date, crc, size, size, len(raw), len(extra), 0,
+                                    0, 0, FILE_ATTRS, header_offset)
+        blob += raw
+        blob += extra
+    cd_size = len(blob)
+    count = len(entries)
+
+    if count >= U16_MAX or cd_offset >= U32_MAX or cd_size >= U32_MAX:
+        zip64_offset = cd_offset + len(blob)
+        blob += ZIP64_END_RECORD.pack(ZIP64_END_SIG, ZIP64_END_RECORD.size - 12, VERSION_ZIP64,
+                                      VERSION_ZIP64, 0, 0, count, count, cd_size, cd_offset)
+        blob += ZIP64_LOCATOR.pack(ZIP64_LOCATOR_SIG, 0, zip64_offset, 1)
+        blob += END_RECORD.pack(END_SIG, 0, 0, min(count, U16_MAX), min(count, U16_MAX),
+                                min(cd_size, U32_MAX), min(cd_offset, U32_MAX), 0)
+    else:
+        blob += END_RECORD.pack(END_SIG, 0, 0, count, count, cd_size, cd_offset, 0)
+    return bytes(blob)
+
+
+def _closes_directory(mm, p: int) -> bool:
+    """Whether the end record at p sits right after the central directory it describes"""
+    *_, cd_size, cd_offset, _ = END_RECORD.unpack_from(mm, p)
+    locator = p - ZIP64_LOCATOR.size
+    if locator >= 0 and ZIP64_LOCATOR.unpack_from(mm, locator)[0] == ZIP64_LOCATOR_SIG:
+        record = ZIP64_LOCATOR.unpack_from(mm, locator)[2]
+        if record + ZIP64_END_RECORD.size != locator:
+            return False
+        fields = ZIP64_END_RECORD.unpack_from(mm, record)
+        if fields[0] != ZIP64_END_SIG:
+            return False
+        cd_size, cd_offset, p = fields[8], fields[9], record
+    if cd_offset + cd_size != p:
+        return False
+    return cd_size == 0 or mm[cd_offset:cd_offset + 4] == CENTRAL_SIG_BYTES
+
+
+def _committed_size(path: str) -> int:
+    """Bytes up to the end of the last complete end record; anything after is a torn flush"""
+    size = os.path.getsize(path)
+    if size < END_RECORD.size:
+        return 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = size
+        while True:
+            p = mm.rfind(END_SIG_BYTES, 0, end)
+            if p < 0:
+                return 0
+            if p + END_RECORD.size <= size:
+                stop = p + END_RECORD.size + END_RECORD.unpack_from(mm, p)[-1]   # plus any comment
+                if stop <= size and _closes_directory(mm, p):
+                    return stop
+            end = p + len(END_SIG_BYTES) - 1
+
+
+def _copy(src, dst, n: int, chunk: int = 1 << 20):
+    while n > 0:
+        data = src.read(min(n, chunk))
+        if not data:
+            raise ValueError("bundle entry runs past the end of the file")
+        dst.write(data)
+        n -= len(data)
+
+
+# ========== WRITER ==========
+class BundleWriter:
+    """Queue artifacts with add(), then flush() them into the bundle in one write"""
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        # (name bytes, crc, size, header offset, dos time, dos date)
+        self.entries: List[Tuple[bytes, int, int, int, int, int]] = []
+        self.names = set()
+        self.start = 0       # where new entries go: the end of the file
+        self.directory = 0   # offset of the live central directory
+        self.dead = 0        # bytes of superseded directories left between entries
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            size = _committed_size(self.path)
+            if size < os.path.getsize(self.path):
+                os.truncate(self.path, size)   # a flush that never finished
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            live = 0
+            with zipfile.ZipFile(self.path) as zf:
+                self.directory = zf.start_dir
+                for info in zf.infolist():
+                    y, mo, d, h, mi, s = info.date_time
+                    raw = info.filename.encode("utf-8")
+                    self.entries.append((raw, info.CRC, info.file_size,
+                                         info.header_offset, (h << 11) | (mi << 5) | (s // 2),
+                                         ((y - 1980) << 9) | (mo << 5) | d))
+                    self.names.add(info.filename)
+                    live += LOCAL_HEADER.size + len(raw) + info.compress_size
+            self.start = os.path.getsize(self.path)
+            self.dead = self.directory - live
+        self._pending: List[Tuple[str, bytes]] = []
+
+    def add(self, name: str, data: bytes) -> bool:
+        """Queue one artifact; False if the bundle already holds that name"""
+        if name in self.names:
+            return False
+        self.names.add(name)
+        self._pending.append((name, data))
+        return True
+
+    def add_file(self, name: str, path: str) -> bool:
+        with open(path, "rb") as f:
+            return self.add(name, f.read())
+
+    def add_project(self, prefix: str, files: Dict[str, str]) -> Dict[str, str]:
+        """Queue every file of one project under prefix/; returns {key: member name}"""
+        members = {}
+        for key, path in files.items():
+            member = f"{prefix}/{os.path.basename(path)}"
+            self.add_file(member, path)
+            members[key] = member
+        return members
+
+    def flush(self) -> int:
+        """Write queued artifacts plus the new index; returns bytes written"""
+        if not self._pending and os.path.exists(self.path):
+            return 0
+        dos_time, dos_date = _dos_time(time.time())
+        blob = bytearray()
+        offset = self.start
+
+        for name, data in self._pending:
+            raw = name.encode("utf-8")
+            size = len(data)
+            if size >= U32_MAX:
+                raise ValueError(f"{name}: artifacts over 4 GiB are not supported")
+            crc = zlib.crc32(data)
+            self.entries.append((raw, crc, size, offset + len(blob), dos_time, dos_date))
+            blob += LOCAL_HEADER.pack(LOCAL_SIG, VERSION, UTF8_FLAG, 0, dos_time, dos_date,
+                                      crc, size, size, len(raw), 0)
+            blob += raw
+            blob += data
+        self._pending.clear()
+
+        cd_offset = offset + len(blob)
+        blob += _directory(self.entries, cd_offset)
+
+        # Appended after the old end record, which stays valid until this write is on disk
+        mode = "r+b" if os.path.exists(self.path) else "wb"
+        with open(self.path, mode) as f:
+            f.seek(offset)
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        self.dead += offset - self.directory
+        self.directory, self.start = cd_offset, offset + len(blob)
+        if self.dead * COMPACT_RATIO > self.start:
+            self.compact()
+        return len(blob)
+
+    def compact(self):
+        """Rewrite the bundle without superseded directories (temp file, fsync, os.replace)"""
+        tmp = self.path + ".tmp"
+        entries = []
+        with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+            for raw, crc, size, header_offset, e_time, e_date in self.entries:
+                src.seek(header_offset)
+                header = src.read(LOCAL_HEADER.size)
+                name_len, extra_len = LOCAL_HEADER.unpack(header)[-2:]
+                entries.append((raw, crc, size, dst.tell(), e_time, e_date))
+                dst.write(header)
+                _copy(src, dst, name_len + extra_len + size)
+            directory = dst.tell()
+            dst.write(_directory(entries, directory))
+            dst.flush()
+            os.fsync(dst.fileno())
+            start = dst.tell()
+        os.replace(tmp, self.path)
+        self.entries, self.directory, self.start, self.dead = entries, directory, start, 0
+
+
+# ========== READER ==========
+class BundleReader:
+    """Random access to one project (or one artifact) through the central directory"""
+
+    def __init__(self, path: str):
+        self.zip = zipfile.ZipFile(os.path.expanduser(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    def projects(self) -> List[str]:
+        """Project ids (engine/style/seed) in bundle order"""
+        seen = {}
+        for name in self.zip.namelist():
+            prefix = name.rsplit("/", 1)[0]
+            if prefix.count("/") == 2:
+                seen.setdefault(prefix, None)
+        return list(seen)
+
+    def members(self, project: str) -> List[str]:
+        """Artifact names for a project id, or for a bare seed"""
+        project = project.strip("/")
+        matches = [n for n in self.zip.namelist()
+                   if n.startswith(project + "/") or n.split("/")[2:3] == [project]]
+        return matches
+
+    def read(self, name: str) -> bytes:
+        return self.zip.read(name)
+
+    def extract(self, project: str, dest: str) -> List[str]:
+        """Write one project's artifacts into dest; returns their paths"""
+        dest = os.path.expanduser(dest)
+        os.makedirs(dest, exist_ok=True)
+        paths = []
+        for name in self.members(project):
+            path = os.path.join(dest, os.path.basename(name))
+            with open(path, "wb") as f:
+                f.write(self.zip.read(name))
+            paths.append(path)
+        return paths
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO bundle tool")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ls = sub.add_parser("list", help="List projects in a bundle")
+    ls.add_argument("bundle")
+    ex = sub.add_parser("extract", help="Extract one project (id or seed)")
+    ex.add_argument("bundle")
+    ex.add_argument("project")
+    ex.add_argument("--to", default=".")
+    args = parser.parse_args(argv)
+
+    with BundleReader(args.bundle) as reader:
+        if args.command == "list":
+            for project in reader.projects():
+                print(project)
+            return
+        paths = reader.extract(args.project, args.to)
+    if not paths:
+        sys.exit(f"No project {args.project!r} in {args.bundle}")
+    for path in paths:
+        print(f"✓ {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+SunoFLO - Output Cache
+Content-addressed, size-capped on-disk cache for generated artifacts
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = "~/.cache/sunoflo"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+MANIFEST = "manifest.json"
+LOW_WATERMARK = 0.9   # evict down to this fraction of the cap so puts do not rescan every time
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable hash of the inputs that fully determine an output"""
+    material = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def copy_artifact(src: str, dst: str):
+    """Copy src to a fresh file at dst (never a hard link)
+
+    Generators later rewrite their output paths in place, so a link would let
+    an unrelated run change the cached artifact. The copy lands through a temp
+    file and os.replace, which also detaches dst from any links made before.
+    """
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(dst) or ".")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class OutputCache:
+    """Entries live in <root>/<key[:2]>/<key>/ with a manifest; LRU by directory mtime"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    # ---------- lookup ----------
+    def get(self, key: str) -> Optional[Tuple[Dict[str, str], Dict]]:
+        """Return ({artifact name: cached path}, meta) or None"""
+        entry = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry, MANIFEST)) as f:
+                manifest = json.load(f)
+            os.utime(entry)   # mark as recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        files = {name: os.path.join(entry, name) for name in manifest["files"]}
+        return files, manifest.get("meta", {})
+
+    def materialize(self, key: str, output_dir: str) -> Optional[Tuple[Dict[str, str], Dict]]:
+        """On a hit, copy every artifact into output_dir and return their new paths"""
+        found = self.get(key)
+        if found is None:
+            return None
+        files, meta = found
+        os.makedirs(output_dir, exist_ok=True)
+        placed = {}
+        for name, path in files.items():
+            dst = os.path.join(output_dir, name)
+            copy_artifact(path, dst)
+            placed[name] = dst
+        return placed, meta
+
+    # ---------- store ----------
+    def put(self, key: str, files: Dict[str, str], meta: Optional[Dict] = None):
+        """Store artifacts (name -> existing path) under key; first writer wins"""
+        entry = self._entry_dir(key)
+        if os.path.isdir(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        size = 0
+        try:
+            for name, path in files.items():
+                dst = os.path.join(staging, name)
+                copy_artifact(path, dst)
+                size += os.path.getsize(dst)
+            with open(os.path.join(staging, MANIFEST), "w") as f:
+                json.dump({"files": sorted(files), "meta": meta or {}}, f)
+            os.rename(staging, entry)
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        if self._size is not None:
+            self._size += size
+        self._evict()
+
+    # ---------- eviction ----------
+    def _entries(self):
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or shard.name.startswith("."):
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                    yield entry.stat().st_mtime, size, entry.path
+                except (FileNotFoundError, NotADirectoryError):
+                    continue   # evicted by another process meanwhile
+
+    def size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def _evict(self):
+        if self.size() <= self.max_bytes:
+            return
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * LOW_WATERMARK
+        for _, size, path in entries:
+            if total <= target:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,169 @@
+"""
+SunoFLO - Cliche Filter
+Shared anti-cliche lexicon and a single-pass rewriting engine
+"""
+
+import re
+import json
+import random
+from typing import List, Dict, Iterable, Optional
+
+# ========== ANTI-CLICHE WORDS (Common AI Lyrics to Avoid) ==========
+CLICHE_WORDS = [
+    "universe", "galaxy", "stars", "shine", "glow", "dream", "fantasy", "paradise",
+    "heaven", "angel", "wings", "fly", "soar", "sky", "beyond", "infinity",
+    "forever", "neverending", "timeless", "eternal", "magic", "miracle",
+    "heartbeat", "heartbeat", "soul", "spirit", "electric", "neon", "vibes",
+    "going crazy", "lose control", "feel the beat", "dance all night", "party"
+]
+
+# ========== BETTER ALTERNATIVES FOR CLICHES ==========
+BETTER_ALTERNATIVES = {
+    "universe": ["block", "hood", "streets", "city", "world"],
+    "galaxy": ["streets", "blocks", "city", "trap"],
+    "stars": ["guap", "bands", "racks", "cash"],
+    "shine": ["grind", "hustle", "ball", "eat"],
+    "glow": ["flex", "show", "stack"],
+    "dream": ["scheme", "goal", "bag", "check"],
+    "fantasy": ["real life", "real trap", "hustle"],
+    "paradise": ["my house", "the trap", "my block"],
+    "heaven": ["trap house", "studio", "on stage"],
+    "angel": ["shorty", "queen", "boss"],
+    "wings": ["racks", "bands", "guap"],
+    "fly": ["rich", "ball", "flex"],
+    "soar": ["stack", "hustle", "grind"],
+    "sky": ["roof", "top", "ceiling"],
+    "beyond": ["past", "after", "above"],
+    "infinite": ["non-stop", "all day"],
+    "forever": ["till the grave", "till death", "day by day"],
+    "neverending": ["every day", "24/7", "all year"],
+    "magic": ["real", "硬刚", "true"],
+    "miracle": ["blessing", "come up", "win"],
+    "heartbeat": ["pulse", "rhythm"],
+    "electric": ["hard", "real", "trap"],
+    "neon": ["diamonds", "racks", "chains"],
+    "vibes": ["energy", "aura", "motion"],
+}
+
+
+# ========== PATTERN COMPILER ==========
+def _normalize(phrase: str) -> str:
+    return " ".join(phrase.lower().split())
+
+
+def _trie_regex(phrases: Iterable[str]) -> str:
+    """Build a prefix-factored alternation so the regex engine never retries shared prefixes"""
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    tokens = {" ": r"\s+"}
+
+    def emit(node: Dict) -> str:
+        alts = []
+        optional = False
+        for ch, child in node.items():
+            if ch == "":
+                optional = True
+                continue
+            token = tokens.get(ch)
+            if token is None:
+                token = tokens[ch] = re.escape(ch)
+            alts.append(token + emit(child))
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 and not optional else "(?:" + "|".join(alts) + ")"
+        return body + "?" if optional else body
+
+    return emit(trie)
+
+
+# ========== REWRITER ==========
+class ClicheFilter:
+    """Rewrite every cliche in one regex scan, choosing a replacement per match"""
+
+    def __init__(self, alternatives: Dict[str, List[str]]):
+        self.alternatives = {}
+        for phrase, options in alternatives.items():
+            if options:
+                self.alternatives[_normalize(phrase)] = list(options)
+        self.source = r"\b(?:" + _trie_regex(self.alternatives) + r")\b" if self.alternatives else None
+        # Scanning pre-lowered text is ~3x faster than an IGNORECASE scan
+        self.pattern = re.compile(self.source) if self.source else None
+        self._icase_pattern = None
+
+    @classmethod
+    def from_lexicon(cls, words: Iterable[str], alternatives: Dict[str, List[str]]) -> "ClicheFilter":
+        """Only words present in both the cliche list and the alternatives are rewritten"""
+        return cls({w: alternatives[w] for w in words if w in alternatives})
+
+    @classmethod
+    def from_file(cls, path: str) -> "ClicheFilter":
+        """Load a lexicon from JSON ({phrase: [alts]}) or TSV (phrase<TAB>alt1|alt2)"""
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                return cls(json.load(f))
+
+        alternatives = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#") or "\t" not in line:
+                    continue
+                phrase, options = line.split("\t", 1)
+                alternatives[phrase] = [o for o in options.split("|") if o]
+        return cls(alternatives)
+
+    def __len__(self) -> int:
+        return len(self.alternatives)
+
+    def contains(self, text: str) -> bool:
+        """Whether text holds any cliche this filter would rewrite"""
+        return self.pattern is not None and self.pattern.search(text.lower()) is not None
+
+    def rewrite(self, text: str, rng: Optional[random.Random] = None) -> str:
+        """Replace cliches with better alternatives (keeps ALL-CAPS lines in caps)"""
+        if self.pattern is None:
+            return text
+        choose = (rng or random).choice
+        alternatives = self.alternatives
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Some characters change length when lowercased; offsets would not line up
+            if self._icase_pattern is None:
+                self._icase_pattern = re.compile(self.source, re.IGNORECASE)
+
+            def replace(match):
+                found = match.group(0)
+                replacement = choose(alternatives[_normalize(found)])
+                return replacement.upper() if found.isupper() else replacement
+
+            return self._icase_pattern.sub(replace, text)
+
+        pieces = []
+        last = 0
+        for match in self.pattern.finditer(lowered):
+            start, end = match.span()
+            key = match.group(0)
+            options = alternatives.get(key) or alternatives[_normalize(key)]
+            replacement = choose(options)
+            found = text[start:end]
+            pieces.append(text[last:start])
+            pieces.append(replacement.upper() if found.isupper() else replacement)
+            last = end
+        if not pieces:
+            return text
+        pieces.append(text[last:])
+        return "".join(pieces)
+
+
+DEFAULT_FILTER = ClicheFilter.from_lexicon(CLICHE_WORDS, BETTER_ALTERNATIVES)
+
+
+def avoid_cliches(text: str, rng: Optional[random.Random] = None) -> str:
+    """Rewrite text with the built-in lexicon"""
+    return DEFAULT_FILTER.rewrite(text, rng)
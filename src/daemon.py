@@ -0,0 +1,166 @@
+"""
+SunoFLO - Warm Daemon
+Keeps the generators, style registry, rhyme index and cliché filter loaded and
+serves batch requests on a local Unix socket
+
+    python src/daemon.py &                                  # start once
+    python src/sunoflo_client.py --style Drake --count 5    # batch CLI options
+
+Protocol: one JSON object per line each way. {"op": "ping"} answers with
+daemon status; {"op": "batch", ...} runs jobs and answers with the batch
+report; {"op": "argv", "argv": [...], "cwd": ...} does the same for batch
+CLI arguments and adds the printed summary. Work runs inline in the daemon (default) or in a persistent warm
+process pool (--workers N).
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import socketserver
+from dataclasses import asdict
+from typing import Dict, List
+
+from sunoflo_batch import BatchJob, build_parser, jobs_from_args, report_lines, run_batch
+from cache import DEFAULT_MAX_BYTES
+from metrics import open_sinks
+from protocol import DEFAULT_SOCKET, request
+
+# Batch CLI options naming files, resolved against the client's working directory
+PATH_OPTIONS = ("jobs", "output", "cache_dir", "bundle", "novelty", "patterns",
+                "metrics_jsonl", "metrics_prom")
+
+
+def preload():
+    """Import every generator and build the shared tables once"""
+    import sunoflo  # noqa: F401
+    import sunoflo_complete  # noqa: F401
+    import sunoflo_ultimate  # noqa: F401
+    from styles import REGISTRY
+    from rhymes import default_index
+    from cliches import DEFAULT_FILTER
+    len(REGISTRY)
+    default_index()
+    DEFAULT_FILTER.rewrite("warm up")
+
+
+# ========== SERVER ==========
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, pool=None, workers: int = 1):
+        self.pool = pool
+        self.workers = workers
+        self.served = 0
+        super().__init__(path, RequestHandler)
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.respond(json.loads(line))
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+    def respond(self, request: Dict) -> Dict:
+        server = self.server
+        op = request.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "served": server.served,
+                    "workers": server.workers}
+        if op == "argv":
+            args = parse_batch_args(request["argv"], request.get("cwd") or os.getcwd())
+            reply = self.respond(batch_request(
+                jobs_from_args(args), output=args.output, seed=args.seed, chunksize=args.chunksize,
+                cache_dir=args.cache_dir, cache_max_bytes=args.cache_max_mb * 1024 * 1024,
+                metrics_jsonl=args.metrics_jsonl, metrics_prom=args.metrics_prom,
+                bundle=args.bundle, novelty=args.novelty,
+                novelty_threshold=args.novelty_threshold, patterns=args.patterns, audio=args.audio))
+            reply["summary"] = report_lines(reply["report"], args)
+            return reply
+        if op != "batch":
+            raise ValueError(f"unknown op: {op!r}")
+
+        jobs = [BatchJob(**job) for job in request["jobs"]]
+        sinks = open_sinks(request.get("metrics_jsonl"), request.get("metrics_prom"))
+        try:
+            report = run_batch(jobs, request.get("output", "~/Downloads/sunoflo-batch"), workers=1,
+                               chunksize=request.get("chunksize", 4), seed=request.get("seed"),
+                               cache_dir=request.get("cache_dir"),
+                               cache_max_bytes=request.get("cache_max_bytes", DEFAULT_MAX_BYTES),
+                               metrics_sinks=sinks, pool=server.pool, bundle=request.get("bundle"),
+                               novelty_db=request.get("novelty"),
+                               novelty_threshold=request.get("novelty_threshold", 0.6),
+                               patterns=request.get("patterns"), audio=request.get("audio", False))
+        finally:
+            for sink in sinks:
+                sink.close()
+        server.served += report["projects"]
+        return {"ok": True, "report": report}
+
+
+def serve(path: str = DEFAULT_SOCKET, workers: int = 1):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        try:
+            request(path, {"op": "ping"})
+            raise SystemExit(f"A daemon is already listening on {path}")
+        except OSError:
+            os.remove(path)   # stale socket from a daemon that died
+
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))   # run the cleanup below on kill
+    preload()
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=preload)
+    try:
+        with DaemonServer(path, pool, workers if pool else 1) as server:
+            os.chmod(path, 0o600)
+            print(f"SunoFLO daemon on {path} (pid {os.getpid()}, {workers} worker(s))")
+            server.serve_forever()
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ========== REQUESTS ==========
+def parse_batch_args(argv: List[str], cwd: str) -> argparse.Namespace:
+    """Batch CLI arguments sent by a client; mistakes become errors in the reply"""
+    parser = build_parser()
+
+    def error(message):
+        raise ValueError(message)
+
+    parser.error = error
+    args = parser.parse_args(argv)
+    for name in PATH_OPTIONS:
+        value = getattr(args, name)
+        if value:
+            setattr(args, name, os.path.join(cwd, os.path.expanduser(value)))
+    return args
+
+
+def batch_request(jobs: List[BatchJob], **options) -> Dict:
+    return {"op": "batch", "jobs": [asdict(job) for job in jobs], **options}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO warm daemon (Unix socket)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--workers", type=int, default=1, help="Warm pool size (1 = run inline)")
+    args = parser.parse_args(argv)
+    try:
+        serve(args.socket, args.workers)
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+SunoFLO - Metrics
+Per-stage wall/CPU timing, byte and count totals for the generate pipelines
+
+    metrics = Metrics([JsonLinesSink("runs.jsonl"), PrometheusSink("sunoflo.prom")])
+    with metrics.stage("lyrics"):
+        ...
+    metrics.emit(engine="complete", style="Drake")   # one record per run
+
+Pipelines default to NULL_METRICS, whose stage() hands back one shared no-op
+context manager, so disabled instrumentation costs a method call per stage.
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterable, List, Optional
+
+
+# ========== RECORDERS ==========
+class Metrics:
+    """Accumulates one run's stages and counters, then emits a record to every sink"""
+
+    enabled = True
+
+    def __init__(self, sinks: Iterable = ()):
+        self.sinks = list(sinks)
+        self.last: Optional[Dict] = None
+        self.reset()
+
+    def reset(self):
+        self.stages: Dict[str, List[float]] = {}   # name -> [wall, cpu, calls]
+        self.counts: Dict[str, int] = {}
+        self.bytes_written = 0
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += time.perf_counter() - wall
+            totals[1] += time.process_time() - cpu
+            totals[2] += 1
+
+    def count(self, name: str, n: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def wrote(self, *paths: str):
+        """Add the size of freshly written files to bytes_written"""
+        for path in paths:
+            self.bytes_written += os.path.getsize(path)
+
+    def emit(self, **labels) -> Dict:
+        """Close the run: build its record, hand it to the sinks, start a new run"""
+        record = {
+            "ts": time.time(),
+            "labels": labels,
+            "wall": time.perf_counter() - self._start,
+            "stages": {name: {"wall": w, "cpu": c, "calls": n} for name, (w, c, n) in self.stages.items()},
+            "counts": dict(self.counts),
+            "bytes": self.bytes_written,
+        }
+        for sink in self.sinks:
+            sink.write(record)
+        self.last = record
+        self.reset()
+        return record
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class NullMetrics:
+    """Disabled recorder: every call is a no-op"""
+
+    enabled = False
+    last = None
+    _stage = nullcontext()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def wrote(self, *paths: str):
+        pass
+
+    def emit(self, **labels) -> Dict:
+        return {}
+
+    def close(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+# ========== SINKS ==========
+class JsonLinesSink:
+    """Append one JSON object per run"""
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._file = open(self.path, "a", buffering=1)
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def _label(value: str) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusSink:
+    """Cumulative counters in Prometheus text format (node_exporter textfile collector)
+
+    The file is rewritten atomically, at most once per `interval` seconds
+    and on close, so a scrape never sees a half-written file and a long
+    batch does not rewrite it once per run.
+    """
+
+    def __init__(self, path: str, prefix: str = "sunoflo", interval: float = 10.0):
+        self.path = os.path.expanduser(path)
+        self.prefix = prefix
+        self.interval = interval
+        self._flushed = time.monotonic()
+        self.runs: Dict[str, int] = {}
+        self.stage_seconds: Dict[tuple, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+        self.counts: Dict[str, int] = {}
+        self.bytes_written = 0
+        self.run_seconds = 0.0
+
+    def write(self, record: Dict):
+        engine = record["labels"].get("engine", "")
+        self.runs[engine] = self.runs.get(engine, 0) + 1
+        self.run_seconds += record["wall"]
+        for name, stage in record["stages"].items():
+            for clock in ("wall", "cpu"):
+                self.stage_seconds[name, clock] = self.stage_seconds.get((name, clock), 0.0) + stage[clock]
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + stage["calls"]
+        for name, n in record["counts"].items():
+            self.counts[name] = self.counts.get(name, 0) + n
+        self.bytes_written += record["bytes"]
+        if time.monotonic() - self._flushed >= self.interval:
+            self.flush()
+
+    def render(self) -> str:
+        p = self.prefix
+        lines = [f"# TYPE {p}_runs_total counter"]
+        lines += [f'{p}_runs_total{{engine="{_label(e)}"}} {n}' for e, n in sorted(self.runs.items())]
+        lines += [f"# TYPE {p}_run_seconds_total counter", f"{p}_run_seconds_total {self.run_seconds:.6f}"]
+        lines.append(f"# TYPE {p}_stage_seconds_total counter")
+        lines += [f'{p}_stage_seconds_total{{stage="{_label(s)}",clock="{c}"}} {v:.6f}'
+                  for (s, c), v in sorted(self.stage_seconds.items())]
+        lines.append(f"# TYPE {p}_stage_calls_total counter")
+        lines += [f'{p}_stage_calls_total{{stage="{_label(s)}"}} {n}' for s, n in sorted(self.stage_calls.items())]
+        lines.append(f"# TYPE {p}_events_total counter")
+        lines += [f'{p}_events_total{{name="{_label(s)}"}} {n}' for s, n in sorted(self.counts.items())]
+        lines += [f"# TYPE {p}_bytes_written_total counter", f"{p}_bytes_written_total {self.bytes_written}"]
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+        self._flushed = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+def open_sinks(jsonl: Optional[str] = None, prom: Optional[str] = None) -> List:
+    """Sinks for the CLI options --metrics-jsonl / --metrics-prom"""
+    sinks = []
+    if jsonl:
+        sinks.append(JsonLinesSink(jsonl))
+    if prom:
+        sinks.append(PrometheusSink(prom))
+    return sinks
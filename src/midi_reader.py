@@ -0,0 +1,463 @@
+"""
+SunoFLO - MIDI Reader
+Memory-mapped Standard MIDI File parser and a bulk transform pipeline
+
+Opening a file maps it and indexes the MTrk chunks only. A track's
+events are decoded the first time it is asked for, straight into a NumPy
+note array (patterns.NOTE_DTYPE plus a channel field), so the pattern
+engine's transforms and vectorized encoder work on read-back files too.
+
+    python src/midi_reader.py info loop.mid
+    python src/midi_reader.py transform ./loops ./rekeyed --style "Metro Boomin" --quantize 16
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import argparse
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from midi_writer import HEADER, CHUNK, DRUM_CHANNEL, MidiFile, var_len, key_signature
+from patterns import NOTE_DTYPE, write_notes
+
+NOTE_EVENT_DTYPE = np.dtype(NOTE_DTYPE.descr + [("channel", "u1")])
+MIDI_EXTENSIONS = (".mid", ".midi")
+DEFAULT_USEC = 500_000   # 120 BPM when a file has no tempo event
+
+
+# ========== SONG MODEL ==========
+@dataclass
+class Track:
+    name: str = ""
+    notes: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=NOTE_EVENT_DTYPE))
+    events: List[Tuple[int, bytes]] = field(default_factory=list)   # other events: (tick, raw bytes)
+
+
+@dataclass
+class Song:
+    ppq: int
+    tracks: List[Track]
+    tempos: List[Tuple[int, int]] = field(default_factory=list)       # (tick, usec per quarter)
+    key: Optional[Tuple[int, int]] = None                              # (sharps/flats, minor)
+    time_signature: Tuple[int, int] = (4, 4)
+
+    @property
+    def bpm(self) -> float:
+        return 60_000_000 / (self.tempos[0][1] if self.tempos else DEFAULT_USEC)
+
+    @property
+    def notes(self) -> int:
+        return sum(len(t.notes) for t in self.tracks)
+
+
+# ========== DECODING ==========
+def _decode(data: bytes) -> Tuple[Track, List[Tuple[int, int]], Optional[Tuple[int, int]],
+                                  Optional[Tuple[int, int]]]:
+    """Decode one MTrk body; returns (track, tempos, key, time signature)"""
+    track = Track()
+    tempos: List[Tuple[int, int]] = []
+    key = time_sig = None
+    starts: Dict[int, List[Tuple[int, int]]] = {}    # channel << 7 | pitch -> open notes, oldest first
+    ticks, pitches, velocities, durations, channels = [], [], [], [], []
+    pos, tick, running, end = 0, 0, 0, len(data)
+
+    while pos < end:
+        b = data[pos]
+        pos += 1
+        delta = b & 0x7F
+        while b & 0x80:
+            b = data[pos]
+            pos += 1
+            delta = (delta << 7) | (b & 0x7F)
+        tick += delta
+
+        status = data[pos]
+        if status & 0x80:
+            pos += 1
+            if status < 0xF0:
+                running = status
+        elif running:
+            status = running
+        else:
+            raise ValueError(f"Data byte without running status at offset {pos}")
+
+        kind = status & 0xF0
+        if kind == 0x90 or kind == 0x80:
+            pitch, velocity = data[pos], data[pos + 1]
+            pos += 2
+            slot = ((status & 0x0F) << 7) | pitch
+            if kind == 0x90 and velocity:
+                starts.setdefault(slot, []).append((tick, velocity))
+            else:
+                opened = starts.get(slot)
+                if opened:
+                    start, on_velocity = opened.pop(0)
+                    ticks.append(start)
+                    pitches.append(pitch)
+                    velocities.append(on_velocity)
+                    durations.append(tick - start)
+                    channels.append(status & 0x0F)
+        elif kind == 0xC0 or kind == 0xD0:
+            track.events.append((tick, bytes((status, data[pos]))))
+            pos += 1
+        elif kind < 0xF0:
+            track.events.append((tick, bytes((status, data[pos], data[pos + 1]))))
+            pos += 2
+        else:
+            meta = None
+            if status == 0xFF:
+                meta = data[pos]
+                pos += 1
+            length = 0
+            while True:
+                b = data[pos]
+                pos += 1
+                length = (length << 7) | (b & 0x7F)
+                if not b & 0x80:
+                    break
+            payload = data[pos:pos + length]
+            pos += length
+            if meta == 0x2F:
+                break
+            elif meta == 0x51:
+                tempos.append((tick, int.from_bytes(payload, "big")))
+            elif meta == 0x59 and length == 2:
+                key = (struct.unpack("b", payload[:1])[0], payload[1])
+            elif meta == 0x58 and length >= 2:
+                time_sig = (payload[0], 1 << payload[1])
+            elif meta == 0x03 and not track.name:
+                track.name = payload.decode("latin-1")
+            else:
+                head = bytes((0xFF, meta)) if meta is not None else bytes((status,))
+                track.events.append((tick, head + var_len(length) + payload))
+
+    for slot, opened in starts.items():   # notes never released end with the track
+        for start, velocity in opened:
+            ticks.append(start)
+            pitches.append(slot & 0x7F)
+            velocities.append(velocity)
+            durations.append(tick - start)
+            channels.append(slot >> 7)
+
+    notes = np.zeros(len(ticks), dtype=NOTE_EVENT_DTYPE)
+    notes["tick"], notes["pitch"], notes["velocity"] = ticks, pitches, velocities
+    notes["duration"], notes["channel"] = durations, channels
+    track.notes = notes[np.argsort(notes["tick"], kind="stable")]
+    return track, tempos, key, time_sig
+
+
+# ========== READER ==========
+class MidiReader:
+    """A mapped SMF: header and chunk index up front, tracks decoded on first access"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        tag, length, self.format, ntracks, division = HEADER.unpack_from(self._map, 0)
+        if tag != b"MThd":
+            raise ValueError(f"{path}: not a Standard MIDI File")
+        if division & 0x8000:
+            raise ValueError(f"{path}: SMPTE time division is not supported")
+        self.ppq = division
+
+        self.spans: List[Tuple[int, int]] = []
+        pos = 8 + length
+        while pos + CHUNK.size <= len(self._map) and len(self.spans) < ntracks:
+            tag, length = CHUNK.unpack_from(self._map, pos)
+            pos += CHUNK.size
+            if tag == b"MTrk":
+                self.spans.append((pos, min(length, len(self._map) - pos)))
+            pos += length
+        self._decoded: Dict[int, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def _track(self, i: int) -> tuple:
+        if i not in self._decoded:
+            start, length = self.spans[i]
+            try:
+                self._decoded[i] = _decode(self._map[start:start + length])
+            except IndexError:
+                raise ValueError(f"{self.path}: track {i} is truncated") from None
+        return self._decoded[i]
+
+    def track(self, i: int) -> Track:
+        return self._track(i)[0]
+
+    def read(self) -> Song:
+        """Decode every track; tempo, key and time signature are collected song-wide"""
+        song = Song(self.ppq, [])
+        for i in range(len(self)):
+            track, tempos, key, time_sig = self._track(i)
+            song.tempos.extend(tempos)
+            song.key = song.key or key
+            song.time_signature = time_sig or song.time_signature
+            if len(track.notes) or track.events:
+                song.tracks.append(track)
+        song.tempos.sort()
+        return song
+
+    def close(self):
+        self._decoded.clear()
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_midi(path: str) -> Song:
+    with MidiReader(path) as reader:
+        return reader.read()
+
+
+# ========== WRITING ==========
+def _write_track(midi: MidiFile, track: Track):
+    with midi.track(track.name or None) as writer:
+        events = sorted(track.events, key=lambda e: e[0])
+        first_note = int(track.notes["tick"].min()) if len(track.notes) else None
+        if first_note is None or all(tick <= first_note for tick, _ in events):
+            # Common case: names, programs and controllers up front, then one vectorized encode
+            for tick, raw in events:
+                writer.raw(var_len(tick - writer.last_tick) + raw, tick, 1)
+            write_notes(writer, track.notes)
+            return
+        # Events between notes: merge everything in time order (note-offs first on a tick)
+        merged = [(tick, 1, raw) for tick, raw in events]
+        for n in track.notes:
+            status = int(n["channel"])
+            merged.append((int(n["tick"]), 2, bytes((0x90 | status, int(n["pitch"]), int(n["velocity"])))))
+            merged.append((int(n["tick"]) + max(1, int(n["duration"])), 0,
+                           bytes((0x80 | status, int(n["pitch"]), 0))))
+        merged.sort(key=lambda e: (e[0], e[1]))
+        data = bytearray()
+        last = writer.last_tick
+        for tick, _, raw in merged:
+            data += var_len(tick - last)
+            data += raw
+            last = tick
+        writer.raw(bytes(data), last, len(merged))
+
+
+def write_midi(path: str, song: Song) -> int:
+    """Write a Song as a format 1 SMF (conductor track first); returns event count"""
+    with MidiFile(path, song.ppq) as midi:
+        with midi.track("Conductor") as conductor:
+            conductor.time_signature(0, *song.time_signature)
+            if song.key is not None:
+                conductor.meta(0, 0x59, struct.pack("bB", *song.key))
+            for tick, usec in song.tempos or [(0, DEFAULT_USEC)]:
+                conductor.meta(tick, 0x51, usec.to_bytes(3, "big"))
+        for track in song.tracks:
+            _write_track(midi, track)
+    return midi.events
+
+
+# ========== TRANSFORMS ==========
+def _melodic(notes: np.ndarray) -> np.ndarray:
+    return notes["channel"] != DRUM_CHANNEL
+
+
+def transpose(song: Song, semitones: int) -> Song:
+    """Shift every non-drum note"""
+    tracks = []
+    for track in song.tracks:
+        notes = track.notes.copy()
+        mask = _melodic(notes)
+        notes["pitch"][mask] = np.clip(notes["pitch"][mask] + semitones, 0, 127)
+        tracks.append(replace(track, notes=notes))
+    return replace(song, tracks=tracks)
+
+
+def _tonic(signature: Tuple[int, int]) -> int:
+    sharps, minor = signature
+    return (sharps * 7 + (9 if minor else 0)) % 12
+
+
+def estimate_signature(song: Song, minor: bool) -> Tuple[int, int]:
+    """Key signature whose diatonic scale covers the most note time"""
+    weights = np.zeros(12)
+    for track in song.tracks:
+        notes = track.notes[_melodic(track.notes)]
+        np.add.at(weights, notes["pitch"] % 12, np.maximum(notes["duration"], 1))
+    major_scale = np.array([0, 2, 4, 5, 7, 9, 11])
+    best = max(range(-6, 7), key=lambda sf: weights[(major_scale + sf * 7) % 12].sum())
+    return best, int(minor)
+
+
+def to_key(song: Song, key: str) -> Song:
+    """Transpose to a key like 'F# minor' by the shortest distance between tonics"""
+    target = key_signature(key)
+    source = song.key or estimate_signature(song, bool(target[1]))
+    shift = (_tonic(target) - _tonic(source) + 6) % 12 - 6
+    return replace(transpose(song, shift), key=target)
+
+
+def retime(song: Song, bpm: float) -> Song:
+    """One tempo for the whole song; positions stay on the same beats"""
+    return replace(song, tempos=[(0, int(round(60_000_000 / bpm)))])
+
+
+def quantize(song: Song, division: int = 16, strength: float = 1.0) -> Song:
+    """Pull note starts toward a 1/division grid (16 = sixteenths)"""
+    grid = song.ppq * 4 // division
+    tracks = []
+    for track in song.tracks:
+        notes = track.notes.copy()
+        ticks = notes["tick"]
+        snapped = np.round(ticks / grid).astype(np.int64) * grid
+        notes["tick"] = ticks + np.round((snapped - ticks) * strength).astype(np.int64)
+        if strength >= 1:
+            notes["duration"] = np.maximum(np.round(notes["duration"] / grid) * grid, grid)
+        tracks.append(replace(track, notes=notes[np.argsort(notes["tick"], kind="stable")]))
+    return replace(song, tracks=tracks)
+
+
+def merge_tracks(song: Song) -> Song:
+    notes = np.concatenate([t.notes for t in song.tracks]) if song.tracks else Track().notes
+    events = [e for t in song.tracks for e in t.events]
+    name = next((t.name for t in song.tracks if t.name), "")
+    return replace(song, tracks=[Track(name, notes[np.argsort(notes["tick"], kind="stable")], events)])
+
+
+def split_channels(song: Song) -> Song:
+    """One track per MIDI channel; other events stay with the first track"""
+    merged = merge_tracks(song).tracks[0]
+    tracks = []
+    for channel in np.unique(merged.notes["channel"]):
+        name = "Drums" if channel == DRUM_CHANNEL else f"Channel {channel + 1}"
+        tracks.append(Track(name, merged.notes[merged.notes["channel"] == channel]))
+    if tracks:
+        tracks[0].events = merged.events
+    return replace(song, tracks=tracks or [merged])
+
+
+# ========== PIPELINE ==========
+@dataclass
+class TransformSpec:
+    style: Optional[str] = None        # registry style: its key and bpm, unless overridden
+    key: Optional[str] = None
+    bpm: Optional[float] = None
+    quantize: int = 0                  # grid division, 0 = off
+    split: bool = False
+    merge: bool = False
+
+    def resolved(self) -> "TransformSpec":
+        if not self.style:
+            return self
+        from styles import REGISTRY
+        preset = REGISTRY.resolve(self.style)
+        return replace(self, style=None, key=self.key or preset.get("key"), bpm=self.bpm or preset.get("bpm"))
+
+
+def apply(song: Song, spec: TransformSpec) -> Song:
+    if spec.merge:
+        song = merge_tracks(song)
+    elif spec.split:
+        song = split_channels(song)
+    if spec.key:
+        song = to_key(song, spec.key)
+    if spec.bpm:
+        song = retime(song, spec.bpm)
+    if spec.quantize:
+        song = quantize(song, spec.quantize)
+    return song
+
+
+def transform_file(task: Tuple[str, str, TransformSpec]) -> Dict:
+    """Pool worker: read, transform and write one file; failures are reported, not raised"""
+    src, dst, spec = task
+    try:
+        song = apply(read_midi(src), spec)
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        events = write_midi(dst, song)
+        return {"src": src, "dst": dst, "ok": True, "notes": song.notes, "events": events}
+    except (ValueError, IndexError, OSError, struct.error) as e:
+        return {"src": src, "dst": dst, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def find_midi(root: str) -> List[str]:
+    if os.path.isfile(root):
+        return [root]
+    found = []
+    for dirpath, _, files in os.walk(root):
+        found.extend(os.path.join(dirpath, f) for f in files if f.lower().endswith(MIDI_EXTENSIONS))
+    return sorted(found)
+
+
+def transform_directory(src: str, dst: str, spec: TransformSpec, workers: Optional[int] = None,
+                        chunksize: int = 64) -> Dict:
+    """Transform every MIDI file under src into the same layout under dst"""
+    spec = spec.resolved()
+    files = find_midi(src)
+    if os.path.isfile(src):
+        tasks = [(src, dst if dst.lower().endswith(MIDI_EXTENSIONS)
+                  else os.path.join(dst, os.path.basename(src)), spec)]
+    else:
+        tasks = [(path, os.path.join(dst, os.path.relpath(path, src)), spec) for path in files]
+
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        results = [transform_file(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(transform_file, tasks, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if not r["ok"]]
+    return {"files": len(results), "failed": failed, "notes": sum(r.get("notes", 0) for r in results),
+            "seconds": round(elapsed, 3),
+            "files_per_sec": round(len(results) / elapsed, 1) if elapsed > 0 else 0.0}
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO MIDI reader and transform pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Summarize MIDI files")
+    info.add_argument("paths", nargs="+")
+    tf = sub.add_parser("transform", help="Re-key / retime / quantize a file or a directory")
+    tf.add_argument("src")
+    tf.add_argument("dst")
+    tf.add_argument("--style", help="Use this style's key and BPM")
+    tf.add_argument("--key", help="Target key, e.g. 'D minor'")
+    tf.add_argument("--bpm", type=float)
+    tf.add_argument("--quantize", type=int, default=0, metavar="DIVISION", help="Grid, e.g. 16 for 1/16")
+    group = tf.add_mutually_exclusive_group()
+    group.add_argument("--split", action="store_true", help="One track per channel")
+    group.add_argument("--merge", action="store_true", help="All notes on one track")
+    tf.add_argument("--workers", type=int, default=os.cpu_count())
+    tf.add_argument("--chunksize", type=int, default=64)
+    args = parser.parse_args(argv)
+
+    if args.command == "info":
+        for path in args.paths:
+            song = read_midi(path)
+            key = f"{song.key[0]:+d} {'minor' if song.key[1] else 'major'}" if song.key else "none"
+            print(f"{path}: {len(song.tracks)} track(s), {song.notes} notes, {song.bpm:.1f} BPM, "
+                  f"ppq {song.ppq}, key signature {key}")
+        return
+
+    spec = TransformSpec(args.style, args.key, args.bpm, args.quantize, args.split, args.merge)
+    report = transform_directory(args.src, args.dst, spec, args.workers, args.chunksize)
+    print(f"✓ {report['files'] - len(report['failed'])}/{report['files']} files, {report['notes']:,} notes "
+          f"in {report['seconds']}s ({report['files_per_sec']} files/sec)")
+    for failure in report["failed"][:20]:
+        print(f"  ✗ {failure['src']}: {failure['error']}")
+    print(f"📁 Output: {args.dst}")
+    if report["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
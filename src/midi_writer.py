@@ -0,0 +1,220 @@
+"""
+SunoFLO - MIDI Writer
+Streaming Standard MIDI File (format 1) writer with back-patched chunk lengths
+"""
+
+import heapq
+import struct
+from typing import List, Optional, Tuple
+
+# ========== PRECOMPILED PACKERS ==========
+HEADER = struct.Struct(">4sIHHH")   # MThd, length, format, ntracks, division
+CHUNK = struct.Struct(">4sI")       # MTrk, length
+U16 = struct.Struct(">H")
+U32 = struct.Struct(">I")
+CHANNEL_EVENT = struct.Struct(">BBB")
+TEMPO_EVENT = struct.Struct(">BBBBBB")      # FF 51 03 tt tt tt (usec per quarter)
+TIME_SIG_EVENT = struct.Struct(">BBBBBBB")  # FF 58 04 nn dd cc bb
+KEY_SIG_EVENT = struct.Struct(">BBBbB")     # FF 59 02 sf mi
+
+PPQ = 480
+FLUSH_BYTES = 64 * 1024
+DRUM_CHANNEL = 9
+
+# Sharps (+) / flats (-) for each key, as written to the key signature meta event
+KEY_SIGNATURES = {
+    "C major": 0, "G major": 1, "D major": 2, "A major": 3, "E major": 4, "B major": 5,
+    "F# major": 6, "F major": -1, "Bb major": -2, "Eb major": -3, "Ab major": -4,
+    "Db major": -5, "Gb major": -6,
+    "A minor": 0, "E minor": 1, "B minor": 2, "F# minor": 3, "C# minor": 4, "G# minor": 5,
+    "D# minor": 6, "D minor": -1, "G minor": -2, "C minor": -3, "F minor": -4,
+    "Bb minor": -5, "Eb minor": -6,
+}
+
+
+# ========== VARIABLE-LENGTH QUANTITIES ==========
+def _encode_var_len(value: int) -> bytes:
+    result = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        result.append((value & 0x7F) | 0x80)
+        value >>= 7
+    result.reverse()
+    return bytes(result)
+
+
+# Deltas below 2**14 cover everything up to 32 bars of 16ths at 480 PPQ
+_VAR_LEN_TABLE = [_encode_var_len(v) for v in range(1 << 14)]
+
+
+def var_len(value: int) -> bytes:
+    """Encode a MIDI variable-length quantity"""
+    if value < 0:
+        raise ValueError(f"Negative delta time: {value}")
+    if value < 1 << 14:
+        return _VAR_LEN_TABLE[value]
+    return _encode_var_len(value)
+
+
+def key_signature(key: str) -> Tuple[int, int]:
+    """Return (sharps/flats, minor flag) for a key like 'C minor'"""
+    minor = 1 if key.strip().lower().endswith("minor") else 0
+    return KEY_SIGNATURES.get(key.strip(), 0), minor
+
+
+# ========== TRACK WRITER ==========
+class TrackWriter:
+    """Write one MTrk chunk from absolute-tick events in time order"""
+
+    def __init__(self, midi: "MidiFile", name: Optional[str] = None):
+        self.midi = midi
+        self.buffer = bytearray()
+        self.last_tick = 0
+        self.events = 0
+        self.pending_offs: List[Tuple[int, int, int]] = []   # heap of (tick, channel, pitch)
+        self.length = 0
+
+        self.start = midi.file.tell()
+        midi.file.write(CHUNK.pack(b"MTrk", 0))
+        if name:
+            self.meta(0, 0x03, name.encode("latin-1", "replace"))
+
+    # ---------- low level ----------
+    def _delta(self, tick: int) -> bytes:
+        if tick < self.last_tick:
+            raise ValueError(f"Event at tick {tick} is before the previous event at {self.last_tick}")
+        delta = var_len(tick - self.last_tick)
+        self.last_tick = tick
+        return delta
+
+    def _flush_offs(self, tick: int):
+        """Emit queued note-offs that fall at or before tick"""
+        offs = self.pending_offs
+        while offs and offs[0][0] <= tick:
+            off_tick, channel, pitch = heapq.heappop(offs)
+            self.buffer += self._delta(off_tick)
+            self.buffer += CHANNEL_EVENT.pack(0x80 | channel, pitch, 0)
+            self.events += 1
+
+    def _maybe_flush(self):
+        if len(self.buffer) >= FLUSH_BYTES:
+            self.midi.file.write(self.buffer)
+            self.length += len(self.buffer)
+            self.buffer.clear()
+
+    # ---------- events ----------
+    def meta(self, tick: int, meta_type: int, data: bytes):
+        self._flush_offs(tick)
+        self.buffer += self._delta(tick)
+        self.buffer += bytes((0xFF, meta_type))
+        self.buffer += var_len(len(data))
+        self.buffer += data
+        self.events += 1
+        self._maybe_flush()
+
+    def tempo(self, tick: int, bpm: float):
+        usec = int(round(60_000_000 / bpm))
+        self._flush_offs(tick)
+        self.buffer += self._delta(tick)
+        self.buffer += TEMPO_EVENT.pack(0xFF, 0x51, 0x03, (usec >> 16) & 0xFF, (usec >> 8) & 0xFF, usec & 0xFF)
+        self.events += 1
+
+    def time_signature(self, tick: int, numerator: int = 4, denominator: int = 4):
+        self._flush_offs(tick)
+        self.buffer += self._delta(tick)
+        self.buffer += TIME_SIG_EVENT.pack(0xFF, 0x58, 0x04, numerator,
+                                           denominator.bit_length() - 1, 24, 8)
+        self.events += 1
+
+    def key_signature(self, tick: int, key: str):
+        sharps, minor = key_signature(key)
+        self._flush_offs(tick)
+        self.buffer += self._delta(tick)
+        self.buffer += KEY_SIG_EVENT.pack(0xFF, 0x59, 0x02, sharps, minor)
+        self.events += 1
+
+    def program_change(self, tick: int, program: int, channel: int = 0):
+        self._flush_offs(tick)
+        self.buffer += self._delta(tick)
+        self.buffer += bytes((0xC0 | channel, program & 0x7F))
+        self.events += 1
+
+    def note(self, tick: int, pitch: int, velocity: int, duration: int, channel: int = 0):
+        """Note-on at tick; the matching note-off is queued and emitted in order"""
+        self._flush_offs(tick)
+        self.buffer += self._delta(tick)
+        self.buffer += CHANNEL_EVENT.pack(0x90 | channel, pitch, velocity)
+        self.events += 1
+        heapq.heappush(self.pending_offs, (tick + max(1, duration), channel, pitch))
+        self._maybe_flush()
+
+    def flush_pending(self):
+        """Emit every queued note-off now"""
+        self._flush_offs(float("inf"))
+
+    def raw(self, data: bytes, last_tick: int, events: int):
+        """Append pre-encoded events whose deltas start from self.last_tick"""
+        if self.pending_offs:
+            raise ValueError("Flush pending note-offs before appending raw events")
+        self.buffer += data
+        self.last_tick = last_tick
+        self.events += events
+        self._maybe_flush()
+
+    def close(self):
+        """Flush remaining note-offs, write End of Track and back-patch the chunk length"""
+        self.flush_pending()
+        self.buffer += b"\x00\xFF\x2F\x00"
+        self.midi.file.write(self.buffer)
+        self.length += len(self.buffer)
+        self.buffer = bytearray()
+
+        end = self.midi.file.tell()
+        self.midi.file.seek(self.start + 4)
+        self.midi.file.write(U32.pack(self.length))
+        self.midi.file.seek(end)
+        self.midi.track_count += 1
+        self.midi.events += self.events
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+# ========== FILE WRITER ==========
+class MidiFile:
+    """Format 1 SMF written straight to disk, one track at a time"""
+
+    def __init__(self, path: str, ppq: int = PPQ):
+        self.path = path
+        self.ppq = ppq
+        self.track_count = 0
+        self.events = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(b"MThd", 6, 1, 0, ppq))
+
+    def track(self, name: Optional[str] = None) -> TrackWriter:
+        return TrackWriter(self, name)
+
+    def conductor(self, bpm: float, key: str, numerator: int = 4, denominator: int = 4):
+        """Write the tempo map track (track 0)"""
+        with self.track("Conductor") as track:
+            track.time_signature(0, numerator, denominator)
+            track.key_signature(0, key)
+            track.tempo(0, bpm)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(10)
+        self.file.write(U16.pack(self.track_count))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,299 @@
+"""
+SunoFLO - N-gram Line Model
+Markov lyric lines trained from the theme corpora and any extra text files
+
+Transitions live in flat arrays, one set per context length: sorted context
+keys (token ids packed into a u64), u32 offsets into u32 next-token ids and
+u32 cumulative weights. Sampling is two binary searches per token. The
+table serializes with the same header/span layout as the rhyme index and
+memory-maps straight back, so a model costs only the pages it touches.
+
+    python src/ngram.py build lines.ngm [extra.txt ...] --order 3
+    python src/ngram.py sample lines.ngm 10
+"""
+
+import os
+import re
+import sys
+import mmap
+import random
+import struct
+import bisect
+import argparse
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from rhymes import _Strings, default_index, perfect_key
+
+MAGIC = b"SFNGRM01"
+HEADER = struct.Struct("<8sI")
+SPAN = struct.Struct("<QQ")
+MODEL_ENV = "SUNOFLO_NGRAM_MODEL"
+
+BOS, EOS = 0, 1
+SPECIALS = ["<s>", "</s>"]
+ID_BITS = 20          # up to ~1M tokens; three context ids pack into one u64
+MAX_ORDER = 4
+DEFAULT_ORDER = 3
+
+_TOKEN = re.compile(r"[\w']+|[,!?.]")
+_WORD = re.compile(r"[a-z']+")
+_ATTACHED = {",", "!", "?", "."}
+
+
+def tokenize(line: str) -> List[str]:
+    return _TOKEN.findall(line)
+
+
+def detokenize(tokens: Iterable[str]) -> str:
+    out = ""
+    for token in tokens:
+        out += token if (token in _ATTACHED or not out) else " " + token
+    return out
+
+
+def _key(ids: Sequence[int]) -> int:
+    key = 0
+    for token in ids:
+        key = (key << ID_BITS) | token
+    return key
+
+
+def _u32(values) -> bytes:
+    return array("I", values).tobytes()
+
+
+# ========== CORPUS ==========
+def default_corpus(template_lines: int = 400, seed: int = 0) -> List[str]:
+    """Every theme line, every metered core on every anchor rhyme, plus a fixed
+    sample of template-filled lines"""
+    from sunoflo_ultimate import LYRIC_THEMES
+    from sunoflo import LyricGenerator, METER_LINES, RHYME_ANCHORS, _rhyme_words
+
+    lines = [line for theme in LYRIC_THEMES.values() for line in theme["lines"]]
+    # Metered cores end on rhyme-table words, so chains learn to close on one
+    lines += [core.format(w=word) for cores in METER_LINES.values() for core in cores
+              for anchor in RHYME_ANCHORS for word in _rhyme_words(anchor)]
+    rng = random.Random(seed)
+    for advanced in (False, True):
+        gen = LyricGenerator("Trap", advanced, seed=rng.getrandbits(63))
+        for i in range(template_lines // 2):
+            topic = ("money", "love", "struggle", "flex")[i % 4]
+            lines.append(gen._generate_line(RHYME_ANCHORS[i % len(RHYME_ANCHORS)], topic))
+    return lines
+
+
+def read_corpus(paths: Iterable[str]) -> Iterator[str]:
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("["):   # skip [SECTION] headers
+                    yield line
+
+
+# ========== BUILD ==========
+def build_model(lines: Iterable[str], order: int = DEFAULT_ORDER) -> bytes:
+    """Count transitions for every context length 1..order-1 and serialize"""
+    if not 2 <= order <= MAX_ORDER:
+        raise ValueError(f"order must be 2..{MAX_ORDER}")
+    context = order - 1
+    vocab: Dict[str, int] = {token: i for i, token in enumerate(SPECIALS)}
+    counts: List[Dict[int, Dict[int, int]]] = [{} for _ in range(context)]
+
+    for line in lines:
+        ids = [BOS] * context
+        for token in tokenize(line):
+            ids.append(vocab.setdefault(token, len(vocab)))
+        ids.append(EOS)
+        for pos in range(context, len(ids)):
+            nxt = ids[pos]
+            for k in range(1, context + 1):
+                table = counts[k - 1].setdefault(_key(ids[pos - k:pos]), {})
+                table[nxt] = table.get(nxt, 0) + 1
+    if len(vocab) >= 1 << ID_BITS:
+        raise ValueError("vocabulary too large")
+
+    words = sorted(vocab, key=vocab.get)
+    offsets = [0]
+    blob = bytearray()
+    for word in words:
+        blob += word.encode("utf-8")
+        offsets.append(len(blob))
+    arrays = [_u32(offsets), bytes(blob)]
+
+    for table in counts:
+        keys = sorted(table)
+        starts, nexts, cums = [0], [], []
+        for key in keys:
+            total = 0
+            for nxt, n in sorted(table[key].items()):
+                total += n
+                nexts.append(nxt)
+                cums.append(total)
+            starts.append(len(nexts))
+        arrays += [array("Q", keys).tobytes(), _u32(starts), _u32(nexts), _u32(cums)]
+
+    out = bytearray(HEADER.pack(MAGIC, len(arrays)))
+    offset = len(out) + SPAN.size * len(arrays)
+    for data in arrays:
+        out += SPAN.pack(offset, len(data))
+        offset += len(data)
+    for data in arrays:
+        out += data
+    return bytes(out)
+
+
+# ========== MODEL ==========
+class NgramModel:
+    """Read-only sampler over a serialized table (bytes or mmap)"""
+
+    def __init__(self, data):
+        self._data = data
+        view = memoryview(data)
+        magic, count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a SunoFLO n-gram model")
+        arrays = []
+        for i in range(count):
+            offset, length = SPAN.unpack_from(view, HEADER.size + i * SPAN.size)
+            arrays.append(view[offset:offset + length])
+
+        self.vocab = _Strings(arrays[0].cast("I"), arrays[1])   # tokens decode on access
+        # tables[k - 1] = (keys, starts, nexts, cums) for contexts of k tokens
+        self.tables = [(keys.cast("Q"), starts.cast("I"), nexts.cast("I"), cums.cast("I"))
+                       for keys, starts, nexts, cums in zip(*[iter(arrays[2:])] * 4)]
+        self.order = len(self.tables) + 1
+
+    @classmethod
+    def load(cls, path: str) -> "NgramModel":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def train(cls, lines: Iterable[str], order: int = DEFAULT_ORDER) -> "NgramModel":
+        return cls(build_model(lines, order))
+
+    @staticmethod
+    def write(path: str, lines: Iterable[str], order: int = DEFAULT_ORDER) -> int:
+        data = build_model(lines, order)
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+    def next_token(self, ids: Sequence[int], rng: random.Random) -> int:
+        """Sample a successor from the longest context of ids that offers more than one"""
+        chosen = None
+        key = 0
+        for k, (keys, starts, nexts, cums) in enumerate(self.tables, 1):
+            key |= ids[-k] << (ID_BITS * (k - 1))
+            i = bisect.bisect_left(keys, key)
+            if i == len(keys) or keys[i] != key:
+                break
+            lo, hi = starts[i], starts[i + 1]
+            if chosen is None or hi - lo > 1:
+                chosen = (lo, hi, nexts, cums)
+        if chosen is None:
+            return EOS
+        lo, hi, nexts, cums = chosen
+        r = rng.randrange(cums[hi - 1])
+        return nexts[bisect.bisect_right(cums, r, lo, hi)]
+
+    def line(self, rng: random.Random, max_tokens: int = 16, min_tokens: int = 4) -> str:
+        """One generated line"""
+        context = len(self.tables)
+        for _ in range(8):
+            ids = [BOS] * context
+            while len(ids) - context < max_tokens:
+                token = self.next_token(ids, rng)
+                if token == EOS:
+                    break
+                ids.append(token)
+            if len(ids) - context >= min_tokens:
+                break
+        return detokenize(self.vocab[i] for i in ids[context:])
+
+    def lines(self, rng: random.Random, count: int, **options) -> Iterator[str]:
+        for _ in range(count):
+            yield self.line(rng, **options)
+
+    def couplets(self, rng: random.Random, count: int, target: int = 9, tolerance: int = 2,
+                 tries: int = 64) -> Iterator[str]:
+        """Lines in rhyming pairs (AABB) that hold together as lyrics
+
+        A line is kept only if it ends on a rhyme-table word (the second of a
+        pair on a perfect rhyme of the first), holds no cliche and lands
+        within `tolerance` of `target` syllables. After `tries` draws the
+        candidate breaking the fewest checks is used.
+        """
+        from cliches import DEFAULT_FILTER
+        from syllables import line_syllables
+        index = default_index()
+        pair_end = None
+        for n in range(count):
+            best, best_end, best_faults = "", None, None
+            for _ in range(tries):
+                line = self.line(rng).rstrip(",")
+                words = _WORD.findall(line.lower())
+                end = words[-1].strip("'") if words else ""
+                faults = 0
+                if end not in index:
+                    faults += 2
+                elif pair_end and (end == pair_end or perfect_key(end) != perfect_key(pair_end)):
+                    faults += 1
+                if DEFAULT_FILTER.contains(line):
+                    faults += 2
+                faults += max(0, abs(line_syllables(line) - target) - tolerance)
+                if best_faults is None or faults < best_faults:
+                    best, best_end, best_faults = line, end, faults
+                    if not faults:
+                        break
+            yield best
+            pair_end = None if n % 2 or best_end not in index else best_end
+
+
+_default: Optional[NgramModel] = None
+
+
+def default_model() -> NgramModel:
+    """Model from $SUNOFLO_NGRAM_MODEL if set, otherwise trained on the built-in corpora"""
+    global _default
+    if _default is None:
+        path = os.environ.get(MODEL_ENV)
+        _default = NgramModel.load(path) if path else NgramModel.train(default_corpus())
+    return _default
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO n-gram line model")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Train on the theme corpora plus extra text files")
+    build.add_argument("out")
+    build.add_argument("texts", nargs="*")
+    build.add_argument("--order", type=int, default=DEFAULT_ORDER)
+    build.add_argument("--no-defaults", action="store_true", help="Train on the text files only")
+    sample = sub.add_parser("sample", help="Print generated lines")
+    sample.add_argument("model")
+    sample.add_argument("count", type=int, nargs="?", default=10)
+    sample.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        lines = [] if args.no_defaults else default_corpus()
+        lines.extend(read_corpus(args.texts))
+        size = NgramModel.write(args.out, lines, args.order)
+        model = NgramModel.load(args.out)
+        print(f"✓ {len(lines):,} lines, {len(model):,} tokens, order {model.order}: "
+              f"{size:,} bytes -> {args.out}")
+    else:
+        model = NgramModel.load(args.model)
+        for line in model.lines(random.Random(args.seed), args.count):
+            print(line)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+SunoFLO - Novelty Filter
+Near-duplicate lyric detection with MinHash signatures and an LSH index
+
+Lyrics are reduced to word shingles, hashed into a MinHash signature and
+filed under one bucket per LSH band in SQLite, so the index persists across
+runs and a lookup is one indexed query however many songs it holds.
+Candidates sharing a bucket are confirmed with the signature estimate of
+Jaccard similarity.
+
+    index = NoveltyIndex("~/.cache/sunoflo/novelty.db", threshold=0.6)
+    text, similarity = index.unique(flo.generate_lyrics, label="drake/42")
+"""
+
+import os
+import re
+import zlib
+import sqlite3
+import hashlib
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_DB = "~/.cache/sunoflo/novelty.db"
+MERSENNE = np.uint64((1 << 61) - 1)
+HASH_SEED = 0x5F10
+
+_HEADER = re.compile(r"^\[.*\]$", re.M)
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+# ========== SIGNATURES ==========
+def shingles(text: str, k: int = 3) -> np.ndarray:
+    """Hashes of every k-word shingle, section headers dropped"""
+    words = _WORD.findall(_HEADER.sub(" ", text.lower()))
+    if len(words) < k:
+        words = words + [""] * (k - len(words))
+    grams = {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def _bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve (1/b)^(1/r) sits closest to the threshold"""
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+class MinHasher:
+    """num_perm universal hashes (a*x + b) mod 2^61-1 over 32-bit shingle hashes"""
+
+    def __init__(self, num_perm: int = 128, shingle: int = 3, seed: int = HASH_SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle = shingle
+        # a < 2^31 and x < 2^32 keep a*x + b inside uint64
+        self.a = rng.integers(1, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = shingles(text, self.shingle)
+        return ((self.a * hashes + self.b) % MERSENNE).min(axis=1).astype(np.uint32)
+
+
+def similarity(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+# ========== INDEX ==========
+class NoveltyIndex:
+    """Persistent MinHash/LSH index of every lyric accepted so far"""
+
+    def __init__(self, path: str = DEFAULT_DB, threshold: float = 0.6, num_perm: int = 128,
+                 shingle: int = 3):
+        if path != ":memory:":
+            path = os.path.expanduser(path)
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS songs (id INTEGER PRIMARY KEY, signature BLOB, label TEXT);
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER, bucket INTEGER, song INTEGER,
+                PRIMARY KEY (band, bucket, song)) WITHOUT ROWID;
+        """)
+        # Hash family and banding are fixed per database: reopen with the stored
+        # settings (the threshold only gates the final similarity check)
+        self.db.execute("BEGIN IMMEDIATE")   # workers may open a new database together
+        stored = dict(self.db.execute("SELECT key, value FROM meta"))
+        if stored:
+            num_perm, shingle = int(stored["num_perm"]), int(stored["shingle"])
+            bands, rows = int(stored["bands"]), int(stored["rows"])
+        else:
+            bands, rows = _bands(num_perm, threshold)
+            self.db.executemany("INSERT INTO meta VALUES (?, ?)",
+                                [("num_perm", str(num_perm)), ("shingle", str(shingle)),
+                                 ("bands", str(bands)), ("rows", str(rows))])
+        self.db.execute("COMMIT")
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle)
+        self.bands, self.rows = bands, rows
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def _buckets(self, sig: np.ndarray) -> List[Tuple[int, int]]:
+        rows = sig[:self.bands * self.rows].reshape(self.bands, self.rows)
+        return [(band, int.from_bytes(hashlib.blake2b(row.tobytes(), digest_size=8).digest(),
+                                      "little", signed=True))
+                for band, row in enumerate(rows)]
+
+    def query(self, text: str, sig: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """(song id, similarity) of indexed songs at or above the threshold, most similar first"""
+        sig = self.hasher.signature(text) if sig is None else sig
+        buckets = self._buckets(sig)
+        # One primary-key probe per band (a row-value IN list would scan the table)
+        probes = " UNION ".join("SELECT song FROM buckets WHERE band = ? AND bucket = ?" for _ in buckets)
+        params = [v for pair in buckets for v in pair]
+        rows = self.db.execute(f"SELECT id, signature FROM songs WHERE id IN ({probes})", params).fetchall()
+        matches = []
+        for song, blob in rows:
+            score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+            if score >= self.threshold:
+                matches.append((song, score))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def add(self, text: str, label: str = "", sig: Optional[np.ndarray] = None) -> int:
+        sig = self.hasher.signature(text) if sig is None else sig
+        cur = self.db.execute("INSERT INTO songs (signature, label) VALUES (?, ?)", (sig.tobytes(), label))
+        song = cur.lastrowid
+        self.db.executemany("INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)",
+                            [(band, bucket, song) for band, bucket in self._buckets(sig)])
+        return song
+
+    def check_and_add(self, text: str, label: str = "") -> Tuple[bool, float]:
+        """Atomically test a lyric and index it; returns (novel, best similarity)"""
+        sig = self.hasher.signature(text)
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            matches = self.query(text, sig)
+            self.add(text, label, sig)
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        best = matches[0][1] if matches else 0.0
+        return not matches, best
+
+    def unique(self, make: Callable[[], object], text_of: Callable[[object], str] = str,
+               label: str = "", attempts: int = 8) -> Tuple[object, float]:
+        """Call make() until its output is novel, indexing the result
+
+        After `attempts` near-duplicates the least similar candidate is kept.
+        Returns (result, similarity to its nearest indexed song).
+        """
+        best, best_score = None, 2.0
+        for _ in range(attempts):
+            candidate = make()
+            matches = self.query(text_of(candidate))
+            score = matches[0][1] if matches else 0.0
+            if score < best_score:
+                best, best_score = candidate, score
+            if not matches:
+                break
+        self.check_and_add(text_of(best), label)
+        return best, best_score
+
+    def close(self):
+        self.db.close()
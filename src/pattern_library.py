@@ -0,0 +1,287 @@
+"""
+SunoFLO - Pattern Library
+One-bar lanes as uint16 step bitsets in a single memory-mapped file
+
+Bit i of a lane is step i of a bar of 16ths. Each pattern also carries a
+per-step velocity (uint8) and pitch offset from the root (int8), 34 bytes
+in all. Patterns are sorted by (genre, style, role), so a group is one
+contiguous slice found by binary search, and the columns are NumPy views
+over the map: a library of millions of patterns costs only the pages a
+generator actually draws from.
+
+The variation operators (rotate, mask, fill, thin) work on whole arrays
+of bitsets at once.
+
+    python src/pattern_library.py build patterns.sfp --per-group 2000
+    python src/pattern_library.py show patterns.sfp Trap "Metro Boomin" drums -n 8
+"""
+
+import os
+import mmap
+import struct
+import hashlib
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import patterns
+
+MAGIC = b"SFPTRN01"
+HEADER = struct.Struct("<8sI")
+SPAN = struct.Struct("<QQ")
+STEPS = 16
+ROLES = ("drums", "bass", "melody")
+
+STEP_BITS = (1 << np.arange(STEPS)).astype(np.uint16)
+DOWNBEATS = 0x1111           # steps 0, 4, 8, 12
+LAST_BEAT = 0xF000           # steps 12-15: where fills go
+FULL = 0xFFFF
+
+
+# ========== BITSET OPERATORS ==========
+def from_grid(grid) -> np.ndarray:
+    """Bool grids (..., 16) to uint16 bitsets"""
+    grid = np.asarray(grid, dtype=bool)
+    return (grid * STEP_BITS).sum(axis=-1, dtype=np.uint32).astype(np.uint16)
+
+
+def to_grid(bits) -> np.ndarray:
+    """uint16 bitsets to bool grids (..., 16)"""
+    return (np.asarray(bits, dtype=np.uint16)[..., None] & STEP_BITS) != 0
+
+
+def popcount(bits) -> np.ndarray:
+    return to_grid(bits).sum(axis=-1)
+
+
+def rotate(bits, steps) -> np.ndarray:
+    """Shift later in the bar by steps, wrapping around the barline"""
+    b = np.asarray(bits, dtype=np.uint32)
+    steps = (np.asarray(steps) % STEPS).astype(np.uint32)   # wrap negatives before the unsigned cast
+    return (((b << steps) | (b >> (STEPS - steps))) & FULL).astype(np.uint16)
+
+
+def mask(bits, keep) -> np.ndarray:
+    return (np.asarray(bits, dtype=np.uint16) & np.uint16(keep)).astype(np.uint16)
+
+
+def fill(bits, add=LAST_BEAT) -> np.ndarray:
+    """Turn on every step in add (default: a 16th roll over the last beat)"""
+    return (np.asarray(bits, dtype=np.uint16) | np.uint16(add)).astype(np.uint16)
+
+
+def thin(bits, keep: float, rng: np.random.Generator, protect: int = DOWNBEATS) -> np.ndarray:
+    """Drop each step with probability 1 - keep; protected steps always stay"""
+    bits = np.asarray(bits, dtype=np.uint16)
+    survivors = from_grid(rng.random(bits.shape + (STEPS,)) < keep)
+    return (bits & (survivors | np.uint16(protect))).astype(np.uint16)
+
+
+# ========== FILE FORMAT ==========
+def _key(genre: int, style: int, role: int) -> int:
+    return (genre << 32) | (style << 16) | role
+
+
+def build_library(groups: Dict[Tuple[str, str, str], Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> bytes:
+    """Serialize {(genre, style, role): (bits[n], velocity[n, 16], pitch[n, 16])}"""
+    genres = sorted({g for g, _, _ in groups})
+    styles = sorted({s for _, s, _ in groups})
+    roles = sorted({r for _, _, r in groups})
+    ids = [{name: i for i, name in enumerate(names)} for names in (genres, styles, roles)]
+    keyed = sorted((_key(ids[0][g], ids[1][s], ids[2][r]), (g, s, r)) for g, s, r in groups)
+
+    keys = np.array([k for k, _ in keyed], dtype=np.uint64)
+    parts = [groups[name] for _, name in keyed]
+    starts = np.zeros(len(parts) + 1, dtype=np.uint32)
+    starts[1:] = np.cumsum([len(bits) for bits, _, _ in parts])
+    bits = np.concatenate([np.asarray(b, dtype=np.uint16) for b, _, _ in parts])
+    velocity = np.concatenate([np.asarray(v, dtype=np.uint8).reshape(-1, STEPS) for _, v, _ in parts])
+    pitch = np.concatenate([np.asarray(p, dtype=np.int8).reshape(-1, STEPS) for _, _, p in parts])
+
+    arrays = ["\n".join(names).encode("utf-8") for names in (genres, styles, roles)]
+    arrays += [keys.tobytes(), starts.tobytes(), bits.tobytes(), velocity.tobytes(), pitch.tobytes()]
+    digest = hashlib.blake2b(b"".join(arrays), digest_size=16).digest()
+    arrays.insert(0, digest)
+
+    out = bytearray(HEADER.pack(MAGIC, len(arrays)))
+    offset = len(out) + SPAN.size * len(arrays)
+    for data in arrays:
+        out += SPAN.pack(offset, len(data))
+        offset += len(data)
+    for data in arrays:
+        out += data
+    return bytes(out)
+
+
+# ========== LIBRARY ==========
+class PatternLibrary:
+    """Read-only pattern columns over bytes or a memory map"""
+
+    def __init__(self, data):
+        self._data = data
+        magic, count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a SunoFLO pattern library")
+        spans = [SPAN.unpack_from(data, HEADER.size + i * SPAN.size) for i in range(count)]
+
+        def column(i, dtype):
+            offset, length = spans[i]
+            return np.frombuffer(data, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=offset)
+
+        self.digest = bytes(column(0, np.uint8)).hex()
+        self.genres, self.styles, self.roles = (
+            bytes(column(i, np.uint8)).decode("utf-8").split("\n") for i in (1, 2, 3))
+        self._ids = [{name: i for i, name in enumerate(names)}
+                     for names in (self.genres, self.styles, self.roles)]
+        self.keys = column(4, np.uint64)
+        self.starts = column(5, np.uint32)
+        self.bits = column(6, np.uint16)
+        self.velocity = column(7, np.uint8).reshape(-1, STEPS)
+        self.pitch = column(8, np.int8).reshape(-1, STEPS)
+
+    @classmethod
+    def load(cls, path: str) -> "PatternLibrary":
+        with open(os.path.expanduser(path), "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @staticmethod
+    def write(path: str, groups) -> int:
+        data = build_library(groups)
+        with open(os.path.expanduser(path), "wb") as f:
+            f.write(data)
+        return len(data)
+
+    def __len__(self) -> int:
+        return len(self.bits)
+
+    def groups(self) -> List[Tuple[str, str, str, int]]:
+        out = []
+        for n, key in enumerate(self.keys.tolist()):
+            out.append((self.genres[key >> 32], self.styles[(key >> 16) & 0xFFFF], self.roles[key & 0xFFFF],
+                        int(self.starts[n + 1] - self.starts[n])))
+        return out
+
+    def span(self, genre: str, style: str, role: str) -> Tuple[int, int]:
+        """[lo, hi) pattern indexes of one group; empty if absent"""
+        try:
+            key = _key(self._ids[0][genre], self._ids[1][style], self._ids[2][role])
+        except KeyError:
+            return 0, 0
+        n = int(np.searchsorted(self.keys, np.uint64(key)))
+        if n == len(self.keys) or int(self.keys[n]) != key:
+            return 0, 0
+        return int(self.starts[n]), int(self.starts[n + 1])
+
+    def select(self, genre: Optional[str] = None, style: Optional[str] = None,
+               role: Optional[str] = None) -> np.ndarray:
+        """Pattern indexes matching every given field"""
+        keys = self.keys
+        wanted = np.ones(len(keys), dtype=bool)
+        for value, ids, shift in ((genre, self._ids[0], 32), (style, self._ids[1], 16), (role, self._ids[2], 0)):
+            if value is not None:
+                if value not in ids:
+                    return np.zeros(0, dtype=np.int64)
+                wanted &= ((keys >> np.uint64(shift)) & np.uint64(0xFFFF)) == ids[value]
+        groups = np.flatnonzero(wanted)
+        return np.concatenate([np.arange(self.starts[g], self.starts[g + 1]) for g in groups]) \
+            if len(groups) else np.zeros(0, dtype=np.int64)
+
+    def draw(self, genre: str, style: str, role: str, rng) -> int:
+        """A random pattern for the group, falling back to the genre, then to the role alone"""
+        lo, hi = self.span(genre, style, role)
+        if hi > lo:
+            return rng.randrange(lo, hi)
+        for candidates in (self.select(genre=genre, role=role), self.select(role=role)):
+            if len(candidates):
+                return int(candidates[rng.randrange(len(candidates))])
+        raise KeyError(f"No {role} patterns in this library")
+
+    def grid(self, i: int) -> np.ndarray:
+        return to_grid(self.bits[i])
+
+    def notes(self, i: int, root: int) -> np.ndarray:
+        """One bar of notes for pattern i, pitched from root"""
+        return patterns.from_grid(self.grid(i), root + self.pitch[i].astype(np.int16),
+                                  self.velocity[i].astype(np.int16))
+
+
+# ========== SEED CONTENT ==========
+SCALES = {"minor": [0, 3, 5, 7, 10, 12], "major": [0, 2, 4, 7, 9, 12]}
+
+
+def variations(base: np.ndarray, role: str, n: int, rng: np.random.Generator, scale: List[int]):
+    """n derived (bits, velocity, pitch) patterns from one base grid"""
+    bits = np.full(n, from_grid(base), dtype=np.uint16)
+    if role != "drums":
+        bits = rotate(bits, rng.choice([0, 0, 2, 4, 8], size=n))
+    extra = from_grid(rng.random((n, STEPS)) < rng.uniform(0.05, 0.3, size=(n, 1)))
+    bits = bits | extra
+    bits = thin(bits, rng.uniform(0.6, 1.0), rng)
+    fills = rng.random(n) < 0.2
+    bits[fills] = fill(bits[fills], LAST_BEAT if role == "drums" else 0x5000)
+    bits[bits == 0] = DOWNBEATS
+
+    velocity = rng.integers(70, 101, size=(n, STEPS))
+    velocity[:, ::4] = rng.integers(105, 128, size=(n, STEPS // 4))
+    if role == "drums":
+        pitch = np.zeros((n, STEPS), dtype=np.int8)
+    else:
+        pitch = np.asarray(scale, dtype=np.int8)[rng.integers(0, len(scale), size=(n, STEPS))]
+        pitch[:, 0] = 0   # every lane starts on the root
+    return bits, velocity.astype(np.uint8), pitch
+
+
+def seed_groups(per_group: int = 1000, seed: int = 0):
+    """Variations of the built-in grids for every registry style and role"""
+    from styles import REGISTRY
+    rng = np.random.default_rng(seed)
+    groups = {}
+    for name in REGISTRY:
+        preset = REGISTRY[name]
+        scale = SCALES["major" if preset.get("key", "").endswith("major") else "minor"]
+        for role in ROLES:
+            groups[(preset["genre"], name, role)] = variations(patterns.GRIDS[role], role, per_group, rng, scale)
+    return groups
+
+
+# ========== CLI ==========
+def _row(bits: int) -> str:
+    return "".join("x" if bits >> step & 1 else "." for step in range(STEPS))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO pattern library")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Seed a library from the built-in grids and the style registry")
+    build.add_argument("out")
+    build.add_argument("--per-group", type=int, default=1000, help="Patterns per (style, role)")
+    build.add_argument("--seed", type=int, default=0)
+    info = sub.add_parser("info")
+    info.add_argument("library")
+    show = sub.add_parser("show", help="Print patterns of one group as step grids")
+    show.add_argument("library")
+    show.add_argument("genre")
+    show.add_argument("style")
+    show.add_argument("role", choices=ROLES)
+    show.add_argument("-n", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        size = PatternLibrary.write(args.out, seed_groups(args.per_group, args.seed))
+        library = PatternLibrary.load(args.out)
+        print(f"✓ {len(library):,} patterns in {len(library.keys)} groups: {size:,} bytes -> {args.out}")
+        return
+    library = PatternLibrary.load(args.library)
+    if args.command == "info":
+        print(f"{len(library):,} patterns, {len(library.keys)} groups, digest {library.digest}")
+        for genre, style, role, count in library.groups():
+            print(f"  {genre:<12} {style:<24} {role:<7} {count:,}")
+        return
+    lo, hi = library.span(args.genre, args.style, args.role)
+    for i in range(lo, min(hi, lo + args.n)):
+        print(f"{i:8}  {_row(int(library.bits[i]))}")
+
+
+if __name__ == "__main__":
+    main()
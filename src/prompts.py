@@ -0,0 +1,143 @@
+"""
+SunoFLO - Prompt Variants
+Distinct Suno prompts for an artist, enumerated instead of re-rolled
+
+Each SUNO_PROMPTS template is compiled once per artist with the fixed
+fields (genre, BPM, key) already filled in. The remaining slots span a
+cross product of instruments, adlibs and moods. Variant i is decoded from
+its mixed-radix digits on demand, so nothing is materialized up front, and
+K distinct variants are a random.sample over range(len(space)), which is
+O(K) however large the space is.
+
+    python src/prompts.py "Metro Boomin" --count 20 --out prompts.jsonl
+    python src/prompts.py "Drake" --all
+"""
+
+import os
+import sys
+import json
+import random
+import string
+import argparse
+from typing import Dict, Iterator, List, Optional
+
+from sunoflo_ultimate import ARTIST_STYLES, LYRIC_THEMES, SUNO_PROMPTS
+
+AXES = ("instrument", "adlib", "mood")
+
+
+# ========== COMPILED TEMPLATES ==========
+class CompiledTemplate:
+    """A format string split into literals and slots, with constant fields pre-rendered"""
+
+    def __init__(self, template: str, constants: Dict[str, object]):
+        self.literals = [""]
+        self.slots: List[str] = []
+        for literal, field, spec, _ in string.Formatter().parse(template):
+            self.literals[-1] += literal
+            if field is None:
+                continue
+            if field in constants:
+                self.literals[-1] += format(constants[field], spec or "")
+            else:
+                self.slots.append(field)
+                self.literals.append("")
+
+    def render(self, values: Dict[str, str]) -> str:
+        out = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            out.append(values[slot])
+            out.append(literal)
+        return "".join(out)
+
+
+# ========== VARIANT SPACE ==========
+class PromptSpace:
+    """Every distinct prompt for one artist, indexable and lazily iterable"""
+
+    def __init__(self, artist: str, moods: Optional[List[str]] = None):
+        self.artist = artist
+        style = ARTIST_STYLES.resolve(artist)
+        genre = style["genre"].lower()   # same template choice as generate_suno_prompt
+        spec = SUNO_PROMPTS.get(genre, SUNO_PROMPTS["trap"])
+        self.template = CompiledTemplate(spec["template"],
+                                         {"genre": genre, "bpm": style["bpm"], "key": style["key"]})
+        if moods is None:
+            moods = [style["mood"]] + [theme["mood"] for theme in LYRIC_THEMES.values()]
+        options = {"instrument": style["instruments"], "adlib": spec["adlibs"], "mood": moods}
+        # Only axes the template actually uses vary, so no two indexes render the same prompt
+        self.axes = [(axis, list(dict.fromkeys(options[axis])))
+                     for axis in AXES if axis in self.template.slots]
+        self.size = 1
+        for _, values in self.axes:
+            self.size *= len(values)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def choices(self, i: int) -> Dict[str, str]:
+        """Mixed-radix decode of variant i into one value per axis"""
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        digits = []
+        for _, values in reversed(self.axes):
+            i, digit = divmod(i, len(values))
+            digits.append(digit)
+        return {axis: values[d] for (axis, values), d in zip(self.axes, reversed(digits))}
+
+    def __getitem__(self, i: int) -> str:
+        return self.template.render(self.choices(i))
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(self.size))
+
+    def sample(self, k: int, rng: Optional[random.Random] = None) -> List[int]:
+        """Indexes of min(k, len) distinct variants, drawn without replacement"""
+        return (rng or random).sample(range(self.size), min(k, self.size))
+
+    def records(self, indexes: List[int]) -> Iterator[Dict]:
+        for i in indexes:
+            picked = self.choices(i)
+            yield {"artist": self.artist, "variant": i, "prompt": self.template.render(picked), **picked}
+
+
+# ========== BATCH FILES ==========
+def write_batch(path: str, records: List[Dict]) -> int:
+    """One prompt per line (.txt) or one JSON record per line (anything else); returns count"""
+    path = os.path.expanduser(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    plain = path.endswith(".txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines((r["prompt"] if plain else json.dumps(r)) + "\n" for r in records)
+    return len(records)
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO prompt variant enumerator")
+    parser.add_argument("artists", nargs="+", help="Artists/producers from the style registry")
+    parser.add_argument("--count", type=int, default=10, help="Distinct variants per artist")
+    parser.add_argument("--all", action="store_true", help="Every variant instead of a sample")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--out", help="Batch file (.jsonl, or .txt for prompts only)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    records = []
+    for artist in args.artists:
+        space = PromptSpace(artist)
+        indexes = range(len(space)) if args.all else space.sample(args.count, rng)
+        records.extend(space.records(indexes))
+        if args.out:
+            print(f"✓ {artist}: {len(indexes)} of {len(space)} variants")
+
+    if args.out:
+        write_batch(args.out, records)
+        print(f"📁 {len(records)} prompts -> {args.out}")
+    else:
+        for record in records:
+            print(record["prompt"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
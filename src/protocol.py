@@ -0,0 +1,26 @@
+"""
+SunoFLO - Daemon Protocol
+Socket path and the one-request helper shared by the daemon and its client;
+stdlib only, so the client starts without loading any generator
+"""
+
+import os
+import json
+import socket
+from typing import Dict
+
+DEFAULT_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or os.path.expanduser("~/.cache/sunoflo"),
+                              "sunoflo.sock")
+MAX_LINE = 16 * 1024 * 1024
+
+
+def request(path: str, payload: Dict) -> Dict:
+    """Send one request and wait for its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline(MAX_LINE)
+    if not line:
+        raise ConnectionError("daemon closed the connection")
+    return json.loads(line)
@@ -0,0 +1,420 @@
+"""
+SunoFLO - Rhyme Index
+Rhyme-ending keys and a compact, memory-mapped lookup table
+
+Words are reduced to rime keys (vowel nucleus + coda) spelled as they sound,
+using English spelling rules plus a respelling table for the words those
+rules miss, then grouped three ways:
+  perfect  - same nucleus and coda in the stressed ending  (light / tonight)
+  slant    - same nucleus, different coda                  (time / mine)
+  multi    - same last two syllables                       (money / honey)
+
+The table for LEXICON ships prebuilt in presets/rhymes.idx and is
+memory-mapped on first use; rebuild it after changing the lexicon or the
+key rules:
+
+    python src/rhymes.py build presets/rhymes.idx
+"""
+
+import os
+import re
+import sys
+import mmap
+import bisect
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ========== LEXICON ==========
+LEXICON = [
+    "back", "rack", "stack", "cat", "flat", "hat", "bat", "that", "sat", "chat", "stat", "cash",
+    "dash", "lash", "trap", "gap", "splash", "scratch", "love", "above", "shove", "dove", "of",
+    "stuff", "enough", "touch", "clutch", "much", "such", "rush", "hush", "lust", "dust", "time",
+    "mine", "fine", "wine", "shine", "sign", "line", "divine", "combine", "design", "tonight",
+    "alright", "light", "fight", "might", "right", "man", "plan", "clan", "can", "fan", "scan",
+    "tan", "ran", "began", "stand", "hand", "land", "sand", "band", "brand", "world", "girl",
+    "curl", "pearl", "twirl", "swirl", "hurl", "stir", "prefer", "occur", "blur", "fur", "sure",
+    "pure", "cure", "secure", "day", "way", "play", "say", "may", "lay", "ray", "stay", "away",
+    "today", "okay", "display", "betray", "convey", "survey", "array", "real", "feel", "steal",
+    "deal", "wheel", "heal", "reveal", "appeal", "conceal", "surreal", "ideal", "meal", "seal",
+    "thing", "bring", "sing", "ring", "king", "wing", "spring", "string", "swing", "cling",
+    "fling", "sting", "bling", "everything", "anything", "something", "money", "honey", "funny",
+    "sunny", "bunny", "runny", "phony", "bony", "crony", "life", "wife", "strife", "knife", "rife",
+    "midnight", "daylight", "sunlight", "insight", "delight", "tight", "flight", "bite", "height",
+    "fright", "ignite", "flash", "smash", "clash", "trash", "hash", "bash", "gash", "crash",
+    "gnash", "stash", "ransom", "rap", "clap", "snap", "tap", "map", "sap", "chap", "flap", "slap",
+    "wrap", "scrap", "strap", "entrap", "adapt", "see", "be", "free", "me", "key", "glee", "plea",
+    "flee", "degree", "guarantee", "priority", "ability", "reality", "personality", "stone",
+    "bone", "phone", "zone", "alone", "throne", "own", "grown", "shown", "blown", "known", "tone",
+    "moan", "groan", "atone", "postpone", "turn", "burn", "learn", "earn", "yearn", "spurn",
+    "concern", "discern", "sojourn", "journey", "beat", "street", "meet", "feet", "heat", "treat",
+    "sweet", "seat", "elite", "complete", "concrete", "discrete", "obsolete",
+    # Extra street vocabulary
+    "glove", "night", "gold", "cold", "hold", "told", "bold", "sold", "road", "code", "mode",
+    "ice", "price", "nice", "twice", "dice", "game", "fame", "name", "same", "flame", "frame",
+    "chain", "pain", "rain", "gain", "lane", "main", "plane", "drip", "whip", "trip", "grip",
+    "ship", "chip", "block", "clock", "stock", "lock", "rock", "top", "drop", "shop", "stop",
+    "pop", "bread", "head", "said", "dead", "red", "fed", "grind", "mind", "find", "kind",
+    "behind", "blind", "check", "neck", "deck", "wreck", "tech", "dream", "team", "scheme",
+    "stream", "cream", "steam", "war", "more", "store", "floor", "door", "four", "before",
+    "rhyme", "crime", "dime", "prime", "grime", "climb",
+]
+
+
+# ========== RHYME KEYS ==========
+# Keys are spelled the way the word sounds: short vowels stay a e i o u, long
+# ones are capitals (A = day, E = see, I = time, O = stone, U = blue), and "3"
+# is the r-colored vowel of her / bird / word
+VOWELS = set("aeiou3AEIOU")
+_LONG = {"a": "A", "e": "E", "i": "I", "o": "O", "u": "U", "y": "I"}
+
+# Words the spelling rules get wrong, respelled as they sound
+SOUNDS = {
+    "love": "luv", "above": "abuv", "glove": "gluv", "dove": "duv", "shove": "shuv", "of": "uv",
+    "money": "munny", "honey": "hunny", "monkey": "munky", "done": "dun", "none": "nun",
+    "one": "wun", "won": "wun", "come": "kum", "some": "sum", "son": "sun", "ton": "tun",
+    "front": "frunt", "month": "munth", "mother": "muth3", "brother": "bruth3", "other": "uth3",
+    "nothing": "nuthing", "touch": "tuch", "enough": "enuf", "tough": "tuf", "rough": "ruf",
+    "young": "yung", "blood": "blud", "flood": "flud", "give": "giv", "live": "liv",
+    "have": "hav", "gone": "gon", "were": "w3", "are": "ar", "where": "whAr", "there": "thAr",
+    "their": "thAr", "move": "mUv", "prove": "prUv", "lose": "lUz", "do": "dU", "to": "tU",
+    "who": "hU", "two": "tU", "you": "yU", "through": "thrU", "though": "thO", "soul": "sOl",
+    "your": "yor", "four": "for", "pour": "por", "war": "wor", "heart": "hart", "key": "kE",
+    "eye": "I", "buy": "bI", "guy": "gI", "bye": "bI", "climb": "klIm", "been": "bin",
+    "again": "agen", "friend": "frend", "says": "sez", "said": "sed", "head": "hed",
+    "bread": "bred", "dead": "ded", "instead": "insted", "ahead": "ahed", "death": "deth",
+    "breath": "breth", "health": "helth", "wealth": "welth", "sweat": "swet", "threat": "thret",
+    "ready": "reddy", "heavy": "hevvy", "body": "boddy", "copy": "koppy", "city": "sitty",
+    "pity": "pitty", "very": "verry", "every": "evry", "many": "menny", "any": "enny",
+    "busy": "bizzy", "pretty": "pritty", "study": "studdy", "journey": "j3ny", "sojourn": "soj3n",
+    "elite": "elEt", "the": "thu",
+}
+
+_SPELLING = [
+    (re.compile(r"eigh"), "A"),
+    (re.compile(r"ight"), "Ite"),
+    (re.compile(r"igh"), "I"),
+    (re.compile(r"[ao]ught"), "ot"),
+    (re.compile(r"qu"), "kw"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"tch"), "ch"),
+    (re.compile(r"dge"), "j"),
+    (re.compile(r"(?<=[aeiour])ge$"), "je"),
+    (re.compile(r"c(?=[eiy])"), "s"),
+    (re.compile(r"c"), "k"),
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"mb$"), "m"),
+    (re.compile(r"wor(?=[^aeiouy])"), "w3"),
+    (re.compile(r"ear(?=[^aeiouy])"), "3"),
+    (re.compile(r"eer"), "Er"),
+    (re.compile(r"oor"), "or"),
+    (re.compile(r"(?:ir|ur|er)(?=[^aeiouy]|$)"), "3"),
+    (re.compile(r"i(?=nds?$|ld$)"), "I"),                 # kind, mind, wild
+    (re.compile(r"o(?=lds?$|lt$)"), "O"),                 # gold, told, bolt
+    (re.compile(r"all(?=s?$)"), "aul"),                   # ball, call
+    # Long o in own / known / grown and at the end of blow / show, the "ow" of now / down elsewhere
+    (re.compile(r"(?:^|(?<=kn)|(?<=gr)|(?<=sh)|(?<=bl)|(?<=fl)|(?<=thr))own"), "On"),
+    (re.compile(r"(?<![nhwcv])(?<!br)(?<!pl)(?<!al)ow(?=s?$)"), "O"),
+    (re.compile(r"ow(?![aeiouy3])"), "ou"),
+    (re.compile(r"aw(?![aeiouy3])"), "au"),
+    (re.compile(r"ew(?![aeiouy3])"), "U"),
+    (re.compile(r"oo(?!k)"), "U"),                        # moon, but book keeps its own vowel
+]
+
+# Spellings of the same vowel sound
+_NUCLEUS = {"ee": "E", "ea": "E", "ei": "E", "ie": "E", "ai": "A", "ay": "A", "ey": "A",
+            "oa": "O", "oe": "O", "ue": "U", "ui": "U", "ou": "ow", "au": "aw",
+            "oy": "oi", "y": "i"}
+
+# Unstressed endings that rhyme only together with the syllable before them
+_WEAK_FINALS = {"y", "ey", "ie"}
+_STRESSED_EY = ("v", "b")   # convey, survey, obey
+_ONE_SOUND = {"sh", "ch", "th"}
+
+
+def _clean(word: str) -> str:
+    return re.sub(r"[^a-z]", "", word.lower())
+
+
+def _respell(w: str) -> str:
+    if w in SOUNDS:
+        return SOUNDS[w]
+    if w.endswith("s") and w[:-1] in SOUNDS:
+        return SOUNDS[w[:-1]] + "s"
+    return w
+
+
+@lru_cache(maxsize=65536)
+def syllables(word: str) -> Tuple[Tuple[str, str], ...]:
+    """Split a word into (nucleus, coda) pairs spelled as they sound"""
+    w = _respell(_clean(word))
+    for pattern, repl in _SPELLING:
+        w = pattern.sub(repl, w)
+
+    # Silent final e lengthens the previous vowel: time -> (I, m)
+    silent_e = (len(w) > 2 and w[-1] == "e" and w[-2] not in VOWELS and w[-2] != "y"
+                and any(c in VOWELS or c == "y" for c in w[:-2]))
+    if silent_e:
+        w = w[:-1]
+
+    # y is a consonant at the start of a word or before a vowel
+    kinds = []
+    for i, ch in enumerate(w):
+        if ch == "y":
+            vowel = i > 0 and not (i + 1 < len(w) and w[i + 1] in VOWELS)
+        else:
+            vowel = ch in VOWELS
+        kinds.append(vowel)
+
+    parts: List[List[str]] = []
+    i = 0
+    while i < len(w) and not kinds[i]:
+        i += 1
+    while i < len(w):
+        j = i
+        while j < len(w) and kinds[j]:
+            j += 1
+        k = j
+        while k < len(w) and not kinds[k]:
+            k += 1
+        parts.append([w[i:j], w[j:k]])
+        i = k
+
+    if not parts:
+        return ((w, ""),) if w else ()
+    last = parts[-1]
+    weak = (len(parts) > 1 and not last[1] and last[0] in _WEAK_FINALS
+            and not (last[0] == "ey" and parts[-2][1].endswith(_STRESSED_EY)))
+    if weak:
+        last[0] = "y"
+        # An open syllable before the weak ending is long (bony), a doubled consonant keeps it short (funny)
+        before = parts[-2]
+        if before[0] in _LONG and (len(before[1]) == 1 or before[1] in _ONE_SOUND):
+            before[0] = _LONG[before[0]]
+    elif silent_e or (len(parts) == 1 and not last[1]):
+        # time, stone; be, go, my
+        last[0] = _LONG.get(last[0], last[0])
+    elif last[0] == "ie" and not last[1]:
+        last[0] = "I"   # tie, lie (field and piece keep the ee of ie)
+    for n, part in enumerate(parts):
+        if weak and n == len(parts) - 1:
+            continue
+        part[0] = _NUCLEUS.get(part[0], part[0])
+        part[1] = re.sub(r"(.)\1", r"\1", part[1])
+        if part[0] in ("o", "O") and part[1].startswith("r"):
+            part[0] = "O"   # for, more, door, war all share one vowel
+    return tuple((n, c) for n, c in parts)
+
+
+def _stressed(sylls) -> Tuple[Tuple[str, str], ...]:
+    """The rhyming tail: last syllable, plus the one before a weak ending"""
+    if len(sylls) > 1 and sylls[-1] == ("y", ""):
+        return sylls[-2:]
+    return sylls[-1:]
+
+
+def perfect_key(word: str) -> str:
+    return "|".join(n + "." + c for n, c in _stressed(syllables(word)))
+
+
+def slant_key(word: str) -> str:
+    tail = _stressed(syllables(word))
+    return "|".join(n for n, _ in tail)
+
+
+def multi_key(word: str) -> Optional[str]:
+    sylls = syllables(word)
+    if len(sylls) < 2:
+        return None
+    return "|".join(n + "." + c for n, c in sylls[-2:])
+
+
+KEY_FUNCS = {"perfect": perfect_key, "slant": slant_key, "multi": multi_key}
+
+
+# ========== ON-DISK TABLE ==========
+# Header: magic, array count, then (offset, length) of each array. Arrays are
+# u32 offset tables and utf-8 blobs: words, then keys/postings per index.
+MAGIC = b"SFRHYM02"   # bumped whenever the key rules change
+HEADER = struct.Struct("<8sI")
+SPAN = struct.Struct("<QQ")
+INDEXES = ("perfect", "slant", "multi")
+
+
+def _u32(values: Iterable[int]) -> bytes:
+    values = list(values)
+    return struct.pack(f"<{len(values)}I", *values)
+
+
+def _string_table(strings: List[str]) -> Tuple[bytes, bytes]:
+    offsets = [0]
+    blob = bytearray()
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    return _u32(offsets), bytes(blob)
+
+
+def build_table(words: Iterable[str]) -> bytes:
+    """Serialize the lexicon and its three key indexes"""
+    words = sorted({_clean(w) for w in words if _clean(w)})
+    arrays = list(_string_table(words))
+
+    for name in INDEXES:
+        groups: Dict[str, List[int]] = {}
+        for word_id, word in enumerate(words):
+            key = KEY_FUNCS[name](word)
+            if key:
+                groups.setdefault(key, []).append(word_id)
+        keys = sorted(groups)
+        key_offsets, key_blob = _string_table(keys)
+        post_offsets = [0]
+        postings: List[int] = []
+        for key in keys:
+            postings.extend(groups[key])
+            post_offsets.append(len(postings))
+        arrays += [key_offsets, key_blob, _u32(post_offsets), _u32(postings)]
+
+    out = bytearray(HEADER.pack(MAGIC, len(arrays)))
+    offset = len(out) + SPAN.size * len(arrays)
+    spans = bytearray()
+    for array in arrays:
+        spans += SPAN.pack(offset, len(array))
+        offset += len(array)
+    out += spans
+    for array in arrays:
+        out += array
+    return bytes(out)
+
+
+class _Strings:
+    """Sequence view over an offset table + blob, decoded on access (for bisect)"""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+
+class RhymeIndex:
+    """Read-only rhyme lookups over a table in memory or memory-mapped from disk"""
+
+    def __init__(self, data):
+        self._data = data
+        view = memoryview(data)
+        magic, count = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a SunoFLO rhyme table")
+        arrays = []
+        for i in range(count):
+            offset, length = SPAN.unpack_from(view, HEADER.size + i * SPAN.size)
+            arrays.append(view[offset:offset + length])
+
+        u32 = lambda mv: mv.cast("I")  # noqa: E731 - tables are little-endian u32
+        self.words = _Strings(u32(arrays[0]), arrays[1])
+        self._indexes = {}
+        for n, name in enumerate(INDEXES):
+            key_offsets, key_blob, post_offsets, postings = arrays[2 + 4 * n:6 + 4 * n]
+            self._indexes[name] = (_Strings(u32(key_offsets), key_blob), u32(post_offsets), u32(postings))
+
+    @classmethod
+    def load(cls, path: str) -> "RhymeIndex":
+        """Memory-map a table written by write()"""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> "RhymeIndex":
+        return cls(build_table(words))
+
+    @staticmethod
+    def write(path: str, words: Iterable[str]):
+        with open(path, "wb") as f:
+            f.write(build_table(words))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: str) -> bool:
+        w = _clean(word)
+        i = bisect.bisect_left(self.words, w)
+        return i < len(self.words) and self.words[i] == w
+
+    def _lookup(self, name: str, key: Optional[str]) -> List[str]:
+        if not key:
+            return []
+        keys, post_offsets, postings = self._indexes[name]
+        i = bisect.bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return []
+        return [self.words[w] for w in postings[post_offsets[i]:post_offsets[i + 1]]]
+
+    def rhymes(self, word: str) -> List[str]:
+        """Perfect rhymes of word (the word itself excluded)"""
+        w = _clean(word)
+        return [r for r in self._lookup("perfect", perfect_key(w)) if r != w]
+
+    def slant(self, word: str) -> List[str]:
+        """Same vowel sound, different ending"""
+        w = _clean(word)
+        perfect = perfect_key(w)
+        return [r for r in self._lookup("slant", slant_key(w)) if r != w and perfect_key(r) != perfect]
+
+    def multi(self, word: str) -> List[str]:
+        """Words sharing the last two syllables"""
+        w = _clean(word)
+        return [r for r in self._lookup("multi", multi_key(w)) if r != w]
+
+    def rhyme_set(self, word: str, minimum: int = 4) -> List[str]:
+        """word, its perfect rhymes, and slant rhymes if there are fewer than minimum"""
+        words = [_clean(word)] + self.rhymes(word)
+        if len(words) < minimum:
+            words += self.slant(word)
+        return words
+
+
+_default: Optional[RhymeIndex] = None
+RHYME_INDEX_ENV = "SUNOFLO_RHYME_INDEX"
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "presets", "rhymes.idx")
+
+
+def default_index() -> RhymeIndex:
+    """Index from $SUNOFLO_RHYME_INDEX, else the shipped table, else built from LEXICON"""
+    global _default
+    if _default is None:
+        path = os.environ.get(RHYME_INDEX_ENV) or DEFAULT_PATH
+        if os.path.exists(path):
+            _default = RhymeIndex.load(path)
+        else:
+            _default = RhymeIndex.from_words(LEXICON)
+    return _default
+
+
+# ========== CLI ==========
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) >= 1 and argv[0] == "build":
+        out, sources = argv[1], argv[2:]
+        words = list(LEXICON)
+        for source in sources:
+            with open(source, encoding="utf-8") as f:
+                words.extend(line.split()[0] for line in f if line.strip())
+        RhymeIndex.write(out, words)
+        print(f"✓ {len(RhymeIndex.load(out)):,} words -> {out}")
+    elif len(argv) >= 3 and argv[0] == "query":
+        index = RhymeIndex.load(argv[1])
+        for word in argv[2:]:
+            print(f"{word}: rhymes={index.rhymes(word)[:20]} slant={index.slant(word)[:10]} "
+                  f"multi={index.multi(word)[:10]}")
+    else:
+        print("Usage: rhymes.py build OUT.idx [wordlist.txt ...] | query TABLE.idx WORD ...")
+
+
+if __name__ == "__main__":
+    main()
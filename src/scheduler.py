@@ -0,0 +1,232 @@
+"""
+SunoFLO - Scheduler
+Long-running, in-process replacement for the auto-generate.sh / run-7hours.sh loops
+
+    python src/scheduler.py --every 1h --batch-size 2 --max-runs 7
+    python src/scheduler.py --cron "0 9-17 * * 1-5" --jitter 120
+
+One warm process fires on an interval or a 5-field cron schedule, with
+optional random jitter. Runs never overlap: a run that overruns its slot
+pushes the schedule forward, and the slots it missed are skipped (and
+counted) instead of piling up.
+"""
+
+import os
+import time
+import random
+import argparse
+import datetime
+from typing import List, Optional, Set
+
+from sunoflo_batch import BatchJob, ENGINES, run_batch
+from seeding import derive_seed, new_seed
+from styles import REGISTRY
+
+# The STYLES array from the original shell scripts
+DEFAULT_STYLES = ["Metro Boomin", "Southside", "Wheezy", "Nick Mira", "Pi'erre Bourne",
+                  "Armin van Buuren", "Dash Berlin", "Pink Floyd", "The Weeknd", "Kendrick Lamar"]
+
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+# ========== SCHEDULES ==========
+class IntervalSchedule:
+    """Fire every `seconds`, aligned to the start time"""
+
+    def __init__(self, seconds: float, start: Optional[float] = None):
+        if seconds <= 0:
+            raise ValueError("interval must be positive")
+        self.seconds = seconds
+        self.start = time.time() if start is None else start
+
+    def next_after(self, t: float) -> float:
+        if t < self.start:
+            return self.start
+        slots = int((t - self.start) // self.seconds) + 1
+        return self.start + slots * self.seconds
+
+    def __str__(self):
+        return f"every {self.seconds:g}s"
+
+
+def _cron_field(spec: str, low: int, high: int) -> Set[int]:
+    """One cron field: *, */n, a, a-b, a-b/n and comma lists"""
+    values = set()
+    for part in spec.split(","):
+        body, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            start, end = (int(v) for v in body.split("-", 1))
+        else:
+            start = end = int(body)
+            if step > 1:
+                end = high
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron field {spec!r} out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Standard 5-field cron: minute hour day-of-month month day-of-week (0 = Sunday)"""
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        self.minutes = _cron_field(fields[0], 0, 59)
+        self.hours = _cron_field(fields[1], 0, 23)
+        self.days = _cron_field(fields[2], 1, 31)
+        self.months = _cron_field(fields[3], 1, 12)
+        self.weekdays = {d % 7 for d in _cron_field(fields[4], 0, 7)}
+        # Cron semantics: if both day fields are restricted, either may match
+        self.either_day = fields[2] != "*" and fields[4] != "*"
+
+    def _day_matches(self, dt: datetime.datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        return (dom or dow) if self.either_day else (dom and dow)
+
+    def next_after(self, t: float) -> float:
+        dt = datetime.datetime.fromtimestamp(t).replace(second=0, microsecond=0)
+        dt += datetime.timedelta(minutes=1)
+        limit = dt + datetime.timedelta(days=366 * 4)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + datetime.timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + datetime.timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1)
+                continue
+            return dt.timestamp()
+        raise ValueError(f"cron expression never fires: {self.expr!r}")
+
+    def __str__(self):
+        return f"cron '{self.expr}'"
+
+
+def parse_interval(spec: str) -> float:
+    """'3600', '90s', '30m', '1h', '1d'"""
+    spec = spec.strip().lower()
+    if spec[-1:] in UNITS:
+        return float(spec[:-1]) * UNITS[spec[-1]]
+    return float(spec)
+
+
+# ========== SCHEDULER ==========
+class Scheduler:
+    """Runs one batch per tick in this process; never overlaps runs"""
+
+    def __init__(self, schedule, styles: List[str], batch_size: int = 1, engine: str = "generator",
+                 output_dir: str = "~/Downloads/sunoflo-auto", jitter: float = 0.0,
+                 workers: int = 1, seed: Optional[int] = None, cache_dir: Optional[str] = None,
+                 include_lyrics: bool = True, advanced: bool = True):
+        self.schedule = schedule
+        self.styles = styles
+        self.batch_size = batch_size
+        self.engine = engine
+        self.output_dir = output_dir
+        self.jitter = jitter
+        self.workers = workers
+        self.seed = new_seed() if seed is None else seed
+        self.cache_dir = cache_dir
+        self.include_lyrics = include_lyrics
+        self.advanced = advanced
+        self.rng = random.Random(self.seed)
+        self.runs = 0
+        self.skipped = 0
+
+    def jobs(self) -> List[BatchJob]:
+        """batch_size random styles, each with its own registry genre"""
+        jobs = []
+        for _ in range(self.batch_size):
+            style = self.rng.choice(self.styles)
+            genre = REGISTRY.resolve(style)["genre"]
+            jobs.append(BatchJob(self.engine, genre, style, include_lyrics=self.include_lyrics,
+                                 advanced=self.advanced))
+        return jobs
+
+    def tick(self, fired_at: float) -> dict:
+        stamp = datetime.datetime.fromtimestamp(fired_at).strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(os.path.expanduser(self.output_dir), stamp)
+        jobs = self.jobs()
+        print(f"========== Run {self.runs + 1} - {stamp}: {', '.join(j.style for j in jobs)}")
+        report = run_batch(jobs, out, workers=self.workers, seed=derive_seed(self.seed, self.runs),
+                           cache_dir=self.cache_dir)
+        self.runs += 1
+        print(f"✓ {report['projects']} project(s) in {report['seconds']:.2f}s → {out}")
+        return report
+
+    def run(self, max_runs: Optional[int] = None, now: bool = False):
+        """Loop until max_runs ticks have fired (forever when None)"""
+        due = time.time() if now else self.schedule.next_after(time.time())
+        while max_runs is None or self.runs < max_runs:
+            fire_at = due + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            delay = fire_at - time.time()
+            if delay > 0:
+                print(f"Next run at {datetime.datetime.fromtimestamp(fire_at):%Y-%m-%d %H:%M:%S}")
+                time.sleep(delay)
+            self.tick(fire_at)
+
+            # Backpressure: skip every slot that passed while this run was going
+            finished = time.time()
+            due = self.schedule.next_after(due)
+            missed = 0
+            while due <= finished:
+                due = self.schedule.next_after(due)
+                missed += 1
+            if missed:
+                self.skipped += missed
+                print(f"⚠ Run overran its slot, skipped {missed} tick(s)")
+        print(f"Done: {self.runs} run(s), {self.skipped} skipped tick(s), seed {self.seed}")
+
+
+# ========== CLI ==========
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="SunoFLO in-process scheduler")
+    when = parser.add_mutually_exclusive_group()
+    when.add_argument("--every", default="1h", help="Interval, e.g. 3600, 30m, 1h (default 1h)")
+    when.add_argument("--cron", help="5-field cron expression, e.g. '0 * * * *'")
+    parser.add_argument("--jitter", type=parse_interval, default=0.0, help="Random delay added to each tick")
+    parser.add_argument("--batch-size", type=int, default=1, help="Projects per tick")
+    parser.add_argument("--max-runs", type=int, help="Stop after this many ticks (default: forever)")
+    parser.add_argument("--now", action="store_true", help="Fire the first tick immediately")
+    parser.add_argument("--styles", nargs="+", default=DEFAULT_STYLES,
+                        help="Styles to pick from at random ('all' = the whole registry)")
+    parser.add_argument("--engine", default="generator", choices=ENGINES)
+    parser.add_argument("--no-lyrics", action="store_true")
+    parser.add_argument("--basic", action="store_true", help="Basic instead of advanced lyrics")
+    parser.add_argument("--workers", type=int, default=1, help="Pool size per tick (1 = run inline, stays warm)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", default="~/Downloads/sunoflo-auto")
+    parser.add_argument("--cache-dir")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    schedule = CronSchedule(args.cron) if args.cron else IntervalSchedule(parse_interval(args.every))
+    styles = list(REGISTRY) if args.styles == ["all"] else args.styles
+
+    scheduler = Scheduler(schedule, styles, args.batch_size, args.engine, args.output, args.jitter,
+                          args.workers, args.seed, args.cache_dir,
+                          include_lyrics=not args.no_lyrics, advanced=not args.basic)
+    print(f"SunoFLO scheduler: {schedule}, {args.batch_size} project(s) per tick, "
+          f"{len(styles)} style(s), seed {scheduler.seed}")
+    try:
+        scheduler.run(args.max_runs, args.now)
+    except KeyboardInterrupt:
+        print(f"\nStopped after {scheduler.runs} run(s)")
+
+
+if __name__ == "__main__":
+    main()
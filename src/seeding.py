@@ -0,0 +1,45 @@
+"""
+SunoFLO - Seeding
+Per-generator random streams so every track can be regenerated exactly
+"""
+
+import random
+import hashlib
+import secrets
+from typing import Optional, Tuple, Union
+
+SEED_BITS = 63
+
+SeedLike = Union[None, int, random.Random, "numpy.random.Generator"]  # noqa: F821
+
+
+def new_seed() -> int:
+    return secrets.randbits(SEED_BITS)
+
+
+def make_rng(seed: SeedLike = None) -> Tuple[random.Random, Optional[int]]:
+    """Turn a seed, random.Random or NumPy Generator into (rng, recorded seed)
+
+    A random.Random passed in is used as-is and has no recordable seed (None).
+    Everything else resolves to an integer seed that reproduces the stream.
+    """
+    if isinstance(seed, random.Random):
+        return seed, None
+    if hasattr(seed, "bit_generator"):
+        seed = int(seed.integers(0, 1 << SEED_BITS))
+    elif seed is None:
+        seed = new_seed()
+    return random.Random(seed), int(seed)
+
+
+def derive_seed(base_seed: int, *keys) -> int:
+    """Stable child seed for a job, independent of other jobs and of process layout"""
+    material = ":".join(str(part) for part in (base_seed,) + keys).encode("utf-8")
+    digest = hashlib.blake2b(material, digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> (64 - SEED_BITS)
+
+
+def numpy_rng(seed: Optional[int]):
+    """NumPy Generator for the same seed (for pattern humanizing)"""
+    import numpy as np
+    return np.random.default_rng(seed)
@@ -0,0 +1,325 @@
+"""
+SunoFLO - Generation Service
+Long-running asyncio HTTP/1.1 service over the three generators
+
+Endpoints (POST bodies and responses are JSON):
+  GET  /health    pool, concurrency and queue status
+  POST /lyrics    {"genre", "advanced", "topic", "mood", "seed"}
+  POST /midi      {"genre", "style", "seed"} -> base64 .mid
+  POST /prompt    {"artist", "theme", "structure", "seed"} -> lyrics + Suno prompt
+  POST /project   batch job fields ({"engine", "style", "count", ...}); count > 1
+                  (up to --max-count) streams one NDJSON line per project as it
+                  finishes. Each request writes under its own <output>/<seed>/
+
+CPU-bound work runs in a process pool. At most --concurrency requests run at
+once, up to --queue-depth more wait, and anything beyond that gets a 503. A
+multi-project request is admitted for all of its projects at once.
+"""
+
+import os
+import json
+import base64
+import asyncio
+import argparse
+import tempfile
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from sunoflo_batch import BatchJob, iter_tasks, run_task
+from seeding import new_seed
+from cache import DEFAULT_MAX_BYTES
+
+MAX_BODY = 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# ========== WORKERS (run in the pool) ==========
+def make_lyrics(params: Dict) -> Dict:
+    from sunoflo import LyricGenerator
+    gen = LyricGenerator(params.get("genre", "Trap"), params.get("advanced", False),
+                         seed=params.get("seed"), meter=params.get("meter", True))
+    return gen.generate(params.get("topic", "flex"), params.get("mood", "aggressive"))
+
+
+def make_midi(params: Dict) -> Dict:
+    from sunoflo_complete import SunoFLO
+    flo = SunoFLO(params.get("genre", "Trap"), params.get("style", "Metro Boomin"),
+                  seed=params.get("seed"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "track.mid")
+        flo.generate_midi(path)
+        with open(path, "rb") as f:
+            data = f.read()
+    return {"style": flo.style, "bpm": flo.bpm, "key": flo.key, "seed": flo.seed,
+            "bytes": len(data), "midi": base64.b64encode(data).decode("ascii")}
+
+
+def make_prompt(params: Dict) -> Dict:
+    from sunoflo_ultimate import SunoFLO_Ultimate
+    flo = SunoFLO_Ultimate(params.get("artist", "Metro Boomin"), params.get("theme", "flex"),
+                           params.get("structure", "trap"), seed=params.get("seed"),
+                           markov=params.get("markov", False))
+    project = flo.generate_project()
+    project.pop("style")
+    return project
+
+
+WORKERS = {"/lyrics": make_lyrics, "/midi": make_midi, "/prompt": make_prompt}
+
+
+# ========== SERVICE ==========
+class GenerationService:
+    """Admission control in front of a process pool"""
+
+    def __init__(self, workers: Optional[int] = None, concurrency: int = 8, queue_depth: int = 64,
+                 output_dir: str = "~/Downloads/sunoflo-server", cache_dir: Optional[str] = None,
+                 cache_max_bytes: int = DEFAULT_MAX_BYTES, max_count: int = 32):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.output_dir = output_dir
+        self.max_count = max_count
+        self.project_worker = functools.partial(run_task, cache_dir=cache_dir,
+                                                cache_max_bytes=cache_max_bytes)
+        self._slots = asyncio.Semaphore(concurrency)
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+
+    def admit(self, n: int = 1):
+        """Reserve n places in the queue, or refuse them all if the queue would overflow"""
+        if self.running + self.waiting + n > self.concurrency + self.queue_depth:
+            self.rejected += 1
+            raise HTTPError(503, "queue full")
+        self.waiting += n
+
+    async def submit(self, fn, *args):
+        """Run fn(*args) in the pool once a concurrency slot is free (admit() it first)
+
+        The slot is given back when the pool work finishes, not when the caller
+        stops waiting: a client that disconnects cancels its wait, but a task
+        already running in a worker keeps the slot until it is done.
+        """
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.pool.submit(fn, *args)
+        except BaseException:
+            self._finished()
+            raise
+        future.add_done_callback(lambda _: self._call_soon(loop, self._finished))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _call_soon(loop: asyncio.AbstractEventLoop, callback):
+        """Done-callbacks run on the pool's thread; hand them back to the loop"""
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:    # loop already closed at shutdown
+            pass
+
+    def _finished(self):
+        self.running -= 1
+        self.served += 1
+        self._slots.release()
+
+    def health(self) -> Dict:
+        return {"status": "ok", "workers": self.workers, "concurrency": self.concurrency,
+                "queue_depth": self.queue_depth, "running": self.running,
+                "waiting": self.waiting, "served": self.served, "rejected": self.rejected}
+
+    def project_tasks(self, params: Dict):
+        fields = set(BatchJob.__dataclass_fields__)
+        unknown = set(params) - fields
+        if unknown:
+            raise HTTPError(400, f"unknown field(s): {', '.join(sorted(unknown))}")
+        job = BatchJob(**params)
+        if not 1 <= job.count <= self.max_count:
+            raise HTTPError(400, f"count must be 1-{self.max_count}")
+        # Task indices restart at 0 per request, so each request gets its own directory
+        seed = new_seed()
+        return list(iter_tasks([job], os.path.join(self.output_dir, str(seed)), seed))
+
+    def close(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ========== HTTP ==========
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+    """Parse one request; None when the client closed the connection"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "bad request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY:
+        raise HTTPError(413, "body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+
+def head(status: int, content_type: str, extra: str = "") -> bytes:
+    return (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n{extra}\r\n").encode("latin-1")
+
+
+async def send_json(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool = True):
+    body = json.dumps(payload).encode("utf-8")
+    extra = f"Content-Length: {len(body)}\r\n"
+    if not keep_alive:
+        extra += "Connection: close\r\n"
+    writer.write(head(status, "application/json", extra) + body)
+    await writer.drain()
+
+
+async def stream_projects(service: GenerationService, writer: asyncio.StreamWriter, tasks):
+    """Chunked NDJSON: one line per project, in completion order"""
+    # Scheduled before anything can raise, so every admitted task starts and gives its place back
+    futures = [asyncio.ensure_future(service.submit(service.project_worker, *task)) for task in tasks]
+    writer.write(head(200, "application/x-ndjson", "Transfer-Encoding: chunked\r\n"))
+    try:
+        for future in asyncio.as_completed(futures):
+            try:
+                line = json.dumps(await future)
+            except Exception as e:
+                line = json.dumps({"error": str(e)})
+            data = (line + "\n").encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            await writer.drain()
+    finally:
+        for future in futures:
+            future.cancel()
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def dispatch(service: GenerationService, writer: asyncio.StreamWriter,
+                   method: str, path: str, body: bytes):
+    if path == "/health":
+        await send_json(writer, 200, service.health())
+        return
+    if path not in WORKERS and path != "/project":
+        raise HTTPError(404, f"no route for {path}")
+    if method != "POST":
+        raise HTTPError(405, "use POST")
+    try:
+        params = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "body is not valid JSON")
+    if not isinstance(params, dict):
+        raise HTTPError(400, "body must be a JSON object")
+
+    if path == "/project":
+        tasks = service.project_tasks(params)
+        if len(tasks) > 1:
+            service.admit(len(tasks))
+            await stream_projects(service, writer, tasks)
+            return
+        worker, args = service.project_worker, tasks[0]
+    else:
+        worker, args = WORKERS[path], (params,)
+
+    service.admit()
+    await send_json(writer, 200, await service.submit(worker, *args))
+
+
+async def handle(service: GenerationService, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter):
+    """Serve requests on one keep-alive connection"""
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                await dispatch(service, writer, method, path, body)
+            except HTTPError as e:
+                await send_json(writer, e.status, {"error": str(e)}, keep_alive=e.status < 500)
+                if e.status >= 500:
+                    break
+                continue
+            except (ValueError, TypeError) as e:
+                await send_json(writer, 400, {"error": str(e)})
+                continue
+            except Exception as e:
+                await send_json(writer, 500, {"error": str(e)}, keep_alive=False)
+                break
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, service: GenerationService):
+    server = await asyncio.start_server(functools.partial(handle, service), host, port)
+    print(f"SunoFLO service on http://{host}:{port} "
+          f"({service.workers} workers, concurrency {service.concurrency}, "
+          f"queue {service.queue_depth})")
+    async with server:
+        await server.serve_forever()
+
+
+# ========== CLI ==========
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="SunoFLO generation service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Process pool size")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests generating at once")
+    parser.add_argument("--queue-depth", type=int, default=64, help="Requests allowed to wait (503 beyond)")
+    parser.add_argument("--output", default="~/Downloads/sunoflo-server", help="Where /project writes")
+    parser.add_argument("--max-count", type=int, default=32, help="Most projects one /project request may ask for")
+    parser.add_argument("--cache-dir", help="Reuse identical /project outputs from this cache")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    async def run():
+        service = GenerationService(args.workers, args.concurrency, args.queue_depth, args.output,
+                                    args.cache_dir, args.cache_max_mb * 1024 * 1024,
+                                    args.max_count)
+        try:
+            await serve(args.host, args.port, service)
+        finally:
+            service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nStopped")
+
+
+if __name__ == "__main__":
+    main()
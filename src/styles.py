@@ -0,0 +1,114 @@
+"""
+SunoFLO - Style Registry
+One lazily loaded table of producer/artist presets, indexed by genre,
+BPM, key, mode and mood, shared by every generator
+"""
+
+import os
+import json
+import bisect
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "presets", "styles.json")
+STYLES_ENV = "SUNOFLO_STYLES"
+DEFAULT_STYLE = "Metro Boomin"
+
+
+class StyleRegistry(Mapping):
+    """Read-only mapping of style name -> preset dict, loaded on first access"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._presets: Optional[Dict[str, Dict]] = None
+
+    # ---------- loading ----------
+    def _load(self) -> Dict[str, Dict]:
+        if self._presets is not None:
+            return self._presets
+        path = self.path or os.environ.get(STYLES_ENV) or DEFAULT_PATH
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+
+        presets: Dict[str, Dict] = {}
+        by_genre: Dict[str, List[str]] = {}
+        by_key: Dict[str, List[str]] = {}
+        by_mode: Dict[str, List[str]] = {}
+        by_mood: Dict[str, List[str]] = {}
+        for entry in entries:
+            name = entry.pop("name")
+            presets[name] = entry
+            by_genre.setdefault(entry["genre"].lower(), []).append(name)
+            by_key.setdefault(entry["key"].lower(), []).append(name)
+            by_mode.setdefault(entry["key"].split()[-1].lower(), []).append(name)
+            by_mood.setdefault(entry.get("mood", "").lower(), []).append(name)
+
+        by_bpm = sorted((entry["bpm"], name) for name, entry in presets.items())
+        self._by_genre, self._by_key, self._by_mode, self._by_mood = by_genre, by_key, by_mode, by_mood
+        self._bpm_values = [bpm for bpm, _ in by_bpm]
+        self._bpm_names = [name for _, name in by_bpm]
+        self._presets = presets
+        return presets
+
+    # ---------- Mapping ----------
+    def __getitem__(self, name: str) -> Dict:
+        return self._load()[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._load())
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def resolve(self, name: str, default: str = DEFAULT_STYLE) -> Dict:
+        """Preset for name, falling back to the default style"""
+        presets = self._load()
+        return presets.get(name) or presets[default]
+
+    # ---------- indexes ----------
+    def genres(self) -> List[str]:
+        """Genres in table order"""
+        self._load()
+        return [self._presets[names[0]]["genre"] for names in self._by_genre.values()]
+
+    def by_genre(self, genre: str) -> List[str]:
+        self._load()
+        return list(self._by_genre.get(genre.lower(), []))
+
+    def by_bpm(self, low: float, high: float) -> List[str]:
+        """Styles with low <= bpm <= high, in BPM order"""
+        self._load()
+        lo = bisect.bisect_left(self._bpm_values, low)
+        hi = bisect.bisect_right(self._bpm_values, high)
+        return self._bpm_names[lo:hi]
+
+    def query(self, genre: Optional[str] = None, bpm: Optional[Tuple[float, float]] = None,
+              key: Optional[str] = None, mode: Optional[str] = None,
+              mood: Optional[str] = None) -> List[str]:
+        """Intersect the indexes, e.g. query(genre="Trance", bpm=(138, 142), mode="minor")"""
+        self._load()
+        candidates = []
+        if genre:
+            candidates.append(self._by_genre.get(genre.lower(), []))
+        if key:
+            candidates.append(self._by_key.get(key.lower(), []))
+        if mode:
+            candidates.append(self._by_mode.get(mode.lower(), []))
+        if mood:
+            candidates.append(self._by_mood.get(mood.lower(), []))
+        if bpm:
+            candidates.append(self.by_bpm(*bpm))
+        if not candidates:
+            return list(self._presets)
+
+        candidates.sort(key=len)
+        result = candidates[0]
+        for other in candidates[1:]:
+            if not result:
+                break
+            keep = set(other)
+            result = [name for name in result if name in keep]
+        return list(result)
+
+
+REGISTRY = StyleRegistry()
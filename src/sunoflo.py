@@ -5,49 +5,20 @@ Now with Advanced Lyric Generation (Better Rhymes, No Cliches)
 """
 
 import os
-import struct
-import json
 import random
-import re
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+import json
+from typing import List, Dict, Iterator, Optional, Tuple
+from functools import lru_cache
 
-# ========== ANTI-CLICHE WORDS (Common AI Lyrics to Avoid) ==========
-CLICHE_WORDS = [
-    "universe", "galaxy", "stars", "shine", "glow", "dream", "fantasy", "paradise",
-    "heaven", "angel", "wings", "fly", "soar", "sky", "beyond", "infinity",
-    "forever", "neverending", "timeless", "eternal", "magic", "miracle",
-    "heartbeat", "heartbeat", "soul", "spirit", "electric", "neon", "vibes",
-    "going crazy", "lose control", "feel the beat", "dance all night", "party"
-]
+from cliches import avoid_cliches
+from seeding import make_rng
+from cache import cache_key
+from rhymes import default_index
+from syllables import fit_line
+from styles import REGISTRY
+from metrics import NULL_METRICS
 
-# ========== BETTER ALTERNATIVES FOR CLICHES ==========
-BETTER_ALTERNATIVES = {
-    "universe": ["block", "hood", "streets", "city", "world"],
-    "galaxy": ["streets", "blocks", "city", "trap"],
-    "stars": ["guap", "bands", "racks", "cash"],
-    "shine": ["grind", "hustle", "ball", "eat"],
-    "glow": ["flex", "show", "stack"],
-    "dream": ["scheme", "goal", "bag", "check"],
-    "fantasy": ["real life", "real trap", "hustle"],
-    "paradise": ["my house", "the trap", "my block"],
-    "heaven": ["trap house", "studio", "on stage"],
-    "angel": ["shorty", "queen", "boss"],
-    "wings": ["racks", "bands", "guap"],
-    "fly": ["rich", "ball", "flex"],
-    "soar": ["stack", "hustle", "grind"],
-    "sky": ["roof", "top", "ceiling"],
-    "beyond": ["past", "after", "above"],
-    "infinite": ["non-stop", "all day"],
-    "forever": ["till the grave", "till death", "day by day"],
-    "neverending": ["every day", "24/7", "all year"],
-    "magic": ["real", "硬刚", "true"],
-    "miracle": ["blessing", "come up", "win"],
-    "heartbeat": ["pulse", "rhythm"],
-    "electric": ["hard", "real", "trap"],
-    "neon": ["diamonds", "racks", "chains"],
-    "vibes": ["energy", "aura", "motion"],
-}
+VERSION = "2.3.0"   # part of every cache key: bump whenever generated output changes
 
 # ========== GENRE & STYLE PRESETS ==========
 GENRES = [
@@ -56,32 +27,8 @@ GENRES = [
     "Progressive House", "EDM", "Lo-Fi", "Synthwave", "Country", "Jazz"
 ]
 
-STYLE_PRESETS = {
-    # TRAP & HIP HOP
-    "Metro Boomin": {"bpm": 140, "key": "C minor", "genre": "Trap", "desc": "Dark 808s, bell melodies, half-time"},
-    "Southside": {"bpm": 140, "key": "G minor", "genre": "Trap", "desc": "Heavy 808 slides, crispy hi-hats"},
-    "Wheezy": {"bpm": 146, "key": "D minor", "genre": "Trap", "desc": "Guitar/flute melodies, spacey"},
-    "Nick Mira": {"bpm": 130, "key": "A minor", "genre": "Trap", "desc": "Emo/melodic, layered pianos"},
-    "Pi'erre Bourne": {"bpm": 146, "key": "E minor", "genre": "Trap", "desc": "Bouncy drums, harp leads"},
-    "Travis Scott": {"bpm": 140, "key": "C minor", "genre": "Trap", "desc": "Auto-tune, ethereal, heavy reverb"},
-    "Kendrick Lamar": {"bpm": 120, "key": "D minor", "genre": "Hip Hop", "desc": "Conscious, storytelling, poetic"},
-    "J Cole": {"bpm": 90, "key": "G minor", "genre": "Hip Hop", "desc": "Thoughtful, melodic, introspective"},
-    
-    # TRANCE
-    "Armin van Buuren": {"bpm": 138, "key": "A minor", "genre": "Trance", "desc": "Uplifting, big drops, soaring synths"},
-    "Tiesto": {"bpm": 136, "key": "G minor", "genre": "Trance", "desc": "EDM-Trance hybrid, big room"},
-    "Dash Berlin": {"bpm": 138, "key": "C minor", "genre": "Trance", "desc": "Emotional, melodic, big chords"},
-    
-    # ROCK
-    "Pink Floyd": {"bpm": 120, "key": "G minor", "genre": "Rock", "desc": "Psychedelic, space rock, epic solos"},
-    "Queen": {"bpm": 120, "key": "B minor", "genre": "Rock", "desc": "Rock anthems, operatic"},
-    "Metallica": {"bpm": 130, "key": "E minor", "genre": "Rock", "desc": "Heavy metal, thrash"},
-    
-    # R&B & POP
-    "The Weeknd": {"bpm": 120, "key": "E minor", "genre": "R&B", "desc": "Dark R&B, atmospheric, haunting"},
-    "Drake": {"bpm": 85, "key": "D minor", "genre": "R&B", "desc": "Melodic rap, emotional, Toronto sound"},
-    "SZA": {"bpm": 95, "key": "C minor", "genre": "R&B", "desc": "Alternative R&B, introspective"},
-}
+# Every style resolves through the shared registry (presets/styles.json)
+STYLE_PRESETS = REGISTRY
 
 # ========== LYRIC STRUCTURES ==========
 VERSE_STRUCTURES = {
@@ -107,33 +54,77 @@ VERSE_STRUCTURES = {
     }
 }
 
-# ========== RHYME DICTIONARY ==========
-RHYMES = {
-    "a": ["back", "rack", "stack", "cat", "flat", "hat", "bat", "that", "sat", "chat", "stat", "cash", "dash", "lash", "trap", "gap", "splash", "scratch"],
-    "b": ["love", "above", "shove", "dove", "of", "stuff", "enough", "touch", "clutch", "much", "such", "rush", "hush", "lust", "dust"],
-    "c": ["time", "mine", "fine", "wine", "shine", "sign", "line", "divine", "combine", "design", "tonight", "alright", "light", "fight", "might", "right"],
-    "d": ["man", "plan", "clan", "can", "fan", "scan", "tan", "ran", "began", "stand", "hand", "land", "sand", "band", "brand"],
-    "e": ["world", "girl", "curl", "pearl", "twirl", "swirl", "hurl", "stir", "prefer", "occur", "blur", "fur", "sure", "pure", "cure", "secure"],
-    "f": ["day", "way", "play", "say", "may", "lay", "ray", "stay", "away", "today", "okay", "display", "betray", "convey", "survey", "array"],
-    "g": ["real", "feel", "steal", "deal", "wheel", "heal", "reveal", "appeal", "conceal", "surreal", "ideal", "deal", "meal", "seal"],
-    "h": ["thing", "bring", "sing", "ring", "king", "wing", "spring", "string", "swing", "cling", "fling", "sting", "bling", "everything", "anything", "something"],
-    "i": ["money", "honey", "funny", "unny", "sunny", "bunny", "runny", "phony", " bony", "croney"],
-    "j": ["life", "wife", "strife", "knife", "rife", "midnight", "daylight", "sunlight", "insight", "delight", "tight", "flight", "bite", "height", "fright", "ignite"],
-    "k": ["cash", "dash", "flash", "smash", "clash", "trash", "hash", "bash", "lash", "gash", "splash", "crash", "gnash", "stash", "ransom"],
-    "l": ["trap", "rap", "clap", "snap", "tap", "map", "gap", "sap", "chap", "flap", "slap", "wrap", "scrap", "strap", "entrap", "adapt"],
-    "m": ["see", "be", "free", "me", "key", "glee", "plea", "flee", "degree", "guarantee", "priority", "ability", "reality", "personality"],
-    "n": ["stone", "bone", "phone", "zone", "alone", "throne", "own", "grown", "shown", "blown", "known", "tone", "moan", "groan", "atone", "postpone"],
-    "o": ["turn", "burn", "learn", "earn", "yearn", "spurn", "cern", "concern", "discern", "sojourn", "journey"],
-    "p": ["beat", "street", "meet", "feet", "heat", "treat", "sweet", "seat", "elite", "complete", "concrete", "discrete", "obsolete", "concrete"],
+# Section order per mode
+BASIC_SECTIONS = ["hook", "verse1", "verse2"]
+ADVANCED_SECTIONS = ["intro", "hook", "verse1", "verse2", "outro"]
+
+# ========== RHYME ANCHORS ==========
+# Each verse couplet rhymes on one of these; the rhyme index supplies the rest
+RHYME_ANCHORS = [
+    "back", "love", "time", "man", "world", "day", "real", "thing",
+    "money", "life", "cash", "trap", "see", "stone", "turn", "beat",
+]
+
+# ========== METERED LINES ==========
+# Verse lines ending on the rhyme word, from 1 to 10 syllables before it, so
+# any VERSE_STRUCTURES target is in reach once lead-in ad-libs pad the rest
+METER_LINES = {
+    "money": [
+        "Stackin' {w}", "Countin' up the {w}", "Bankroll lookin' {w}",
+        "Got the whole bank on {w}", "I been stackin', got my {w}",
+        "Every night I'm countin' {w}", "Money talk and now it's {w}",
+        "Bank account lookin' heavy, all {w}", "They don't understand the grind, I'm {w}",
+        "Count it twice and put it up, it's {w}", "Got my money right, the bank is {w}",
+        "They don't understand the grind, but I'm {w}",
+    ],
+    "love": [
+        "Feelin' {w}", "Shorty keep it {w}", "All this love is {w}",
+        "Been through pain, now it's {w}", "Shorty got me feelin' {w}",
+        "Every day with you is {w}", "Been through the pain, now we good, {w}",
+        "Shorty got me feelin' good, she {w}", "All this love is real, you keep it {w}",
+        "Been through the pain but now I'm good, so {w}", "Shorty got me feelin' some type of way, {w}",
+    ],
+    "struggle": [
+        "Still {w}", "From the bottom, {w}", "Came up from the {w}",
+        "Came from the bottom, still {w}", "Where the struggle real, I'm {w}",
+        "Nobody believed, now it's {w}", "Where the struggle real, we still {w}",
+        "Came up from the bottom, now I'm {w}", "Nobody believed in me, now I'm {w}",
+        "They didn't believe in me, now look, {w}",
+        "Came from the bottom where the struggle real, {w}",
+    ],
+    "flex": [
+        "Flexin' {w}", "Real ones stay {w}", "Got my wrist on {w}",
+        "I been flexin' hard, {w}", "Fake ones go, real ones {w}",
+        "Got my chain up, got my {w}", "Real ones stay, fake ones go, {w}",
+        "Got my chain up, got my wrist up, {w}", "Real ones stay and fake ones go, I'm {w}",
+        "I been flexin' hard and never {w}",
+        "I been flexin' hard, never showin' off, {w}",
+    ],
 }
+FILLERS = ["Yeah, ", "Uh, ", "Look, ", "Man, ", "Ayy, ", "Real talk, ", "On God, ",
+           "No cap, ", "Straight up, ", "You know, "]
+
+
+@lru_cache(maxsize=None)
+def _rhyme_words(anchor: str) -> List[str]:
+    """Rhyme sets per anchor, looked up once rather than per line"""
+    return default_index().rhyme_set(anchor)
+
 
 # ========== LYRIC GENERATOR ==========
 class LyricGenerator:
     """Generate high-quality, non-cliche lyrics"""
     
-    def __init__(self, genre: str = "Trap", advanced: bool = False):
+    def __init__(self, genre: str = "Trap", advanced: bool = False, seed=None, metrics=None,
+                 meter: bool = True):
         self.genre = genre
         self.advanced = advanced
+        self.meter = meter
+        self.rng, self.seed = make_rng(seed)
+        # Own stream for cliche replacements, so filtering lines as they stream
+        # does not shift the words drawn for later lines
+        self.filter_rng = random.Random(self.rng.getrandbits(64))
+        self.metrics = metrics or NULL_METRICS
         self.structure = self._get_structure()
         
     def _get_structure(self):
@@ -145,49 +136,44 @@ class LyricGenerator:
             return VERSE_STRUCTURES["rock"]
         return VERSE_STRUCTURES["trap"]
     
-    def _get_rhyme_words(self, category: str) -> List[str]:
-        """Get rhyming words for a category"""
-        return RHYMES.get(category, RHYMES["a"])
+    def _get_rhyme_words(self, anchor: str) -> List[str]:
+        """Get words that rhyme with an anchor word (slant rhymes fill thin sets)"""
+        return _rhyme_words(anchor)
     
     def _avoid_cliches(self, text: str) -> str:
         """Replace cliche AI words with better alternatives"""
-        text_lower = text.lower()
-        for word in CLICHE_WORDS:
-            if word in text_lower and word in BETTER_ALTERNATIVES:
-                replacement = random.choice(BETTER_ALTERNATIVES[word])
-                text = re.sub(r'\b' + word + r'\b', replacement, text, flags=re.IGNORECASE)
-        return text
+        return avoid_cliches(text, self.filter_rng)
     
-    def _generate_line(self, rhyme_category: str, topic: str, mood: str = "aggressive") -> str:
+    def _generate_line(self, rhyme_anchor: str, topic: str, mood: str = "aggressive") -> str:
         """Generate a single line with proper rhyme"""
         
-        rhyme_words = self._get_rhyme_words(rhyme_category)
+        rhyme_words = self._get_rhyme_words(rhyme_anchor)
         
         # Topic-based line starters
         if topic == "money":
             starters = [
-                f"I been stackin' {random.choice(rhyme_words)}, got my {random.choice(rhyme_words)} right",
-                f"Bank account lookin' heavy, {random.choice(rhyme_words)} every night",
-                f"They don't understand the grind, but my {random.choice(rhyme_words)} so tight",
+                f"I been stackin' {self.rng.choice(rhyme_words)}, got my {self.rng.choice(rhyme_words)} right",
+                f"Bank account lookin' heavy, {self.rng.choice(rhyme_words)} every night",
+                f"They don't understand the grind, but my {self.rng.choice(rhyme_words)} so tight",
             ]
         elif topic == "love":
             starters = [
-                f"Shorty got me feelin' some type of way, {random.choice(rhyme_words)} every day",
-                f"Been through the pain but now I'm good, {random.choice(rhyme_words)} like I should",
+                f"Shorty got me feelin' some type of way, {self.rng.choice(rhyme_words)} every day",
+                f"Been through the pain but now I'm good, {self.rng.choice(rhyme_words)} like I should",
             ]
         elif topic == "struggle":
             starters = [
-                f"Came from the bottom where the struggle real, {random.choice(rhyme_words)} is how I feel",
-                f"They didn't believe in me, now look at me, {random.choice(rhyme_words)}",
+                f"Came from the bottom where the struggle real, {self.rng.choice(rhyme_words)} is how I feel",
+                f"They didn't believe in me, now look at me, {self.rng.choice(rhyme_words)}",
             ]
         else:  # flex
             starters = [
-                f"I been flexin' hard, {random.choice(rhyme_words)}, never showin' off",
-                f"Real ones stay, fake ones go, {random.choice(rhyme_words)} I know",
-                f"Got my {random.choice(rhyme_words)} up, my {random.choice(rhyme_words)} up, too",
+                f"I been flexin' hard, {self.rng.choice(rhyme_words)}, never showin' off",
+                f"Real ones stay, fake ones go, {self.rng.choice(rhyme_words)} I know",
+                f"Got my {self.rng.choice(rhyme_words)} up, my {self.rng.choice(rhyme_words)} up, too",
             ]
         
-        line = random.choice(starters)
+        line = self.rng.choice(starters)
         
         # In advanced mode, make lines more complex
         if self.advanced:
@@ -197,87 +183,88 @@ class LyricGenerator:
                 ", they wanna be me but can't come",
                 ", that's on my mom, that's on my blood",
             ]
-            line += random.choice(addons)
+            line += self.rng.choice(addons)
         
         return line
     
-    def _generate_verse(self, verse_type: str = "verse", topic: str = "flex") -> str:
-        """Generate a full verse"""
-        lines = []
-        rhyme_categories = list(RHYMES.keys())
+    def _iter_verse(self, verse_type: str = "verse", topic: str = "flex") -> Iterator[str]:
+        """Yield a verse line by line"""
+        anchors = RHYME_ANCHORS
         
         if verse_type == "hook":
             # Hook has simpler rhyme scheme, more repetition
             for i in range(4):
-                cat = rhyme_categories[i % 2]
-                line = self._generate_line(cat, topic, "catchy")
+                anchor = anchors[i % 2]
+                line = self._generate_line(anchor, topic, "catchy")
                 if self.advanced:
                     line = line.upper()  # More intense
-                lines.append(line)
-            return "\n".join(lines)
+                yield line
+            return
         
-        # Regular verse
+        # Regular verse, fitted to the structure's syllable targets
+        syllables = self.structure["syllables"]
         for i in range(self.structure["lines_per_verse"]):
             # Alternate rhyme categories every 2 lines (AABB pattern)
-            cat = rhyme_categories[(i // 2) % len(rhyme_categories)]
-            line = self._generate_line(cat, topic)
-            lines.append(line)
-        
-        # Avoid cliches if advanced mode
-        if self.advanced:
-            lines = [self._avoid_cliches(line) for line in lines]
-        
-        return "\n".join(lines)
+            anchor = anchors[(i // 2) % len(anchors)]
+            if self.meter:
+                word = self.rng.choice(self._get_rhyme_words(anchor))
+                cores = [core.format(w=word) for core in METER_LINES.get(topic, METER_LINES["flex"])]
+                line, _ = fit_line(cores, syllables[i % len(syllables)], FILLERS, self.rng)
+                yield line
+            else:
+                yield self._generate_line(anchor, topic)
     
-    def generate(self, topic: str = "flex", mood: str = "aggressive") -> Dict:
-        """Generate complete song lyrics"""
-        
-        # Determine topic
+    def _generate_verse(self, verse_type: str = "verse", topic: str = "flex") -> str:
+        """Generate a full verse"""
+        return "\n".join(self._iter_verse(verse_type, topic))
+    
+    def _resolve_topic(self, topic: str) -> str:
         if topic == "auto":
             topics = ["money", "flex", "love", "struggle"]
-            topic = random.choice(topics)
-        
-        # Generate sections
-        intro = self._generate_verse("intro", topic) if self.advanced else ""
-        hook = self._generate_verse("hook", topic)
-        verse1 = self._generate_verse("verse1", topic)
-        verse2 = self._generate_verse("verse2", topic)
-        outro = self._generate_verse("outro", topic) if self.advanced else ""
-        
-        # Structure the song
-        if self.advanced:
-            structure = {
-                "intro": intro,
-                "hook": hook,
-                "verse1": verse1,
-                "hook": hook,  # Repeat hook
-                "verse2": verse2,
-                "hook": hook,  # Repeat hook again
-                "outro": outro
-            }
-        else:
-            structure = {
-                "hook": hook,
-                "verse1": verse1,
-                "verse2": verse2,
-            }
+            topic = self.rng.choice(topics)
+        return topic
+    
+    def iter_lines(self, topic: str = "flex") -> Iterator[Tuple[str, str]]:
+        """Yield (section, line) pairs as they are generated
         
-        # Create full lyrics text
-        full_lyrics = ""
-        for section, content in structure.items():
-            if content:
-                full_lyrics += f"[{section.upper()}]\n{content}\n\n"
+        Lines come out already cliche-filtered, so nothing is held back for a
+        whole-song pass and memory stays flat however long the output runs.
+        """
+        topic = self._resolve_topic(topic)
+        sections = ADVANCED_SECTIONS if self.advanced else BASIC_SECTIONS
+        for section in sections:
+            for line in self._iter_verse(section, topic):
+                if self.advanced:
+                    with self.metrics.stage("cliches"):
+                        line = avoid_cliches(line, self.filter_rng)
+                yield section, line
+    
+    def stream(self, topic: str = "flex") -> Iterator[str]:
+        """Yield the song as text chunks, ready for file.writelines() or a socket"""
+        current = None
+        for section, line in self.iter_lines(topic):
+            if section != current:
+                yield f"\n[{section.upper()}]\n" if current else f"[{section.upper()}]\n"
+                current = section
+            yield line + "\n"
+    
+    def generate(self, topic: str = "flex", mood: str = "aggressive") -> Dict:
+        """Generate complete song lyrics (collects iter_lines)"""
+        topic = self._resolve_topic(topic)
         
-        # Final cleanup
-        if self.advanced:
-            full_lyrics = self._avoid_cliches(full_lyrics)
+        sections: Dict[str, List[str]] = {}
+        for section, line in self.iter_lines(topic):
+            sections.setdefault(section, []).append(line)
+        structure = {section: "\n".join(lines) for section, lines in sections.items()}
+        full_lyrics = "\n\n".join(f"[{section.upper()}]\n{content}" for section, content in structure.items())
         
         return {
             "genre": self.genre,
             "advanced": self.advanced,
             "topic": topic,
+            "seed": self.seed,
             "structure": structure,
-            "full_lyrics": full_lyrics.strip()
+            "full_lyrics": full_lyrics
         }
 
 
@@ -288,7 +275,7 @@ class StemGenerator:
     def __init__(self, genre: str, style: str):
         self.genre = genre
         self.style = style
-        self.style_data = STYLE_PRESETS.get(style, STYLE_PRESETS["Metro Boomin"])
+        self.style_data = STYLE_PRESETS.resolve(style)
         self.bpm = self.style_data["bpm"]
         
     def generate_all_stems(self) -> Dict:
@@ -307,48 +294,130 @@ class StemGenerator:
                 "synths": {"type": "synths", "bpm": self.bpm},
             }
         }
+    
+    def render(self, output_dir: str, seed=None, prefix: str = "sunoflo", workers: Optional[int] = None,
+               mix: bool = True) -> Dict[str, str]:
+        """Render the four stems (and a mixdown) to WAV; returns {stem: path}"""
+        import render   # NumPy and the note engine are only needed for audio
+        from sunoflo_complete import SunoFLO, get_root
+        flo = SunoFLO(self.genre, self.style, seed=seed)
+        stems = render.song_stems(flo.build_lanes(), get_root(flo.key), "minor" in flo.key)
+        return render.render_stems(stems, output_dir, self.bpm, prefix, workers, mix)
 
 
 # ========== MAIN GENERATOR ==========
 class SunoFLOGenerator:
     """Main generator class"""
     
-    def __init__(self, genre: str = "Trap", style: str = "Metro Boomin"):
+    def __init__(self, genre: str = "Trap", style: str = "Metro Boomin", seed=None):
         self.genre = genre
         self.style = style
-        self.preset = STYLE_PRESETS.get(style, STYLE_PRESETS["Metro Boomin"])
+        self.preset = STYLE_PRESETS.resolve(style)
+        self.rng, self.seed = make_rng(seed)
         
     def generate(self, output_dir: str = "~/Downloads", include_lyrics: bool = False, 
-                 lyric_topic: str = "auto", advanced_lyrics: bool = False) -> Dict:
-        """Generate everything"""
+                 lyric_topic: str = "auto", advanced_lyrics: bool = False,
+                 verbose: bool = True, cache=None, metrics=None, novelty=None,
+                 audio: bool = False, audio_workers: Optional[int] = None) -> Dict:
+        """Generate everything
+        
+        With an OutputCache, identical inputs (same seed) are copied from the
+        cache instead of being generated again. A metrics.Metrics recorder gets
+        per-stage timings and one record per call. With a novelty.NoveltyIndex,
+        lyrics too close to earlier songs are regenerated. With audio=True the
+        stems are also rendered to WAV (see render.py), audio_workers processes
+        at a time.
+        """
+        metrics = metrics or NULL_METRICS
         output_dir = os.path.expanduser(output_dir)
         os.makedirs(output_dir, exist_ok=True)
         
         style_name = self.style.replace(" ", "_").lower()
-        results = {}
+        stems_name = f"sunoflo_{style_name}_stems.json"
+        lyrics_name = f"sunoflo_{style_name}_lyrics.txt"
+        audio_prefix = f"sunoflo_{style_name}"
+        results = {"seed": self.seed}
+        
+        if self.seed is None:
+            cache = None   # a caller's random.Random has no seed to key the output on
+        
+        if cache is not None:
+            key = cache_key(VERSION, "generator", self.genre, self.style, include_lyrics,
+                            lyric_topic, advanced_lyrics, self.seed, audio)
+            hit = cache.materialize(key, output_dir)
+            if hit is not None:
+                files, meta = hit
+                if verbose:
+                    print(f"Cached: {self.style} ({self.genre})")
+                results["stems"] = files[stems_name]
+                results.update((f"audio_{name[len(audio_prefix) + 1:-4]}", path)
+                               for name, path in files.items() if name.endswith(".wav"))
+                if include_lyrics:
+                    results["lyrics"] = files[lyrics_name]
+                    results["lyrics_data"] = meta["lyrics_data"]
+                metrics.count("cache_hits")
+                metrics.emit(engine="generator", style=self.style)
+                return results
         
         # Generate stems
-        print(f"Generating stems for {self.style} ({self.genre})...")
-        stem_gen = StemGenerator(self.genre, self.style)
-        stems = stem_gen.generate_all_stems()
+        if verbose:
+            print(f"Generating stems for {self.style} ({self.genre})...")
+        with metrics.stage("preset"):
+            stem_gen = StemGenerator(self.genre, self.style)
+        with metrics.stage("stems"):
+            stems = stem_gen.generate_all_stems()
+            stems["metadata"]["seed"] = self.seed
+        if audio:
+            with metrics.stage("audio"):
+                wavs = stem_gen.render(output_dir, self.seed, audio_prefix, audio_workers)
+            for name, path in wavs.items():
+                if name in stems["stems"]:
+                    stems["stems"][name]["file"] = os.path.basename(path)
+                else:
+                    stems[name] = os.path.basename(path)   # the mixdown
+                results[f"audio_{name}"] = path
+            metrics.wrote(*wavs.values())
         
-        stems_path = os.path.join(output_dir, f"sunoflo_{style_name}_stems.json")
-        with open(stems_path, 'w') as f:
-            json.dump(stems, f, indent=2)
+        stems_path = os.path.join(output_dir, stems_name)
+        with metrics.stage("write"):
+            with open(stems_path, 'w') as f:
+                json.dump(stems, f, indent=2)
+        metrics.wrote(stems_path)
         results["stems"] = stems_path
         
         # Generate lyrics if requested
         if include_lyrics:
-            print(f"Generating {'advanced' if advanced_lyrics else 'basic'} lyrics...")
-            lyric_gen = LyricGenerator(self.genre, advanced_lyrics)
-            lyrics = lyric_gen.generate(topic=lyric_topic)
+            if verbose:
+                print(f"Generating {'advanced' if advanced_lyrics else 'basic'} lyrics...")
+            lyric_gen = LyricGenerator(self.genre, advanced_lyrics, seed=self.rng, metrics=metrics)
+            with metrics.stage("lyrics"):
+                if novelty is None:
+                    lyrics = lyric_gen.generate(topic=lyric_topic)
+                else:
+                    lyrics, results["similarity"] = novelty.unique(
+                        lambda: lyric_gen.generate(topic=lyric_topic),
+                        text_of=lambda l: l["full_lyrics"], label=f"generator/{self.style}/{self.seed}")
+            metrics.count("lyric_lines", lyrics["full_lyrics"].count("\n") + 1)
             
-            lyrics_path = os.path.join(output_dir, f"sunoflo_{style_name}_lyrics.txt")
-            with open(lyrics_path, 'w') as f:
-                f.write(lyrics["full_lyrics"])
+            lyrics_path = os.path.join(output_dir, lyrics_name)
+            with metrics.stage("write"):
+                with open(lyrics_path, 'w') as f:
+                    f.write(lyrics["full_lyrics"])
+            metrics.wrote(lyrics_path)
             results["lyrics"] = lyrics_path
             results["lyrics_data"] = lyrics
         
+        if cache is not None:
+            artifacts = {stems_name: stems_path}
+            if audio:
+                artifacts.update((os.path.basename(path), path) for path in wavs.values())
+            if include_lyrics:
+                artifacts[lyrics_name] = lyrics_path
+            with metrics.stage("cache_put"):
+                cache.put(key, artifacts, {"lyrics_data": results.get("lyrics_data")})
+        
+        metrics.count("projects")
+        metrics.emit(engine="generator", style=self.style)
         return results
 
 
@@ -368,8 +437,7 @@ def console_ui():
     genre = GENRES[max(0, min(genre_choice, len(GENRES)-1))]
     
     # Style selection
-    matching_styles = [s for s, data in STYLE_PRESETS.items() 
-                      if data["genre"].lower() == genre.lower()]
+    matching_styles = STYLE_PRESETS.by_genre(genre)
     if not matching_styles:
         matching_styles = list(STYLE_PRESETS.keys())[:10]
     
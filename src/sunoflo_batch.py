@@ -0,0 +1,365 @@
+"""
+SunoFLO - Batch Mode
+Headless, parallel project generation for all three generators
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import itertools
+import threading
+import functools
+from dataclasses import dataclass
+from typing import List, Dict, Iterable, Optional
+
+from seeding import derive_seed, new_seed
+from cache import OutputCache, DEFAULT_MAX_BYTES
+from metrics import Metrics, NULL_METRICS, open_sinks
+from bundle import BundleWriter, locked, project_id
+
+ENGINES = ["generator", "complete", "ultimate"]
+
+
+# ========== JOB SPEC ==========
+@dataclass
+class BatchJob:
+    """One line of a batch: what to generate and how many times"""
+    engine: str = "generator"
+    genre: str = "Trap"
+    style: str = "Metro Boomin"
+    topic: str = "auto"
+    structure: str = "trap"
+    count: int = 1
+    include_lyrics: bool = True
+    advanced: bool = False
+    markov: bool = False           # ultimate engine: verses from the n-gram model
+    seed: Optional[int] = None     # base seed for this job's projects (default: the batch seed)
+
+
+def expand_grid(engines: List[str], genres: List[str], styles: List[str], topics: List[str],
+                structures: List[str], count: int = 1, include_lyrics: bool = True,
+                advanced: bool = False, markov: bool = False) -> List[BatchJob]:
+    """Build one job per combination of the given values"""
+    return [
+        BatchJob(engine, genre, style, topic, structure, count, include_lyrics, advanced, markov)
+        for engine, genre, style, topic, structure
+        in itertools.product(engines, genres, styles, topics, structures)
+    ]
+
+
+def load_jobs(path: str) -> List[BatchJob]:
+    """Load a JSON list of job objects (missing fields use the defaults)"""
+    with open(path) as f:
+        return [BatchJob(**entry) for entry in json.load(f)]
+
+
+# ========== WORKER ==========
+_caches: Dict[str, OutputCache] = {}
+
+
+def _get_cache(cache_dir: Optional[str], max_bytes: int) -> Optional[OutputCache]:
+    """One cache handle per worker process"""
+    if not cache_dir:
+        return None
+    if cache_dir not in _caches:
+        _caches[cache_dir] = OutputCache(cache_dir, max_bytes)
+    return _caches[cache_dir]
+
+
+# Per thread as well as per process: SQLite connections may only be used by the
+# thread that opened them, and the daemon runs inline batches on handler threads
+_novelty = threading.local()
+
+
+def _get_novelty(path: Optional[str], threshold: float):
+    """One novelty index connection per worker process and thread"""
+    if not path:
+        return None
+    indexes = _novelty.__dict__.setdefault("indexes", {})
+    if (path, threshold) not in indexes:
+        from novelty import NoveltyIndex
+        indexes[path, threshold] = NoveltyIndex(path, threshold)
+    return indexes[path, threshold]
+
+
+_libraries: Dict[str, "PatternLibrary"] = {}  # noqa: F821
+
+
+def _get_library(path: Optional[str]):
+    """One mapped pattern library per worker process"""
+    if not path:
+        return None
+    if path not in _libraries:
+        from pattern_library import PatternLibrary
+        _libraries[path] = PatternLibrary.load(path)
+    return _libraries[path]
+
+
+def run_task(job: BatchJob, index: int, output_dir: str, seed: int,
+             cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+             metrics: bool = False, novelty_db: Optional[str] = None,
+             novelty_threshold: float = 0.6, patterns: Optional[str] = None,
+             audio: bool = False) -> Dict:
+    """Generate a single project; runs inside a pool worker
+
+    With metrics=True the run's stage record is returned under "metrics" so
+    the parent process can write it to its sinks. With a novelty database,
+    near-duplicate lyrics are regenerated; the output then depends on what
+    the index already holds, so the output cache is bypassed. A pattern
+    library path makes the complete and ultimate engines draw their lanes from it.
+    With audio=True every project also gets WAV stems and a mixdown, rendered
+    inline since the pool already spreads projects over the cores.
+    """
+    # Keyed by seed like bundle members, so a later batch into the same dir adds rather than overwrites
+    out = os.path.join(os.path.expanduser(output_dir), project_id(job.engine, job.style, seed))
+    os.makedirs(out, exist_ok=True)
+    novelty = _get_novelty(novelty_db, novelty_threshold)
+    cache = None if novelty else _get_cache(cache_dir, cache_max_bytes)
+    recorder = Metrics() if metrics else NULL_METRICS
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+
+    if job.engine == "generator":
+        from sunoflo import SunoFLOGenerator
+        gen = SunoFLOGenerator(genre=job.genre, style=job.style, seed=seed)
+        result = gen.generate(output_dir=out, include_lyrics=job.include_lyrics,
+                              lyric_topic=job.topic, advanced_lyrics=job.advanced,
+                              verbose=False, cache=cache, metrics=recorder, novelty=novelty,
+                              audio=audio, audio_workers=1)
+        result.pop("lyrics_data", None)
+    elif job.engine == "complete":
+        from sunoflo_complete import SunoFLO
+        topic = "flex" if job.topic == "auto" else job.topic
+        flo = SunoFLO(job.genre, job.style, seed=seed, library=_get_library(patterns))
+        result = flo.generate_project(output_dir=out, include_lyrics=job.include_lyrics,
+                                      advanced_lyrics=job.advanced, topic=topic,
+                                      verbose=False, cache=cache, metrics=recorder, novelty=novelty)
+    elif job.engine == "ultimate":
+        from sunoflo_ultimate import SunoFLO_Ultimate, save_project
+        theme = "flex" if job.topic == "auto" else job.topic
+        with recorder.stage("preset"):
+            flo = SunoFLO_Ultimate(job.style, theme, job.structure, seed=seed, markov=job.markov)
+        with recorder.stage("lyrics"):
+            project = flo.generate_project()
+            if novelty:
+                project["lyrics"], similarity = novelty.unique(
+                    flo.generate_lyrics, label=f"ultimate/{job.style}/{seed}")
+        path = os.path.join(out, f"sunoflo_ultimate_{job.style.replace(' ', '_')}.txt")
+        with recorder.stage("write"):
+            result = {"project": save_project(project, path)}
+        result["midi"] = flo.generate_midi(os.path.splitext(path)[0] + ".mid",
+                                           library=_get_library(patterns), metrics=recorder)
+        if novelty:
+            result["similarity"] = similarity
+        recorder.wrote(path)
+        recorder.wrote(result["midi"])
+        recorder.count("projects")
+        recorder.emit(engine="ultimate", style=job.style)
+    else:
+        raise ValueError(f"Unknown engine: {job.engine}")
+
+    if audio and "midi" in result:
+        from render import render_midi
+        result.update((f"audio_{name}", path)
+                      for name, path in render_midi(result["midi"], out, workers=1).items())
+
+    result.pop("seed", None)
+    similarity = result.pop("similarity", None)
+    cache_state = None
+    if cache:
+        cache_state = "hit" if cache.hits > hits else "miss" if cache.misses > misses else None
+    record = {"index": index, "engine": job.engine, "style": job.style, "seed": seed,
+              "cache": cache_state, "files": result}
+    if similarity is not None:
+        record["similarity"] = similarity
+    if recorder.last:
+        record["metrics"] = recorder.last
+    return record
+
+
+def _run_packed(args, **options):
+    return run_task(*args, **options)
+
+
+def iter_tasks(jobs: Iterable[BatchJob], output_dir: str, base_seed: int):
+    """Flatten jobs into (job, index, output_dir, seed) tasks, one per project
+
+    Each project's seed is derived from its job seed (or the batch seed) and its
+    position, so any single project can be regenerated on its own. Two jobs
+    whose projects would land in the same directory (same engine, style and
+    explicit seed) are rejected with ValueError rather than overwriting each other.
+    """
+    index = 0
+    owners: Dict[str, int] = {}
+    for job_no, job in enumerate(jobs):
+        for n in range(job.count):
+            if job.seed is not None:
+                seed = derive_seed(job.seed, n)
+            else:
+                seed = derive_seed(base_seed, job_no, n)
+            pid = project_id(job.engine, job.style, seed)
+            owner = owners.setdefault(pid, job_no)
+            if owner != job_no:
+                raise ValueError(f"jobs {owner} and {job_no} would both write {pid}; "
+                                 f"give them different seeds")
+            yield job, index, output_dir, seed
+            index += 1
+
+
+# ========== BATCH RUNNER ==========
+def run_batch(jobs: List[BatchJob], output_dir: str = "~/Downloads/sunoflo-batch",
+              workers: Optional[int] = None, chunksize: int = 4,
+              seed: Optional[int] = None, cache_dir: Optional[str] = None,
+              cache_max_bytes: int = DEFAULT_MAX_BYTES, metrics_sinks: List = (),
+              pool=None, bundle: Optional[str] = None, novelty_db: Optional[str] = None,
+              novelty_threshold: float = 0.6, patterns: Optional[str] = None,
+              audio: bool = False) -> Dict:
+    """Fan jobs out over a process pool and report throughput
+
+    Pass an existing pool to reuse warm workers (workers is then ignored).
+    With a bundle path, projects are staged in a scratch directory and then
+    appended to that one .zip (see bundle.py) instead of left as loose files.
+    """
+    seed = new_seed() if seed is None else seed
+    tasks = list(iter_tasks(jobs, output_dir, seed))   # raises on colliding jobs before any work
+    if bundle:
+        bundle = os.path.expanduser(bundle)
+        os.makedirs(os.path.dirname(os.path.abspath(bundle)), exist_ok=True)
+        output_dir = tempfile.mkdtemp(prefix=".sunoflo-", dir=os.path.dirname(os.path.abspath(bundle)))
+        tasks = [(job, index, output_dir, task_seed) for job, index, _, task_seed in tasks]
+    worker = functools.partial(_run_packed, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                               metrics=bool(metrics_sinks), novelty_db=novelty_db,
+                               novelty_threshold=novelty_threshold,
+                               patterns=patterns and os.path.abspath(os.path.expanduser(patterns)),
+                               audio=audio)
+    start = time.perf_counter()
+
+    if pool is not None:
+        results = list(pool.map(worker, tasks, chunksize=chunksize))
+    elif workers == 1:
+        results = [worker(task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor   # kept off the thin client's import path
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(worker, tasks, chunksize=chunksize))
+
+    elapsed = time.perf_counter() - start
+
+    # Stage records go to the sinks from this process only
+    for result in results:
+        record = result.pop("metrics", None)
+        if record:
+            record["labels"].update(index=result["index"], seed=result["seed"])
+            for sink in metrics_sinks:
+                sink.write(record)
+
+    # Manifest: one line per project with the seed that reproduces it
+    if bundle:
+        with locked(bundle):
+            writer = BundleWriter(bundle)
+            for result in results:
+                prefix = project_id(result["engine"], result["style"], result["seed"])
+                result["files"] = writer.add_project(prefix, result["files"])
+            manifest = "".join(json.dumps(result) + "\n" for result in results)
+            writer.add(f"manifests/{seed}.jsonl", manifest.encode("utf-8"))
+            writer.flush()
+        shutil.rmtree(output_dir, ignore_errors=True)
+    else:
+        root = os.path.expanduser(output_dir)
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, "manifest.jsonl"), "a") as f:
+            for result in results:
+                f.write(json.dumps(result) + "\n")
+
+    return {
+        "seed": seed,
+        "projects": len(results),
+        "cache_hits": sum(1 for r in results if r["cache"] == "hit"),
+        "cache_misses": sum(1 for r in results if r["cache"] == "miss"),
+        "near_duplicates": sum(1 for r in results if r.get("similarity", 0) >= novelty_threshold),
+        "seconds": elapsed,
+        "projects_per_sec": len(results) / elapsed if elapsed > 0 else 0.0,
+        "results": results,
+    }
+
+
+# ========== CLI ==========
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="SunoFLO headless batch generator")
+    parser.add_argument("--jobs", help="JSON file with a list of jobs (overrides the grid options)")
+    parser.add_argument("--engine", nargs="+", default=["generator"], choices=ENGINES)
+    parser.add_argument("--genre", nargs="+", default=["Trap"])
+    parser.add_argument("--style", nargs="+", default=["Metro Boomin"])
+    parser.add_argument("--topic", nargs="+", default=["auto"])
+    parser.add_argument("--structure", nargs="+", default=["trap"])
+    parser.add_argument("--count", type=int, default=1, help="Projects per grid cell")
+    parser.add_argument("--no-lyrics", action="store_true")
+    parser.add_argument("--advanced", action="store_true", help="Advanced lyric mode")
+    parser.add_argument("--markov", action="store_true", help="Ultimate engine: n-gram model verses")
+    parser.add_argument("--seed", type=int, help="Batch seed (default: random, printed at the end)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Pool size (1 = run inline)")
+    parser.add_argument("--chunksize", type=int, default=4)
+    parser.add_argument("--output", default="~/Downloads/sunoflo-batch")
+    parser.add_argument("--cache-dir", help="Reuse identical outputs from this cache (e.g. ~/.cache/sunoflo)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    parser.add_argument("--bundle", help="Append every project to this .zip bundle instead of loose files")
+    parser.add_argument("--novelty", metavar="DB",
+                        help="Regenerate lyrics too similar to any song in this index (e.g. ~/.cache/sunoflo/novelty.db)")
+    parser.add_argument("--novelty-threshold", type=float, default=0.6,
+                        help="Estimated Jaccard similarity that counts as a near-duplicate")
+    parser.add_argument("--patterns", metavar="LIBRARY",
+                        help="Draw complete/ultimate MIDI lanes from this pattern library (see pattern_library.py)")
+    parser.add_argument("--audio", action="store_true", help="Render WAV stems and a mixdown for every project")
+    parser.add_argument("--metrics-jsonl", help="Append per-project stage timings to this JSON-lines file")
+    parser.add_argument("--metrics-prom", help="Write Prometheus text-format totals to this file")
+    return parser
+
+
+def jobs_from_args(args: argparse.Namespace) -> List[BatchJob]:
+    if args.jobs:
+        return load_jobs(args.jobs)
+    return expand_grid(args.engine, args.genre, args.style, args.topic, args.structure,
+                       count=args.count, include_lyrics=not args.no_lyrics,
+                       advanced=args.advanced, markov=args.markov)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    jobs = jobs_from_args(args)
+
+    print(f"SunoFLO batch: {len(jobs)} job(s), {sum(j.count for j in jobs)} project(s), "
+          f"{args.workers} worker(s)")
+    sinks = open_sinks(args.metrics_jsonl, args.metrics_prom)
+    try:
+        report = run_batch(jobs, args.output, args.workers, args.chunksize, args.seed,
+                           args.cache_dir, args.cache_max_mb * 1024 * 1024, sinks,
+                           bundle=args.bundle, novelty_db=args.novelty,
+                           novelty_threshold=args.novelty_threshold, patterns=args.patterns,
+                           audio=args.audio)
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    print_report(report, args)
+    return report
+
+
+def report_lines(report: Dict, args: argparse.Namespace) -> List[str]:
+    lines = [f"✓ {report['projects']} projects in {report['seconds']:.2f}s "
+             f"({report['projects_per_sec']:.1f} projects/sec), seed {report['seed']}"]
+    if args.cache_dir:
+        lines.append(f"Cache: {report['cache_hits']} hit(s), {report['cache_misses']} miss(es)")
+    if getattr(args, "novelty", None):
+        lines.append(f"Novelty: {report['near_duplicates']} near-duplicate(s) kept after retries")
+    lines.append(f"📁 Output: {os.path.expanduser(args.bundle or args.output)}")
+    return lines
+
+
+def print_report(report: Dict, args: argparse.Namespace):
+    print("\n".join(report_lines(report, args)))
+
+
+if __name__ == "__main__":
+    main()
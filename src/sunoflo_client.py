@@ -0,0 +1,49 @@
+"""
+SunoFLO - Client
+Thin front end for the warm daemon; takes the same options as sunoflo_batch.py
+
+    python src/sunoflo_client.py --engine complete --style Drake --count 3
+    python src/sunoflo_client.py --ping
+
+Batch options are parsed by the daemon, so the client itself loads nothing
+but the standard library and starts in a few milliseconds.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from protocol import DEFAULT_SOCKET, request
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="SunoFLO client for the warm daemon",
+        epilog="Every other option goes to the daemon as a batch CLI option "
+               "(see python src/sunoflo_batch.py --help)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--ping", action="store_true", help="Show daemon status and exit")
+    parser.add_argument("--json", action="store_true", help="Print the raw report as JSON")
+    args, batch_argv = parser.parse_known_args(argv)
+
+    try:
+        if args.ping:
+            reply = request(args.socket, {"op": "ping"})
+        else:
+            # Relative paths are resolved against this directory, not the daemon's
+            reply = request(args.socket, {"op": "argv", "argv": batch_argv, "cwd": os.getcwd()})
+    except OSError as e:
+        sys.exit(f"No daemon on {args.socket} ({e}); start one with: python src/daemon.py")
+
+    if not reply.get("ok"):
+        sys.exit(f"Daemon error: {reply.get('error')}")
+    if args.ping or args.json:
+        print(json.dumps(reply.get("report", reply)))
+    else:
+        print("\n".join(reply["summary"]))
+    return reply
+
+
+if __name__ == "__main__":
+    main()
@@ -5,85 +5,36 @@ AI-Powered FL Studio Project Generator
 """
 
 import os
-import struct
-import json
 import random
-import re
-from typing import List, Dict, Any
 
-VERSION = "2.0.0"
+from cliches import avoid_cliches
+from midi_writer import MidiFile, DRUM_CHANNEL
+from flp_writer import write_flp
+import patterns
+from arranger import Arranger
+from seeding import make_rng, derive_seed
+from cache import cache_key
+from rhymes import default_index
+from styles import REGISTRY
+from metrics import NULL_METRICS
 
-# ========== CLICHE FILTER ==========
-CLICHE_WORDS = [
-    "universe", "galaxy", "stars", "shine", "glow", "dream", "fantasy", "paradise",
-    "heaven", "angel", "wings", "fly", "soar", "sky", "beyond", "infinity",
-    "forever", "neverending", "magic", "miracle", "heartbeat", "soul", "neon", "vibes",
-]
-
-BETTER_ALTERNATIVES = {
-    "universe": ["block", "hood", "streets", "world"],
-    "galaxy": ["streets", "blocks", "trap"],
-    "stars": ["guap", "bands", "racks", "cash"],
-    "shine": ["grind", "hustle", "ball"],
-    "glow": ["flex", "show", "stack"],
-    "dream": ["scheme", "goal", "bag"],
-    "fantasy": ["real life", "hustle"],
-    "paradise": ["my house", "the trap"],
-    "heaven": ["trap house", "studio"],
-    "angel": ["shorty", "queen"],
-    "wings": ["racks", "bands"],
-    "fly": ["rich", "ball", "flex"],
-    "soar": ["stack", "hustle"],
-    "sky": ["roof", "top"],
-    "magic": ["real", "true"],
-    "neon": ["diamonds", "racks"],
-}
+VERSION = "2.2.0"   # part of every cache key: bump whenever generated output changes
 
 # ========== ALL STYLES ==========
-STYLE_PRESETS = {
-    "Metro Boomin": {"bpm": 140, "key": "C minor", "genre": "Trap"},
-    "Southside": {"bpm": 140, "key": "G minor", "genre": "Trap"},
-    "Wheezy": {"bpm": 146, "key": "D minor", "genre": "Trap"},
-    "Nick Mira": {"bpm": 130, "key": "A minor", "genre": "Trap"},
-    "Pi'erre Bourne": {"bpm": 146, "key": "E minor", "genre": "Trap"},
-    "Travis Scott": {"bpm": 140, "key": "C minor", "genre": "Trap"},
-    "Kendrick Lamar": {"bpm": 120, "key": "D minor", "genre": "Hip Hop"},
-    "Armin van Buuren": {"bpm": 138, "key": "A minor", "genre": "Trance"},
-    "Tiesto": {"bpm": 136, "key": "G minor", "genre": "Trance"},
-    "Dash Berlin": {"bpm": 138, "key": "C minor", "genre": "Trance"},
-    "David Guetta": {"bpm": 128, "key": "C major", "genre": "House"},
-    "Daft Punk": {"bpm": 123, "key": "A minor", "genre": "House"},
-    "Pink Floyd": {"bpm": 120, "key": "G minor", "genre": "Rock"},
-    "Queen": {"bpm": 120, "key": "B minor", "genre": "Rock"},
-    "The Weeknd": {"bpm": 120, "key": "E minor", "genre": "R&B"},
-    "Drake": {"bpm": 85, "key": "D minor", "genre": "R&B"},
-    "Deadmau5": {"bpm": 128, "key": "F minor", "genre": "EDM"},
-    "Boards of Canada": {"bpm": 90, "key": "C minor", "genre": "Ambient"},
-    "Lost Boy": {"bpm": 140, "key": "C minor", "genre": "Phonk"},
-}
+STYLE_PRESETS = REGISTRY
 
 GENRES = ["Trap", "Drill", "R&B", "Pop", "House", "Hip Hop", "Trance", "Techno", "Dubstep", "DnB", "Ambient", "Rock", "EDM", "Lo-Fi", "Synthwave", "Phonk"]
 
-# ========== RHYMES ==========
-RHYMES = {
-    "a": ["back", "rack", "stack", "cat", "flat", "hat", "trap", "gap", "cash", "dash"],
-    "b": ["love", "above", "shove", "enough", "touch", "clutch", "much", "rush", "hush"],
-    "c": ["time", "mine", "fine", "wine", "shine", "line", "tonight", "alright", "light", "fight"],
-    "d": ["man", "plan", "clan", "can", "fan", "ran", "stand", "hand", "land", "band"],
-    "e": ["world", "girl", "curl", "pearl", "twirl", "sure", "pure", "cure"],
-    "f": ["day", "way", "play", "say", "may", "lay", "stay", "away", "today", "okay"],
-    "g": ["real", "feel", "steal", "deal", "wheel", "heal", "reveal"],
-    "h": ["thing", "bring", "sing", "ring", "king", "wing", "bling", "everything"],
-}
-
 # ========== MIDI GENERATOR ==========
-def var_len(value):
-    result = bytearray()
-    while value >= 0x80:
-        result.append((value & 0x7F) | 0x80)
-        value >>= 7
-    result.append(value & 0x7F)
-    return bytes(result)
+# Default arrangement: (section, bars, lanes playing)
+ARRANGEMENT = [
+    ("Intro", 4, ("melody",)),
+    ("Verse 1", 8, ("drums", "bass", "melody")),
+    ("Hook", 8, ("drums", "bass", "melody")),
+    ("Verse 2", 8, ("drums", "bass", "melody")),
+    ("Hook", 8, ("drums", "bass", "melody")),
+    ("Outro", 4, ("bass", "melody")),
+]
 
 def get_root(key):
     notes = {"C": 0, "D": 2, "E": 4, "F": 5, "G": 7, "A": 9, "B": 11}
@@ -92,80 +43,76 @@ def get_root(key):
 
 # ========== MAIN CLASS ==========
 class SunoFLO:
-    def __init__(self, genre="Trap", style="Metro Boomin"):
+    def __init__(self, genre="Trap", style="Metro Boomin", seed=None, library=None):
         self.genre = genre
         self.style = style
-        self.preset = STYLE_PRESETS.get(style, STYLE_PRESETS["Metro Boomin"])
+        self.preset = STYLE_PRESETS.resolve(style)
         self.bpm = self.preset.get("bpm", 140)
         self.key = self.preset.get("key", "C minor")
+        self.rng, self.seed = make_rng(seed)
+        # With a pattern_library.PatternLibrary, lanes are drawn from it on their own
+        # stream, so MIDI and FLP get the same bars and the lyrics are unaffected
+        self.library = library
+        if library is not None:
+            self.pattern_seed = (derive_seed(self.seed, "patterns") if self.seed is not None
+                                 else self.rng.getrandbits(63))
     
-    def generate_midi(self, output_path):
-        """Generate MIDI with drums, bass, melody"""
-        midi = bytearray()
-        
-        # Header
-        midi.extend(b'MThd')
-        midi.extend(struct.pack('>I', 6))
-        midi.extend(struct.pack('>H', 1))
-        midi.extend(struct.pack('>H', 3))  # 3 tracks
-        midi.extend(struct.pack('>H', 480))
-        
-        step = 480
+    def generate_midi(self, output_path, arrangement=None, rng=None, metrics=None):
+        """Generate a full-length MIDI arrangement with drums, bass, melody
         
-        # Create drum track
-        drum_track = self._create_track("Drums", "kick", 36, [1,0,0,0, 1,0,0,0, 1,0,0,0, 1,0,0,0], step)
-        midi.extend(b'MTrk')
-        midi.extend(struct.pack('>I', len(drum_track)))
-        midi.extend(drum_track)
+        Pass a NumPy Generator as rng to humanize timing and velocity.
+        """
+        metrics = metrics or NULL_METRICS
+        with metrics.stage("midi_lanes"):
+            arranger = self.arranger(arrangement)
+            if rng is not None:
+                lanes = {name: patterns.humanize(notes, rng) for name, notes in arranger.lanes().items()}
         
-        # Create bass track
-        root = get_root(self.key)
-        bass_track = self._create_track("Bass", "bass", root, [1,0,0,1, 0,0,0,1, 1,0,0,1, 0,0,1,0], step)
-        midi.extend(b'MTrk')
-        midi.extend(struct.pack('>I', len(bass_track)))
-        midi.extend(bass_track)
-        
-        # Create melody track
-        melody_track = self._create_track("Melody", "melody", root + 12, [1,0,1,0, 1,0,1,0, 1,0,1,0, 1,0,1,0], step)
-        midi.extend(b'MTrk')
-        midi.extend(struct.pack('>I', len(melody_track)))
-        midi.extend(melody_track)
-        
-        with open(output_path, 'wb') as f:
-            f.write(midi)
+        with metrics.stage("midi_encode"):
+            with MidiFile(output_path) as midi:
+                midi.conductor(self.bpm, self.key)
+                if rng is None:
+                    # Repeated sections are encoded once and re-placed
+                    arranger.write_tracks(midi)
+                else:
+                    for name, channel in (("drums", DRUM_CHANNEL), ("bass", 1), ("melody", 2)):
+                        with midi.track(name.capitalize()) as track:
+                            patterns.write_notes(track, lanes[name], channel)
+        metrics.count("midi_events", midi.events)
         return True
     
-    def _create_track(self, name, track_type, note, pattern, step):
-        track = bytearray()
-        
-        # Track name
-        track.extend([0x00, 0xFF, 0x03, len(name)])
-        track.extend(name.encode('ascii'))
-        
-        # Notes
-        for i, on in enumerate(pattern):
-            if on:
-                # Note on
-                track.extend(var_len(i * step))
-                track.extend([0x90, note, 100])
-                # Note off
-                track.extend(var_len(step - 10))
-                track.extend([0x80, note, 0])
-        
-        # End
-        track.extend([0x00, 0xFF, 0x2F, 0x00])
-        return bytes(track)
+    def generate_flp(self, output_path, arrangement=None):
+        """Write the same arrangement as a native FL Studio project"""
+        return write_flp(output_path, self.build_lanes(arrangement), self.bpm, self.key,
+                         title=self.style, genre=self.genre,
+                         plugins={"melody": self.preset["instruments"][0]})
     
-    def generate_lyrics(self, advanced=True, topic="flex"):
+    def bars(self):
+        """One bar of notes per lane"""
+        root = get_root(self.key)
+        pitches = {"drums": 36, "bass": root, "melody": root + 12}
+        if self.library is not None:
+            rng = random.Random(self.pattern_seed)
+            library = self.library
+            return {lane: library.notes(library.draw(self.genre, self.style, lane, rng), pitches[lane])
+                    for lane in patterns.GRIDS}
+        return {lane: patterns.from_grid(grid, pitches[lane]) for lane, grid in patterns.GRIDS.items()}
+    
+    def arranger(self, arrangement=None):
+        """An Arranger laying this style's bars across the arrangement"""
+        return Arranger(self.bars(), arrangement or ARRANGEMENT)
+    
+    def build_lanes(self, arrangement=None):
+        """Note arrays for every lane across the whole arrangement"""
+        return self.arranger(arrangement).lanes()
+    
+    def generate_lyrics(self, advanced=True, topic="flex", metrics=None):
         """Generate clean, non-repetitive lyrics"""
         
-        # Clean rhyme sets
-        A = ["back", "rack", "stack", "trap", "clap", "snap"]
-        B = ["love", "above", "stuff", "touch", "clutch"]
-        C = ["time", "mine", "fine", "wine", "shine"]
-        D = ["man", "plan", "can", "fan", "stand"]
-        E = ["real", "feel", "deal", "wheel", "heal"]
-        F = ["day", "way", "play", "say", "stay"]
+        # Clean rhyme sets, drawn from the rhyme index
+        index = default_index()
+        A, B, C, D, E, F = (self.rng.sample(index.rhyme_set(anchor), 2)
+                            for anchor in ("back", "love", "time", "man", "real", "day"))
         
         # Hook - catchy, short
         hook_lines = [
@@ -211,32 +158,92 @@ class SunoFLO:
 [OUTRO]
 Started with nothin' in my hand"""
         
+        if advanced:
+            with (metrics or NULL_METRICS).stage("cliches"):
+                lyrics = avoid_cliches(lyrics, self.rng)
+        
         return lyrics
     
-    def generate_project(self, output_dir="~/Downloads", include_lyrics=True, advanced_lyrics=True, topic="flex"):
-        """Generate complete project"""
+    def generate_project(self, output_dir="~/Downloads", include_lyrics=True, advanced_lyrics=True, topic="flex", verbose=True, cache=None, metrics=None, novelty=None):
+        """Generate complete project (reused from cache when inputs and seed match)
+        
+        With a novelty.NoveltyIndex, lyrics too close to earlier songs are regenerated.
+        """
+        metrics = metrics or NULL_METRICS
         output_dir = os.path.expanduser(output_dir)
         os.makedirs(output_dir, exist_ok=True)
         
         style_name = self.style.replace(" ", "_").lower()
+        midi_name = f"sunoflo_{style_name}.mid"
+        flp_name = f"sunoflo_{style_name}.flp"
+        lyrics_name = f"sunoflo_{style_name}_lyrics.txt"
+        
+        results = {"seed": self.seed}
+        
+        if self.seed is None:
+            cache = None   # a caller's random.Random has no seed to key the output on
         
-        results = {}
+        if cache is not None:
+            key = cache_key(VERSION, "complete", self.genre, self.style, include_lyrics,
+                            advanced_lyrics, topic, self.seed, self.library and self.library.digest)
+            hit = cache.materialize(key, output_dir)
+            if hit is not None:
+                files, _ = hit
+                results["midi"] = files[midi_name]
+                results["flp"] = files[flp_name]
+                if include_lyrics:
+                    results["lyrics"] = files[lyrics_name]
+                if verbose:
+                    print(f"✓ Cached: {output_dir}")
+                metrics.count("cache_hits")
+                metrics.emit(engine="complete", style=self.style)
+                return results
         
         # MIDI
-        midi_path = os.path.join(output_dir, f"sunoflo_{style_name}.mid")
-        self.generate_midi(midi_path)
+        midi_path = os.path.join(output_dir, midi_name)
+        self.generate_midi(midi_path, metrics=metrics)
+        metrics.wrote(midi_path)
         results["midi"] = midi_path
-        print(f"✓ MIDI: {midi_path}")
+        if verbose:
+            print(f"✓ MIDI: {midi_path}")
+        
+        # FL Studio project
+        flp_path = os.path.join(output_dir, flp_name)
+        with metrics.stage("flp"):
+            self.generate_flp(flp_path)
+        metrics.wrote(flp_path)
+        results["flp"] = flp_path
+        if verbose:
+            print(f"✓ FLP: {flp_path}")
         
         # Lyrics
         if include_lyrics:
-            lyrics = self.generate_lyrics(advanced_lyrics, topic)
-            lyrics_path = os.path.join(output_dir, f"sunoflo_{style_name}_lyrics.txt")
-            with open(lyrics_path, 'w') as f:
-                f.write(lyrics)
+            with metrics.stage("lyrics"):
+                if novelty is None:
+                    lyrics = self.generate_lyrics(advanced_lyrics, topic, metrics)
+                else:
+                    lyrics, results["similarity"] = novelty.unique(
+                        lambda: self.generate_lyrics(advanced_lyrics, topic, metrics),
+                        label=f"complete/{self.style}/{self.seed}")
+            metrics.count("lyric_lines", lyrics.count("\n") + 1)
+            lyrics_path = os.path.join(output_dir, lyrics_name)
+            with metrics.stage("write"):
+                with open(lyrics_path, 'w') as f:
+                    f.write(lyrics)
+            metrics.wrote(lyrics_path)
             results["lyrics"] = lyrics_path
-            print(f"✓ Lyrics: {lyrics_path}")
+            if verbose:
+                print(f"✓ Lyrics: {lyrics_path}")
+        
+        if cache is not None:
+            artifacts = {midi_name: midi_path, flp_name: flp_path}
+            if include_lyrics:
+                artifacts[lyrics_name] = lyrics_path
+            with metrics.stage("cache_put"):
+                cache.put(key, artifacts)
         
+        metrics.count("projects")
+        metrics.emit(engine="complete", style=self.style)
         return results
 
 # ========== UI ==========
@@ -252,7 +259,7 @@ def console_ui():
     genre = GENRES[max(0, min(g, len(GENRES)-1))]
     
     print(f"\nSelect Style ({genre}):")
-    styles = [s for s, d in STYLE_PRESETS.items() if d.get("genre") == genre]
+    styles = STYLE_PRESETS.by_genre(genre)
     if not styles:
         styles = list(STYLE_PRESETS.keys())[:10]
     
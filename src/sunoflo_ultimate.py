@@ -3,78 +3,14 @@ SunoFLO - Ultimate Version
 Massive Lyric Library + Artist Styles + Suno Prompts
 """
 
-import random
-import json
+from typing import Iterator, List
+
+from seeding import make_rng
+from styles import REGISTRY
 
 # ========== MASSIVE ARTIST LIBRARY ==========
-ARTIST_STYLES = {
-    # TRAP
-    "Metro Boomin": {"bpm": 140, "key": "C minor", "genre": "Trap", "desc": "Dark 808s, bell melodies, half-time", "instruments": ["Sytrus", "Harmor", "FPC"], "mood": "dark"},
-    "Southside": {"bpm": 140, "key": "G minor", "genre": "Trap", "desc": "Heavy 808 slides, crispy hi-hats", "instruments": ["Sytrus", "Harmor", "FPC"], "mood": "aggressive"},
-    "Wheezy": {"bpm": 146, "key": "D minor", "genre": "Trap", "desc": "Guitar/flute melodies, spacey", "instruments": ["Sytrus", "Harmor", "Sakura"], "mood": "spacey"},
-    "Nick Mira": {"bpm": 130, "key": "A minor", "genre": "Trap", "desc": "Emo/melodic, layered pianos", "instruments": ["Sytrus", "Harmor"], "mood": "emo"},
-    "Pi'erre Bourne": {"bpm": 146, "key": "E minor", "genre": "Trap", "desc": "Bouncy drums, harp leads", "instruments": ["Sytrus", "Harmor"], "mood": "bouncy"},
-    "Travis Scott": {"bpm": 140, "key": "C minor", "genre": "Trap", "desc": "Auto-tune, ethereal, heavy reverb", "instruments": ["Sytrus", "Harmor"], "mood": "ethereal"},
-    "Zaytoven": {"bpm": 140, "key": "F minor", "genre": "Trap", "desc": "Orchestral 808s, church organs", "instruments": ["Sytrus", "Harmor"], "mood": "orchestral"},
-    "London On Da Track": {"bpm": 145, "key": "G minor", "genre": "Trap", "desc": "Young Thug style, bouncy", "instruments": ["Sytrus", "Harmor"], "mood": "bouncy"},
-    "Tay Keith": {"bpm": 145, "key": "C minor", "genre": "Trap", "desc": "Hard 808s, minimal", "instruments": ["Sytrus", "FPC"], "mood": "hard"},
-    "Cash Cobain": {"bpm": 138, "key": "D minor", "genre": "Trap", "desc": "Sample drill, gritty 808s", "instruments": ["Sytrus", "FPC"], "mood": "gritty"},
-    
-    # R&B
-    "The Weeknd": {"bpm": 120, "key": "E minor", "genre": "R&B", "desc": "Dark R&B, atmospheric", "instruments": ["Harmor", "Sytrus"], "mood": "dark"},
-    "Drake": {"bpm": 85, "key": "D minor", "genre": "R&B", "desc": "Melodic rap, emotional", "instruments": ["Sytrus", "Harmor"], "mood": "emotional"},
-    "SZA": {"bpm": 95, "key": "C minor", "genre": "R&B", "desc": "Alternative R&B, introspective", "instruments": ["Harmor", "Sytrus"], "mood": " introspective"},
-    "Bryson Tiller": {"bpm": 90, "key": "G minor", "genre": "R&B", "desc": "Trap-soul, moody", "instruments": ["Sytrus", "Harmor"], "mood": "moody"},
-    "Giveon": {"bpm": 88, "key": "D minor", "genre": "R&B", "desc": "Deep baritone, romantic", "instruments": ["Harmor"], "mood": "romantic"},
-    "H.E.R.": {"bpm": 92, "key": "A minor", "genre": "R&B", "desc": "Guitar-driven, soulful", "instruments": ["Harmor", "Sytrus"], "mood": "soulful"},
-    
-    # HIP HOP
-    "Kendrick Lamar": {"bpm": 120, "key": "D minor", "genre": "Hip Hop", "desc": "Conscious, storytelling", "instruments": ["Sytrus", "Harmor"], "mood": "conscious"},
-    "J Cole": {"bpm": 90, "key": "G minor", "genre": "Hip Hop", "desc": "Thoughtful, melodic", "instruments": ["Sytrus", "Harmor"], "mood": "thoughtful"},
-    "Nas": {"bpm": 92, "key": "C minor", "genre": "Hip Hop", "desc": "Boom bap, lyrical", "instruments": ["Sytrus"], "mood": "lyrical"},
-    "Jay-Z": {"bpm": 95, "key": "D minor", "genre": "Hip Hop", "desc": "Marcy Marquis style", "instruments": ["Sytrus"], "mood": "classic"},
-    "Kanye West": {"bpm": 130, "key": "F minor", "genre": "Hip Hop", "desc": "Chipmunk soul, production", "instruments": ["Sytrus", "Harmor"], "mood": "soulful"},
-    "MF DOOM": {"bpm": 90, "key": "A minor", "genre": "Hip Hop", "desc": "Abstract, lo-fi", "instruments": ["Harmor"], "mood": "abstract"},
-    
-    # TRANCE
-    "Armin van Buuren": {"bpm": 138, "key": "A minor", "genre": "Trance", "desc": "Uplifting, big drops", "instruments": ["Sytrus", "Harmor"], "mood": "uplifting"},
-    "Tiesto": {"bpm": 136, "key": "G minor", "genre": "Trance", "desc": "EDM-Trance hybrid", "instruments": ["Sytrus", "Harmor"], "mood": "energetic"},
-    "Dash Berlin": {"bpm": 138, "key": "C minor", "genre": "Trance", "desc": "Emotional, melodic", "instruments": ["Harmor", "Sytrus"], "mood": "emotional"},
-    "Paul van Dyk": {"bpm": 140, "key": "B minor", "genre": "Trance", "desc": "Progressive, euphoric", "instruments": ["Sytrus", "Harmor"], "mood": "euphoric"},
-    "Gouryella": {"bpm": 140, "key": "E minor", "genre": "Trance", "desc": "Classic uplift, massive reverb", "instruments": ["Harmor", "Sytrus"], "mood": "uplifting"},
-    "Orjan Nilsen": {"bpm": 138, "key": "D minor", "genre": "Trance", "desc": "Dark trance, tech elements", "instruments": ["Sytrus"], "mood": "dark"},
-    "Aly & Fila": {"bpm": 138, "key": "A minor", "genre": "Trance", "desc": "Egyptian trance", "instruments": ["Sytrus", "Harmor"], "mood": "uplifting"},
-    
-    # HOUSE
-    "David Guetta": {"bpm": 128, "key": "C major", "genre": "House", "desc": "Electro house, big drops", "instruments": ["Sytrus", "Harmor"], "mood": "energetic"},
-    "Calvin Harris": {"bpm": 128, "key": "D major", "genre": "House", "desc": "Pop-house, catchy", "instruments": ["Sytrus", "Harmor"], "mood": "catchy"},
-    "Fisher": {"bpm": 124, "key": "E minor", "genre": "House", "desc": "Tech house, bass-heavy", "instruments": ["Sytrus", "FPC"], "mood": "bass-heavy"},
-    "Daft Punk": {"bpm": 123, "key": "A minor", "genre": "House", "desc": "French house, funky", "instruments": ["Harmor", "Sytrus"], "mood": "funky"},
-    "Diplo": {"bpm": 100, "key": "G major", "genre": "House", "desc": "World house, festival", "instruments": ["Sytrus", "Harmor"], "mood": "festival"},
-    "Disclosure": {"bpm": 124, "key": "F minor", "genre": "House", "desc": "UK garage, deep", "instruments": ["Harmor", "Sytrus"], "mood": "deep"},
-    
-    # ROCK
-    "Pink Floyd": {"bpm": 120, "key": "G minor", "genre": "Rock", "desc": "Psychedelic, space rock", "instruments": ["Harmor", "GMS"], "mood": "psychedelic"},
-    "Queen": {"bpm": 120, "key": "B minor", "genre": "Rock", "desc": "Rock anthems, operatic", "instruments": ["Sytrus", "Harmor"], "mood": "anthem"},
-    "Metallica": {"bpm": 130, "key": "E minor", "genre": "Rock", "desc": "Heavy metal, thrash", "instruments": ["Sytrus"], "mood": "heavy"},
-    "Nirvana": {"bpm": 120, "key": "F minor", "genre": "Rock", "desc": "Grunge, alternative", "instruments": ["Harmor"], "mood": "grunge"},
-    "AC/DC": {"bpm": 130, "key": "A minor", "genre": "Rock", "desc": "Hard rock, blues-based", "instruments": ["Sytrus"], "mood": "hard"},
-    
-    # EDM
-    "Deadmau5": {"bpm": 128, "key": "F minor", "genre": "EDM", "desc": "Progressive, glitchy", "instruments": ["Sytrus", "Harmor"], "mood": "progressive"},
-    "Skrillex": {"bpm": 140, "key": "D minor", "genre": "Dubstep", "desc": "Dubstep, heavy bass", "instruments": ["Sytrus"], "mood": "heavy"},
-    "Excision": {"bpm": 140, "key": "D minor", "genre": "Dubstep", "desc": "Riddim, massive bass", "instruments": ["Sytrus"], "mood": "heavy"},
-    
-    # AMBIENT
-    "Boards of Canada": {"bpm": 90, "key": "C minor", "genre": "Ambient", "desc": "Ambient, retro synths", "instruments": ["Harmor"], "mood": "ambient"},
-    "Tycho": {"bpm": 100, "key": "D major", "genre": "Ambient", "desc": "Chillwave, atmospheric", "instruments": ["Harmor"], "mood": "chill"},
-    "Brian Eno": {"bpm": 70, "key": "E minor", "genre": "Ambient", "desc": "Ambient pioneer", "instruments": ["Harmor"], "mood": "ambient"},
-    
-    # PHONK
-    "Lost Boy": {"bpm": 140, "key": "C minor", "genre": "Phonk", "desc": "Cowbell phonk", "instruments": ["Sytrus", "FPC"], "mood": "aggressive"},
-    "South Phonk": {"bpm": 145, "key": "G minor", "genre": "Phonk", "desc": "Drift phonk", "instruments": ["Sytrus", "Harmor"], "mood": "drift"},
-    "Yung Mal": {"bpm": 142, "key": "F minor", "genre": "Phonk", "desc": "ATL phonk", "instruments": ["Sytrus"], "mood": "aggressive"},
-}
+# Loaded lazily from presets/styles.json
+ARTIST_STYLES = REGISTRY
 
 # ========== MASSIVE LYRIC THEMES ==========
 LYRIC_THEMES = {
@@ -226,42 +162,49 @@ SUNO_PROMPTS = {
 
 # ========== MAIN GENERATOR ==========
 class SunoFLO_Ultimate:
-    def __init__(self, artist="Metro Boomin", theme="flex", structure="trap"):
+    def __init__(self, artist="Metro Boomin", theme="flex", structure="trap", seed=None, markov=False):
         self.artist = artist
         self.theme = theme
         self.structure = structure
-        self.style = ARTIST_STYLES.get(artist, ARTIST_STYLES["Metro Boomin"])
+        self.style = ARTIST_STYLES.resolve(artist)
         self.theme_data = LYRIC_THEMES.get(theme, LYRIC_THEMES["flex"])
         self.song_structure = SONG_STRUCTURES.get(structure, SONG_STRUCTURES["classic"])
+        self.rng, self.seed = make_rng(seed)
+        # Verses from the n-gram line model instead of replaying theme lines
+        self.markov = markov
     
-    def generate_lyrics(self) -> str:
-        """Generate structured lyrics"""
+    def iter_lyrics(self) -> Iterator[str]:
+        """Yield lyric lines (section headers and blank separators included) as they are drawn"""
         lines = self.theme_data["lines"]
-        structure = self.song_structure["sections"]
+        choice = self.rng.choice
         
-        lyrics = []
-        
-        for section in structure:
-            lyrics.append(f"[{section.upper()}]")
+        for section in self.song_structure["sections"]:
+            yield f"[{section.upper()}]"
             
             if "Hook" in section or "Chorus" in section:
                 # Hook - catchy, short
                 for _ in range(4):
-                    lyrics.append(random.choice(lines))
+                    yield choice(lines)
             elif "Verse" in section:
                 # Verse - storytelling
-                for _ in range(8):
-                    lyrics.append(random.choice(lines))
+                if self.markov:
+                    from ngram import default_model   # only markov runs load or train the model
+                    yield from default_model().couplets(self.rng, 8)
+                else:
+                    for _ in range(8):
+                        yield choice(lines)
             elif "Intro" in section or "Outro" in section:
-                lyrics.append(random.choice(lines[:2]))
+                yield choice(lines[:2])
             elif "Break" in section or "Bridge" in section:
-                lyrics.append(random.choice(lines[2:4]))
+                yield choice(lines[2:4])
             elif "Pre" in section:
-                lyrics.append(random.choice(lines[:4]))
+                yield choice(lines[:4])
             
-            lyrics.append("")
-        
-        return "\n".join(lyrics)
+            yield ""
+    
+    def generate_lyrics(self) -> str:
+        """Generate structured lyrics"""
+        return "\n".join(self.iter_lyrics())
     
     def generate_suno_prompt(self) -> str:
         """Generate optimized Suno AI prompt"""
@@ -273,12 +216,27 @@ class SunoFLO_Ultimate:
             bpm=self.style["bpm"],
             key=self.style["key"],
             mood=self.style["mood"],
-            instrument=random.choice(self.style["instruments"]),
-            adlib=random.choice(prompt_template["adlibs"])
+            instrument=self.rng.choice(self.style["instruments"]),
+            adlib=self.rng.choice(prompt_template["adlibs"])
         )
         
         return prompt
     
+    def generate_suno_prompts(self, count: int) -> List[str]:
+        """Up to count distinct prompt variants for this artist"""
+        from prompts import PromptSpace   # prompts imports this module
+        space = PromptSpace(self.artist)
+        return [space[i] for i in space.sample(count, self.rng)]
+    
+    def generate_midi(self, output_path: str, library=None, metrics=None) -> str:
+        """Full-length MIDI of the song structure, in the artist's BPM and key"""
+        from sunoflo_complete import SunoFLO   # keeps NumPy off the lyrics-only import path
+        from arranger import to_arrangement
+        flo = SunoFLO(self.style["genre"], self.artist, seed=self.seed, library=library)
+        flo.generate_midi(output_path, arrangement=to_arrangement(self.song_structure["sections"]),
+                          metrics=metrics)
+        return output_path
+    
     def generate_project(self) -> dict:
         """Generate complete project"""
         return {
@@ -286,12 +244,25 @@ class SunoFLO_Ultimate:
             "style": self.style,
             "theme": self.theme,
             "structure": self.structure,
+            "seed": self.seed,
             "bpm": self.style["bpm"],
             "key": self.style["key"],
             "lyrics": self.generate_lyrics(),
             "suno_prompt": self.generate_suno_prompt()
         }
 
+def save_project(project: dict, path: str) -> str:
+    """Write a generated project as a plain-text sheet"""
+    with open(path, "w") as f:
+        f.write(f"Artist: {project['artist']}\n")
+        f.write(f"BPM: {project['bpm']}, Key: {project['key']}\n")
+        f.write(f"Seed: {project.get('seed')}\n\n")
+        f.write("LYRICS:\n")
+        f.write(project['lyrics'])
+        f.write("\n\nSUNO PROMPT:\n")
+        f.write(project['suno_prompt'])
+    return path
+
 # ========== CLI ==========
 def main():
     print("=" * 60)
@@ -301,14 +272,8 @@ def main():
     
     # List artists by genre
     print("\n📋 ARTISTS BY GENRE:")
-    genres = {}
-    for artist, data in ARTIST_STYLES.items():
-        g = data["genre"]
-        if g not in genres:
-            genres[g] = []
-        genres[g].append(artist)
-    
-    for genre, artists in genres.items():
+    for genre in ARTIST_STYLES.genres():
+        artists = ARTIST_STYLES.by_genre(genre)
         print(f"\n{genre}: {', '.join(artists[:5])}{'...' if len(artists) > 5 else ''}")
     
     # Select artist
@@ -361,13 +326,7 @@ def main():
     print("="*60)
     
     # Save
-    with open(f"/home/simon/Downloads/sunoflo_ultimate_{artist.replace(' ', '_')}.txt", "w") as f:
-        f.write(f"Artist: {project['artist']}\n")
-        f.write(f"BPM: {project['bpm']}, Key: {project['key']}\n\n")
-        f.write("LYRICS:\n")
-        f.write(project['lyrics'])
-        f.write("\n\nSUNO PROMPT:\n")
-        f.write(project['suno_prompt'])
+    save_project(project, f"/home/simon/Downloads/sunoflo_ultimate_{artist.replace(' ', '_')}.txt")
     
     print(f"\n✅ Saved to ~/Downloads/sunoflo_ultimate_{artist.replace(' ', '_')}.txt")
 
@@ -0,0 +1,164 @@
+"""
+SunoFLO - Syllables
+Syllable counts and a line fitter for the VERSE_STRUCTURES meter
+
+Counts come from a lexicon table first (irregular words, slang and anything
+loaded from a pronouncing dictionary), then from a spelling heuristic built
+on the rhyme index's syllable splitter; both are cached per word. The fitter
+picks a core line that ends on the rhyme and pads it with lead-in ad-libs to
+the target count.
+
+    python src/syllables.py "I been stackin' paper, got my money right"
+"""
+
+import re
+import sys
+import itertools
+import argparse
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+from rhymes import syllables as _split
+
+# ========== LEXICON ==========
+# Words the heuristic miscounts, as rapped/sung (every = "ev-ry")
+LEXICON: Dict[str, int] = {
+    "every": 2, "everything": 3, "everybody": 4, "everyday": 3, "everywhere": 3,
+    "different": 2, "business": 2, "family": 2, "camera": 2, "chocolate": 2, "diamond": 2,
+    "diamonds": 2, "interest": 2, "evening": 2, "favorite": 2, "memory": 3, "hundred": 2,
+    "eye": 1, "eyes": 1, "fire": 1, "fires": 1, "hour": 1, "hours": 1, "our": 1, "flower": 2,
+    "power": 2, "tower": 2, "rhyme": 1, "rhymes": 1, "type": 1, "style": 1, "people": 2,
+    "being": 2, "going": 2, "doing": 2, "seeing": 2, "quiet": 2, "lion": 2, "science": 2,
+    "violence": 3, "idea": 3, "ideas": 3, "area": 3, "via": 2, "poem": 2, "poet": 2,
+    "create": 2, "created": 3, "video": 3, "radio": 3, "studio": 3, "society": 4,
+    "anxiety": 4, "reality": 4, "priority": 4, "ability": 4, "naked": 2, "wicked": 2,
+    "sacred": 2, "crooked": 2, "beloved": 3, "dj": 2, "tv": 2, "ok": 2, "i'ma": 2,
+    "gonna": 2, "wanna": 2, "tryna": 2, "gotta": 2, "lil": 1, "'cause": 1, "cause": 1,
+    "cuz": 1, "real": 1, "ain't": 1, "y'all": 1, "lifestyle": 2, "somebody": 3, "maybe": 2,
+}
+
+_WORD = re.compile(r"[a-z0-9']+")
+_SIBILANT = ("s", "z", "x", "ch", "sh", "ge", "ce")
+_VOWEL = set("aeiouy")
+
+
+def load_lexicon(path: str) -> int:
+    """Merge a pronouncing dictionary into LEXICON; returns words added
+
+    Accepts "word count" lines or CMU dict lines ("WORD  W ER1 D", one
+    stress digit per syllable).
+    """
+    added = 0
+    with open(path, encoding="latin-1") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 2 or line.startswith(";;;"):
+                continue
+            word = re.sub(r"\(\d+\)$", "", parts[0].lower())   # CMU alternates: WORD(2)
+            if len(parts) == 2 and parts[1].isdigit():
+                n = int(parts[1])
+            else:
+                n = sum(p[-1].isdigit() for p in parts[1:])
+            if n and word not in LEXICON:
+                LEXICON[word] = n
+                added += 1
+    count.cache_clear()
+    line_syllables.cache_clear()
+    return added
+
+
+# ========== COUNTING ==========
+def _heuristic(word: str) -> int:
+    """Vowel-group count with English suffix rules"""
+    if not any(c.isalpha() for c in word):
+        return len(word)   # digits: one per figure
+    extra = 0
+    if word.endswith("n't") and word[-4:-3] not in _VOWEL:
+        extra, word = 1, word[:-3]          # didn't, couldn't (but don't, can't)
+    elif word.endswith("es") and word[:-1].endswith(_SIBILANT):
+        extra, word = 1, word[:-2]          # changes, boxes
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]                    # ones, nights
+    if word.endswith("ed") and len(word) > 3 and word[-3] not in "td":
+        word = word[:-2]                    # learned, stayed (but started)
+    if word.endswith("le") and len(word) > 2 and word[-3] not in _VOWEL and word[-3] != "l":
+        extra += 1                          # struggle, hustle
+    return max(1, len(_split(word))) + extra
+
+
+@lru_cache(maxsize=65536)
+def count(word: str) -> int:
+    """Syllables in one word"""
+    word = word.lower()
+    n = LEXICON.get(word)
+    return n if n is not None else _heuristic(word.strip("'"))
+
+
+@lru_cache(maxsize=65536)
+def line_syllables(line: str) -> int:
+    """Syllables in a line or clause (template clauses repeat, so this is cached too)"""
+    return sum(count(w) for w in _WORD.findall(line.lower()))
+
+
+# ========== FITTING ==========
+def _join(pieces: Sequence[str]) -> str:
+    """Lead-ins then the core line, only the first piece keeping its capital"""
+    out = pieces[0]
+    for piece in pieces[1:]:
+        keep = piece.startswith(("I ", "I'"))
+        out += piece if keep else piece[:1].lower() + piece[1:]
+    return out
+
+
+@lru_cache(maxsize=64)
+def _combos(fillers: Tuple[str, ...], max_fillers: int) -> Dict[int, List[Tuple[int, ...]]]:
+    """Syllables -> every ordered choice of up to max_fillers distinct fillers adding up to it"""
+    sizes = [line_syllables(filler) for filler in fillers]
+    combos: Dict[int, List[Tuple[int, ...]]] = {0: [()]}
+    for n in range(1, max_fillers + 1):
+        for combo in itertools.permutations(range(len(fillers)), n):
+            combos.setdefault(sum(sizes[i] for i in combo), []).append(combo)
+    return combos
+
+
+def fit_line(cores: Sequence[str], target: int, fillers: Sequence[str], rng,
+             tolerance: int = 1, max_fillers: int = 2) -> Tuple[str, int]:
+    """Pick a core line that can reach target and pad it with lead-in fillers
+
+    Cores are whole lines (they end on the rhyme, so nothing is cut); fillers
+    are short ad-libs ("Yeah, ") put in front. Among cores that fillers can
+    bring to target, one needing little padding is drawn at random and
+    padded to the exact count, or within `tolerance` when nothing is exact.
+    With no reachable core the closest one is returned as is. Returns
+    (line, syllables).
+    """
+    counts = [line_syllables(core) for core in cores]
+    combos = _combos(tuple(fillers), max_fillers)
+    for miss in range(tolerance + 1):
+        options = [(i, pad) for i, n in enumerate(counts)
+                   for pad in (target - n - miss, target - n + miss) if pad in combos]
+        if options:
+            # Lean on the words, not the ad-libs: cores needing the least padding (plus a little slack)
+            least = min(pad for _, pad in options)
+            i, pad = rng.choice([option for option in options if option[1] <= least + 1])
+            combo = rng.choice(combos[pad])
+            return _join([fillers[f] for f in combo] + [cores[i]]), counts[i] + pad
+    best = min(range(len(cores)), key=lambda i: abs(counts[i] - target))
+    return cores[best], counts[best]
+
+
+# ========== CLI ==========
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SunoFLO syllable counter")
+    parser.add_argument("lines", nargs="+")
+    parser.add_argument("--lexicon", help="Pronouncing dictionary (CMU dict or 'word count' lines)")
+    args = parser.parse_args(argv)
+    if args.lexicon:
+        print(f"✓ {load_lexicon(args.lexicon):,} words from {args.lexicon}")
+    for line in args.lines:
+        words = " ".join(f"{w}({count(w)})" for w in _WORD.findall(line.lower()))
+        print(f"{line_syllables(line):3}  {words}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())